@@ -32,6 +32,20 @@ def database_url() -> str:
 
 
 SQLALCHEMY_DATABASE_URI: str = database_url()
+
+
+# Redis of the bot: edits in the panel invalidate the bot's cache
+def redis_url() -> str:
+    redis_host: str = os.getenv("REDIS_HOST") or "localhost"
+    redis_port: int = int(os.getenv("REDIS_PORT") or 6379)
+    redis_pass: str | None = os.getenv("REDIS_PASS")
+
+    if redis_pass:
+        return f"redis://:{redis_pass}@{redis_host}:{redis_port}/0"
+    return f"redis://{redis_host}:{redis_port}/0"
+
+
+REDIS_URL: str = redis_url()
 SQLALCHEMY_ECHO = False
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 
@@ -1,5 +1,34 @@
 # ruff: noqa: RUF012
+from __future__ import annotations
+import logging
+import time
+from typing import Any
+
 from flask_admin.contrib.sqla import ModelView
+from redis import Redis
+from redis.exceptions import RedisError
+
+from admin.config import REDIS_URL
+from bot.cache.keys import INVALIDATION_CHANNEL, USERS_TAG, generation_key, invalidation_message, user_tag
+
+logger = logging.getLogger(__name__)
+
+redis_client = Redis.from_url(REDIS_URL, socket_timeout=1.0, socket_connect_timeout=1.0)
+
+
+def invalidate_user_cache(user_id: int) -> None:
+    """Expire everything the bot has cached about the user and the users list."""
+    keys = [generation_key(user_tag(user_id)), generation_key(USERS_TAG)]
+    try:
+        with redis_client.pipeline(transaction=False) as pipeline:
+            for key in keys:
+                # Seed a lost counter with the current time, as the bot does, so INCR never restarts it at 1
+                pipeline.set(key, time.time_ns(), nx=True)
+                pipeline.incr(key)
+            pipeline.publish(INVALIDATION_CHANNEL, invalidation_message("admin", keys))
+            pipeline.execute()
+    except RedisError as e:
+        logger.warning("Bot cache invalidation failed for user %s: %s", user_id, e)
 
 
 class UserView(ModelView):
@@ -27,3 +56,9 @@ class UserView(ModelView):
         "created_at",
     ]
     column_default_sort = ("created_at", True)
+
+    def after_model_change(self, form: Any, model: Any, is_created: bool) -> None:
+        invalidate_user_cache(model.id)
+
+    def after_model_delete(self, model: Any) -> None:
+        invalidate_user_cache(model.id)
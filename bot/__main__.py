@@ -5,9 +5,12 @@ import sentry_sdk
 from loguru import logger
 from sentry_sdk.integrations.loguru import LoggingLevels, LoguruIntegration
 
+from bot.cache.local import InvalidationSubscriber
 from bot.core.config import settings
-from bot.core.loader import app, bot, dp
+from bot.core.loader import app, bot, dp, redis_client
 from bot.services.scheduler import setup_scheduler, start_scheduler, stop_scheduler, set_bot_instance
+from bot.services.prayer_cards import PrayerCardRenderer
+from bot.services.prayer_service import PrayerService
 from bot.handlers import get_handlers_router
 from bot.handlers.metrics import MetricsView
 from bot.keyboards.default_commands import remove_default_commands, set_default_commands
@@ -46,6 +49,11 @@ async def on_startup() -> None:
         logger.error(f"Database initialization failed: {e}")
         logger.warning("Bot will continue without database")
 
+    # Проверка Redis: при недоступности кэш работает в памяти процесса до восстановления
+    if await redis_client.ping():
+        logger.info("Redis connected")
+    InvalidationSubscriber.start()
+
     # Устанавливаем экземпляр бота в планировщике
     set_bot_instance(bot)
     
@@ -92,11 +100,21 @@ async def on_shutdown() -> None:
 
     # Остановка планировщика уведомлений
     try:
-        stop_scheduler()
+        await stop_scheduler()
         logger.info("Планировщик уведомлений остановлен")
     except Exception as e:
         logger.error(f"Ошибка остановки планировщика: {e}")
 
+    # Закрытие HTTP-сессии API расписаний намазов
+    await PrayerService.close()
+
+    # Остановка пула отрисовки карточек расписания
+    PrayerCardRenderer.shutdown()
+
+    # Закрытие пула соединений Redis
+    await InvalidationSubscriber.stop()
+    await redis_client.close()
+
     # Закрытие пула соединений базы данных
     await engine.dispose()
     logger.info("Database connection pool closed")
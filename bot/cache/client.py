@@ -0,0 +1,248 @@
+"""Redis client with an in-process fallback.
+
+`FailoverRedis` talks to Redis through a bounded connection pool. When Redis
+stops answering, the client switches to a bounded in-process LRU/TTL store and
+probes Redis with PING on later calls; once Redis answers again, calls go back
+to it and the in-process store is dropped.
+"""
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Any
+
+from cachetools import TLRUCache
+from loguru import logger
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from datetime import timedelta
+
+    from bot.core.config import Settings
+
+# Errors that mean "Redis is unreachable", as opposed to a bad command
+UNAVAILABLE_ERRORS = (RedisConnectionError, RedisTimeoutError, OSError)
+
+PipelineCommand = tuple[str, tuple[Any, ...], dict[str, Any]]
+
+
+def _seconds(ttl: int | timedelta | None) -> float | None:
+    if ttl is None:
+        return None
+    if isinstance(ttl, int | float):
+        return float(ttl)
+    return ttl.total_seconds()
+
+
+def _encode(value: Any) -> bytes:
+    """Encode a value the way Redis stores it, so both backends return the same bytes."""
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode()
+    if isinstance(value, int | float):
+        return repr(value).encode()
+    msg = f"Invalid input of type: {type(value).__name__!r}"
+    raise TypeError(msg)
+
+
+class MemoryCache:
+    """Bounded in-process key-value store with per-key expiry and LRU eviction."""
+
+    def __init__(self, maxsize: int) -> None:
+        # Values are stored as (value, expires_at); expires_at is a time.monotonic() deadline
+        self._data: TLRUCache[str, tuple[bytes, float]] = TLRUCache(
+            maxsize=maxsize,
+            ttu=lambda _key, value, _now: value[1],
+            timer=time.monotonic,
+        )
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    async def get(self, key: str) -> bytes | None:
+        item = self._data.get(key)
+        return item[0] if item is not None else None
+
+    async def mget(self, keys: Iterable[str]) -> list[bytes | None]:
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: str, value: Any, ex: int | timedelta | None = None, nx: bool = False) -> bool | None:
+        if nx and key in self._data:
+            return None
+        seconds = _seconds(ex)
+        expires_at = time.monotonic() + seconds if seconds is not None else float("inf")
+        self._data[key] = (_encode(value), expires_at)
+        return True
+
+    async def expire(self, key: str, ttl: int | timedelta) -> bool:
+        item = self._data.get(key)
+        if item is None:
+            return False
+        self._data[key] = (item[0], time.monotonic() + (_seconds(ttl) or 0.0))
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        value, expires_at = self._data.get(key, (b"0", float("inf")))
+        result = int(value) + amount
+        self._data[key] = (_encode(result), expires_at)
+        return result
+
+
+class Pipeline:
+    """Buffered command pipeline that runs on whichever backend is current at execute()."""
+
+    def __init__(self, client: FailoverRedis, transaction: bool) -> None:
+        self._client = client
+        self._transaction = transaction
+        self._commands: list[PipelineCommand] = []
+
+    async def __aenter__(self) -> Pipeline:
+        return self
+
+    async def __aexit__(self, exc_type: object, exc_val: object, exc_tb: object) -> None:
+        self._commands.clear()
+
+    def _add(self, name: str, *args: Any, **kwargs: Any) -> Pipeline:
+        self._commands.append((name, args, kwargs))
+        return self
+
+    async def set(self, key: str, value: Any, ex: int | timedelta | None = None, nx: bool = False) -> Pipeline:
+        return self._add("set", key, value, ex=ex, nx=nx)
+
+    async def expire(self, key: str, ttl: int | timedelta) -> Pipeline:
+        return self._add("expire", key, ttl)
+
+    async def delete(self, *keys: str) -> Pipeline:
+        return self._add("delete", *keys)
+
+    async def incr(self, key: str, amount: int = 1) -> Pipeline:
+        return self._add("incr", key, amount)
+
+    async def execute(self) -> list[Any]:
+        commands, self._commands = self._commands, []
+        return await self._client.execute_pipeline(commands, transaction=self._transaction)
+
+
+class FailoverRedis:
+    """Pooled `redis.asyncio` client that degrades to `MemoryCache` while Redis is unavailable.
+
+    Args:
+        redis (Redis): Client owning its connection pool; `close()` closes both.
+        fallback (MemoryCache): In-process store used while Redis is down.
+        probe_interval (float): Seconds between reconnection attempts while degraded.
+
+    """
+
+    def __init__(self, redis: Redis, fallback: MemoryCache, probe_interval: float = 5.0) -> None:
+        self.redis = redis
+        self.fallback = fallback
+        self.probe_interval = probe_interval
+        self._available = True
+        self._next_probe = 0.0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> FailoverRedis:
+        pool = ConnectionPool.from_url(
+            settings.redis_url,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_keepalive=True,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        )
+        return cls(
+            # The client owns the pool, so close() disconnects the pooled connections too
+            redis=Redis.from_pool(pool),
+            fallback=MemoryCache(maxsize=settings.REDIS_FALLBACK_MAXSIZE),
+            probe_interval=settings.REDIS_HEALTH_CHECK_INTERVAL / 6,
+        )
+
+    @property
+    def available(self) -> bool:
+        """Whether calls currently go to Redis."""
+        return self._available
+
+    def _mark_unavailable(self, error: BaseException) -> None:
+        if self._available:
+            logger.warning(f"Redis is unavailable, using the in-process cache: {error!r}")
+        self._available = False
+        self._next_probe = time.monotonic() + self.probe_interval
+
+    async def ping(self) -> bool:
+        """Check Redis now and switch backends accordingly."""
+        try:
+            await self.redis.ping()
+        except UNAVAILABLE_ERRORS as e:
+            self._mark_unavailable(e)
+            return False
+        if not self._available:
+            # Entries written while degraded may be stale compared to Redis
+            self.fallback.clear()
+            self._available = True
+            logger.info("Redis is available again")
+        return True
+
+    async def _use_redis(self) -> bool:
+        if self._available:
+            return True
+        if time.monotonic() < self._next_probe:
+            return False
+        return await self.ping()
+
+    async def _call(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        if await self._use_redis():
+            try:
+                return await getattr(self.redis, name)(*args, **kwargs)
+            except UNAVAILABLE_ERRORS as e:
+                self._mark_unavailable(e)
+        return await getattr(self.fallback, name)(*args, **kwargs)
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._call("get", key)
+
+    async def mget(self, keys: Iterable[str]) -> list[bytes | None]:
+        return await self._call("mget", list(keys))
+
+    async def set(self, key: str, value: Any, ex: int | timedelta | None = None, nx: bool = False) -> bool | None:
+        return await self._call("set", key, value, ex=ex, nx=nx)
+
+    async def expire(self, key: str, ttl: int | timedelta) -> bool:
+        return await self._call("expire", key, ttl)
+
+    async def delete(self, *keys: str) -> int:
+        if not keys:
+            return 0
+        return await self._call("delete", *keys)
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        return await self._call("incr", key, amount)
+
+    def pipeline(self, transaction: bool = False) -> Pipeline:
+        return Pipeline(self, transaction=transaction)
+
+    async def execute_pipeline(self, commands: list[PipelineCommand], transaction: bool = False) -> list[Any]:
+        """Run buffered pipeline commands in one round-trip (or against the fallback)."""
+        if not commands:
+            return []
+        if await self._use_redis():
+            try:
+                async with self.redis.pipeline(transaction=transaction) as pipeline:
+                    for name, args, kwargs in commands:
+                        getattr(pipeline, name)(*args, **kwargs)
+                    return await pipeline.execute()
+            except UNAVAILABLE_ERRORS as e:
+                self._mark_unavailable(e)
+        return [await getattr(self.fallback, name)(*args, **kwargs) for name, args, kwargs in commands]
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+        self.fallback.clear()
@@ -0,0 +1,36 @@
+"""Names of service keys and channels of the cache layer.
+
+Kept free of bot imports and third-party dependencies so that other
+processes (the admin panel) can invalidate the bot's cache with their own
+Redis client.
+"""
+from __future__ import annotations
+
+import json
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+GENERATION_PREFIX = "gen"
+
+# Tag of all cached data derived from the users table as a whole (lists, counters)
+USERS_TAG = "users"
+
+
+def generation_key(tag: str) -> str:
+    """Key of the generation counter of a tag."""
+    return f"{GENERATION_PREFIX}:{tag}"
+
+
+def namespace_tag(namespace: str) -> str:
+    """Tag every entry of a `cached` namespace carries."""
+    return f"ns:{namespace}"
+
+
+def user_tag(user_id: int) -> str:
+    """Tag of cached data about one user."""
+    return f"user:{user_id}"
+
+
+def invalidation_message(origin: str, keys: list[str] | tuple[str, ...]) -> str:
+    """Payload published on INVALIDATION_CHANNEL."""
+    return json.dumps({"origin": origin, "keys": list(keys)})
@@ -0,0 +1,136 @@
+"""In-process (L1) tier of the cache and its cross-process invalidation.
+
+`cached(local_ttl=...)` keeps deserialized values in `local_cache` in front of
+Redis. `clear_cache` drops the key locally and publishes it on
+`INVALIDATION_CHANNEL`; `InvalidationSubscriber` running in every bot process
+drops the same key from its own L1 tier.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+import uuid
+from typing import TYPE_CHECKING, Any
+
+import orjson
+from cachetools import TLRUCache
+from loguru import logger
+
+from bot.cache.keys import INVALIDATION_CHANNEL, invalidation_message
+from bot.core.config import settings
+from bot.core.loader import redis_client
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from datetime import timedelta
+
+# Identifies this process in invalidation messages, so it skips its own
+PROCESS_ID = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+MISSING: Any = object()
+
+
+class LocalCache:
+    """Bounded LRU store of deserialized values with per-key expiry."""
+
+    def __init__(self, maxsize: int) -> None:
+        # Values are stored as (value, expires_at); expires_at is a time.monotonic() deadline
+        self._data: TLRUCache[str, tuple[Any, float]] = TLRUCache(
+            maxsize=maxsize,
+            ttu=lambda _key, value, _now: value[1],
+            timer=time.monotonic,
+        )
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Any:
+        """Return the cached value or `MISSING`."""
+        item = self._data.get(key)
+        return item[0] if item is not None else MISSING
+
+    def set(self, key: str, value: Any, ttl: int | timedelta) -> None:
+        seconds = ttl if isinstance(ttl, int | float) else ttl.total_seconds()
+        self._data[key] = (value, time.monotonic() + seconds)
+
+    def delete(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+local_cache = LocalCache(maxsize=settings.CACHE_LOCAL_MAXSIZE)
+
+
+async def publish_invalidation(*keys: str) -> None:
+    """Drop keys from the L1 tier of this and every other bot process."""
+    local_cache.delete(keys)
+    if not keys or not redis_client.available:
+        return
+    try:
+        await redis_client.redis.publish(INVALIDATION_CHANNEL, invalidation_message(PROCESS_ID, keys))
+    except Exception as e:
+        logger.warning(f"Cache invalidation was not published: {e!r}")
+
+
+class InvalidationSubscriber:
+    """Background task applying invalidations published by other processes."""
+
+    # Pause before resubscribing after a Redis error, seconds
+    RECONNECT_DELAY = 5.0
+    # Read timeout of a single poll; keeps reads independent of the pool socket timeout
+    POLL_TIMEOUT = 1.0
+
+    _task: asyncio.Task | None = None
+
+    @classmethod
+    def start(cls) -> None:
+        if cls._task is None or cls._task.done():
+            cls._task = asyncio.create_task(cls._run(), name="cache-invalidation")
+
+    @classmethod
+    async def stop(cls) -> None:
+        if cls._task is None:
+            return
+        cls._task.cancel()
+        try:
+            await cls._task
+        except asyncio.CancelledError:
+            pass
+        cls._task = None
+
+    @classmethod
+    async def _run(cls) -> None:
+        subscribed = True
+        while True:
+            try:
+                async with redis_client.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    # Invalidations published while unsubscribed are lost, so nothing cached before is trusted
+                    local_cache.clear()
+                    subscribed = True
+                    while True:
+                        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=cls.POLL_TIMEOUT)
+                        if message is not None:
+                            cls._apply(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if subscribed:
+                    logger.warning(f"Cache invalidation subscription lost: {e!r}")
+                subscribed = False
+                local_cache.clear()
+                await asyncio.sleep(cls.RECONNECT_DELAY)
+
+    @staticmethod
+    def _apply(data: bytes) -> None:
+        try:
+            payload = orjson.loads(data)
+        except orjson.JSONDecodeError:
+            logger.warning(f"Malformed cache invalidation message: {data!r}")
+            return
+        if payload.get("origin") != PROCESS_ID:
+            local_cache.delete(payload.get("keys", ()))
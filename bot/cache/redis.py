@@ -1,18 +1,38 @@
 from __future__ import annotations
+import asyncio
+import struct
+import time
+import uuid
+from datetime import timedelta
 from functools import wraps
 from typing import TYPE_CHECKING, Any, TypeVar
 
-from bot.cache.serialization import AbstractSerializer, PickleSerializer
+from loguru import logger
+
+from bot.cache.local import MISSING, local_cache, publish_invalidation
+from bot.cache.keys import namespace_tag
+from bot.cache.serialization import AbstractSerializer, PickleSerializer, RowSerializer, SerializationError, get_serializer
+from bot.cache.tags import get_generations, pack_generations, unpack_generations
 from bot.core.loader import redis_client
 
 if TYPE_CHECKING:
-    from collections.abc import Awaitable, Callable
-    from datetime import timedelta
+    from collections.abc import Awaitable, Callable, Iterable
 
     from redis.asyncio import Redis
 
 
 DEFAULT_TTL = 10
+# How long a cross-process recomputation lock is held at most, seconds
+DEFAULT_LOCK_TIMEOUT = 30
+LOCK_POLL_INTERVAL = 0.05
+
+# Prefix of entries cached with soft_ttl: the time.time() after which the value is stale
+_STALE_AT = struct.Struct("!d")
+
+# Computations in progress in this process, by cache key
+_inflight: dict[str, asyncio.Future[Any]] = {}
+# Background refreshes of stale entries (references keep the tasks alive)
+_refreshes: set[asyncio.Task[Any]] = set()
 
 _Func = TypeVar("_Func")
 Args = str | int  # basically only user_id is used as identifier
@@ -41,12 +61,87 @@ async def set_redis_value(
         await pipeline.execute()
 
 
+def _refresh_done(task: asyncio.Task[Any]) -> None:
+    _refreshes.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Background cache refresh failed: {task.exception()!r}")
+
+
+def _retrieve_exception(future: asyncio.Future[Any]) -> None:
+    if not future.cancelled():
+        future.exception()
+
+
+async def single_flight(key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+    """Run `compute` once per key at a time in this process; concurrent callers share its result."""
+    while (future := _inflight.get(key)) is not None:
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            # The computing caller was cancelled: take over
+
+    future = asyncio.get_running_loop().create_future()
+    future.add_done_callback(_retrieve_exception)
+    _inflight[key] = future
+    try:
+        result = await compute()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        _inflight.pop(key, None)
+
+
+async def _compute_locked(
+    cache: Redis,
+    key: str,
+    compute: Callable[[], Awaitable[Any]],
+    load: Callable[[], Awaitable[Any]],
+    timeout: int,
+) -> Any:
+    """Recompute under a Redis lock; other processes wait for the holder to store the value."""
+    lock_key = f"lock:{key}"
+    token = uuid.uuid4().hex
+    if await cache.set(lock_key, token, ex=timeout, nx=True):
+        try:
+            return await compute()
+        finally:
+            # The lock may have expired and been taken by another process meanwhile
+            if await cache.get(lock_key) == token.encode():
+                await cache.delete(lock_key)
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        value = await load()
+        if value is not MISSING:
+            return value
+        if await cache.get(lock_key) is None:
+            # The holder failed without storing a value
+            break
+    return await compute()
+
+
 def cached(
     ttl: int | timedelta = DEFAULT_TTL,
     namespace: str = "main",
     cache: Redis = redis_client,
     key_builder: Callable[..., str] = build_key,
-    serializer: AbstractSerializer | None = None,
+    serializer: AbstractSerializer | str | None = None,
+    row_type: type | None = None,
+    local_ttl: int | timedelta | None = None,
+    lock: bool = False,
+    lock_timeout: int = DEFAULT_LOCK_TIMEOUT,
+    soft_ttl: float | timedelta | None = None,
+    tags: Iterable[str] | Callable[..., Iterable[str]] = (),
 ) -> Callable[[Callable[..., Awaitable[_Func]]], Callable[..., Awaitable[_Func]]]:
     """Caches the function's return value into a key generated with module_name, function_name, and args.
 
@@ -55,14 +150,61 @@ def cached(
         namespace (str): Namespace for cache keys.
         cache (Redis): Redis instance for storing cached data.
         key_builder (Callable[..., str]): Function to build cache keys.
-        serializer (AbstractSerializer | None): Serializer for cache data.
+        serializer (AbstractSerializer | str | None): Serializer for cache data, or the name
+            of a registered one. Defaults to `RowSerializer(row_type)` if `row_type` is given,
+            otherwise to pickle.
+        row_type (type | None): NamedTuple or dataclass the result (a row, a list of rows or None)
+            is converted to. Rows are cached as compact versioned tuples instead of pickled objects.
+        local_ttl (int | timedelta | None): Time-to-live in the in-process (L1) tier in front of Redis.
+            Values are shared between callers, so only use it for immutable results.
+            Disabled by default.
+        lock (bool): Recompute a missing value under a Redis lock, so that only one process
+            runs the function while the others wait for its result.
+        lock_timeout (int): Maximum time the lock is held, seconds.
+        soft_ttl (float | timedelta | None): Age after which a value is stale: it is still returned
+            (until `ttl` expires) while one background task recomputes it. The refresh reuses the
+            call's arguments, so only use it for functions whose arguments outlive the call
+            (not for ones taking a database session).
+        tags (Iterable[str] | Callable[..., Iterable[str]]): Tags of the entry, or a function building
+            them from the call's arguments. `invalidate_tags` expires every entry with any of its tags,
+            `invalidate_namespace` every entry of the namespace.
+
+    Concurrent misses of one key in a process are coalesced into one call of the function.
 
     Returns:
         Callable: A decorator that wraps the original function with caching logic.
 
     """
-    if serializer is None:
-        serializer = PickleSerializer()
+    if isinstance(serializer, str):
+        serializer = get_serializer(serializer, row_type=row_type) if row_type else get_serializer(serializer)
+    elif serializer is None:
+        serializer = RowSerializer(row_type) if row_type else PickleSerializer()
+    if row_type is not None and not isinstance(serializer, RowSerializer):
+        msg = "row_type requires a RowSerializer"
+        raise TypeError(msg)
+    if soft_ttl is not None and not isinstance(soft_ttl, timedelta):
+        soft_ttl = timedelta(seconds=soft_ttl)
+
+    def encode(result: Any, generations: tuple[int, ...]) -> bytes:
+        value = serializer.serialize(result)
+        if soft_ttl:
+            stale_at = time.time() + soft_ttl.total_seconds()
+            value = _STALE_AT.pack(stale_at) + value
+        return pack_generations(generations) + value
+
+    def decode(value: bytes) -> tuple[Any, bool, tuple[int, ...]]:
+        """Return the cached result, whether it is stale and its generations.
+
+        Raises SerializationError for entries this deploy cannot read.
+        """
+        generations, value = unpack_generations(value)
+        if not soft_ttl:
+            return serializer.deserialize(value), False, generations
+        try:
+            (stale_at,) = _STALE_AT.unpack_from(value)
+        except struct.error as e:
+            raise SerializationError(str(e)) from e
+        return serializer.deserialize(value[_STALE_AT.size:]), time.time() >= stale_at, generations
 
     def decorator(func: Callable[..., Awaitable[_Func]]) -> Callable[..., Awaitable[_Func]]:
         @wraps(func)
@@ -70,22 +212,67 @@ def cached(
             key = key_builder(*args, **kwargs)
             key = f"{namespace}:{func.__module__}:{func.__name__}:{key}"
 
-            # Check if the key is in the cache
-            cached_value = await cache.get(key)
-            if cached_value is not None:
-                return serializer.deserialize(cached_value)
+            entry_tags = [namespace_tag(namespace), *(tags(*args, **kwargs) if callable(tags) else tags)]
+            generations = await get_generations(entry_tags)
+
+            if local_ttl:
+                local_value = local_cache.get(key)
+                if local_value is not MISSING and local_value[0] == generations:
+                    return local_value[1]
 
-            # If not in cache, call the original function
-            result = await func(*args, **kwargs)
+            async def load() -> Any:
+                cached_value = await cache.get(key)
+                if cached_value is None:
+                    return MISSING
+                try:
+                    result, stale, stored_generations = decode(cached_value)
+                except SerializationError:
+                    # Written by a deploy with another schema: recompute and overwrite
+                    return MISSING
+                if stored_generations != generations:
+                    # One of the tags was invalidated after the value was computed
+                    return MISSING
+                if stale:
+                    refresh()
+                elif local_ttl:
+                    local_cache.set(key, (generations, result), local_ttl)
+                return result
 
-            # Store the result in Redis
-            await set_redis_value(
-                key=key,
-                value=serializer.serialize(result),
-                ttl=ttl,
-            )
+            async def compute() -> Any:
+                result = await func(*args, **kwargs)
+                if row_type is not None:
+                    result = serializer.convert(result)
+
+                # Store the result in Redis
+                await set_redis_value(
+                    key=key,
+                    value=encode(result, generations),
+                    ttl=ttl,
+                )
+                if local_ttl:
+                    local_cache.set(key, (generations, result), local_ttl)
+
+                return result
+
+            async def compute_once() -> Any:
+                if lock:
+                    return await _compute_locked(cache, key, compute, load, lock_timeout)
+                return await compute()
+
+            def refresh() -> None:
+                if key in _inflight:
+                    return
+                task = asyncio.create_task(single_flight(key, compute_once))
+                _refreshes.add(task)
+                task.add_done_callback(_refresh_done)
+
+            # Check if the key is in the cache
+            result = await load()
+            if result is not MISSING:
+                return result
 
-            return result
+            # If not in cache, call the original function (once for all concurrent callers)
+            return await single_flight(key, compute_once)
 
         return wrapper
 
@@ -97,7 +284,7 @@ async def clear_cache(
     *args: Args,
     **kwargs: Kwargs,
 ) -> None:
-    """Clear the cache for a specific function and arguments.
+    """Clear the cache for a specific function and arguments in Redis and in the L1 tier of every process.
 
     Parameters
     ----------
@@ -115,3 +302,4 @@ async def clear_cache(
     key = f"{namespace}:{func.__module__}:{func.__name__}:{key}"
 
     await redis_client.delete(key)
+    await publish_invalidation(key)
@@ -1,10 +1,63 @@
 # ruff: noqa: S301
+from __future__ import annotations
+
+import dataclasses
 import pickle
+import struct
+import types
+import typing
+import zlib
 from abc import ABC, abstractmethod
-from typing import Any
+from collections.abc import Mapping
+from datetime import date, datetime
+from typing import Any, Callable, TypeVar
 
 import orjson
 
+from bot.core.config import settings
+
+try:
+    import msgpack
+except ImportError:  # optional: RowSerializer falls back to orjson
+    msgpack = None
+
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    try:
+        from backports import zstd
+    except ImportError:  # optional: values are stored uncompressed
+        zstd = None
+
+
+_Serializer = TypeVar("_Serializer", bound=type["AbstractSerializer"])
+
+SERIALIZERS: dict[str, type[AbstractSerializer]] = {}
+
+
+def register_serializer(name: str) -> Callable[[_Serializer], _Serializer]:
+    """Register a serializer class under a name usable as `cached(serializer=name)`."""
+
+    def decorator(cls: _Serializer) -> _Serializer:
+        SERIALIZERS[name] = cls
+        return cls
+
+    return decorator
+
+
+def get_serializer(name: str, **kwargs: Any) -> AbstractSerializer:
+    """Instantiate a registered serializer by name."""
+    try:
+        serializer_class = SERIALIZERS[name]
+    except KeyError:
+        msg = f"Unknown serializer {name!r}, available: {', '.join(sorted(SERIALIZERS))}"
+        raise ValueError(msg) from None
+    return serializer_class(**kwargs)
+
+
+class SerializationError(ValueError):
+    """The cached value cannot be decoded, e.g. it was written by a deploy with another schema."""
+
 
 class AbstractSerializer(ABC):
     @abstractmethod
@@ -16,6 +69,7 @@ class AbstractSerializer(ABC):
         """Support for deserializing objects stored in Redis."""
 
 
+@register_serializer("pickle")
 class PickleSerializer(AbstractSerializer):
     """Serialize values using pickle."""
 
@@ -27,6 +81,7 @@ class PickleSerializer(AbstractSerializer):
         return pickle.loads(obj)
 
 
+@register_serializer("json")
 class JSONSerializer(AbstractSerializer):
     """Serialize values using JSON."""
 
@@ -36,3 +91,154 @@ class JSONSerializer(AbstractSerializer):
     def deserialize(self, obj: str) -> Any:
         """Deserialize values using JSON."""
         return orjson.loads(obj)
+
+
+if msgpack is not None:
+
+    @register_serializer("msgpack")
+    class MsgpackSerializer(AbstractSerializer):
+        """Serialize values using MessagePack."""
+
+        def serialize(self, obj: Any) -> bytes:
+            return msgpack.packb(obj)
+
+        def deserialize(self, obj: bytes) -> Any:
+            """Deserialize values using MessagePack."""
+            return msgpack.unpackb(obj)
+
+
+def _field_decoder(hint: Any) -> Callable[[Any], Any] | None:
+    """Decoder restoring a field value from its JSON/MessagePack form (dates are stored as ISO strings)."""
+    if isinstance(hint, types.UnionType) or typing.get_origin(hint) is typing.Union:
+        hints = [arg for arg in typing.get_args(hint) if arg is not type(None)]
+        hint = hints[0] if len(hints) == 1 else None
+    if hint is datetime:
+        return datetime.fromisoformat
+    if hint is date:
+        return date.fromisoformat
+    return None
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+@register_serializer("rows")
+class RowSerializer(AbstractSerializer):
+    """Compact, schema-versioned encoding of rows: a row, a list of rows or None.
+
+    Rows are NamedTuples or dataclasses and are stored as bare value tuples.
+    Objects of other types (ORM instances, SQLAlchemy rows, mappings) are
+    converted to `row_type` by field name with `convert`.
+
+    Stored value layout: marker, flags, schema fingerprint, payload. The
+    fingerprint covers `version`, the codec and the row fields with their
+    types, so entries written by a deploy with another row shape fail to
+    decode (`SerializationError`) instead of producing wrong objects.
+    Payloads larger than `compress_threshold` bytes are compressed with
+    zstd when it is available.
+    """
+
+    _MARKER = b"R"
+    _HEADER = struct.Struct("!1sBI")
+    _COMPRESSED = 0b1
+
+    _NONE, _ROW, _ROWS = 0, 1, 2
+
+    def __init__(
+        self,
+        row_type: type,
+        codec: str | None = None,
+        compress_threshold: int | None = None,
+        version: int | None = None,
+    ) -> None:
+        if hasattr(row_type, "_fields"):
+            self._fields: tuple[str, ...] = row_type._fields
+            self._as_tuple: Callable[[Any], tuple[Any, ...]] = tuple
+        elif dataclasses.is_dataclass(row_type):
+            self._fields = tuple(field.name for field in dataclasses.fields(row_type))
+            self._as_tuple = dataclasses.astuple
+        else:
+            msg = f"Row type must be a NamedTuple or a dataclass, got {row_type!r}"
+            raise TypeError(msg)
+
+        self.row_type = row_type
+        self._codec = get_serializer(codec or ("msgpack" if "msgpack" in SERIALIZERS else "json"))
+        self._compress_threshold = (
+            settings.CACHE_COMPRESS_THRESHOLD if compress_threshold is None else compress_threshold
+        )
+
+        hints = typing.get_type_hints(row_type)
+        self._decoders = [_field_decoder(hints.get(name)) for name in self._fields]
+
+        version = settings.CACHE_SCHEMA_VERSION if version is None else version
+        schema = ",".join(f"{name}:{hints.get(name)}" for name in self._fields)
+        signature = f"{version}:{type(self._codec).__name__}:{row_type.__module__}.{row_type.__qualname__}({schema})"
+        self._fingerprint = zlib.crc32(signature.encode())
+
+    def convert(self, obj: Any) -> Any:
+        """Convert a result (object, list of objects or None) to instances of the row type."""
+        if obj is None or isinstance(obj, self.row_type):
+            return obj
+        if isinstance(obj, list | tuple) and not hasattr(obj, "_mapping"):
+            return [self._convert_row(item) for item in obj]
+        return self._convert_row(obj)
+
+    def _convert_row(self, obj: Any) -> Any:
+        if isinstance(obj, self.row_type):
+            return obj
+        if hasattr(obj, "_mapping"):  # sqlalchemy Row
+            obj = obj._mapping
+        if isinstance(obj, Mapping):
+            return self.row_type(*(obj[name] for name in self._fields))
+        return self.row_type(*(getattr(obj, name) for name in self._fields))
+
+    def _pack_row(self, row: Any) -> list[Any]:
+        return [_encode_value(value) for value in self._as_tuple(self._convert_row(row))]
+
+    def _unpack_row(self, values: list[Any]) -> Any:
+        return self.row_type(*(
+            decoder(value) if decoder is not None and value is not None else value
+            for decoder, value in zip(self._decoders, values, strict=True)
+        ))
+
+    def serialize(self, obj: Any) -> bytes:
+        obj = self.convert(obj)
+        if obj is None:
+            data = [self._NONE, None]
+        elif isinstance(obj, list):
+            data = [self._ROWS, [self._pack_row(row) for row in obj]]
+        else:
+            data = [self._ROW, self._pack_row(obj)]
+
+        payload = self._codec.serialize(data)
+        flags = 0
+        if zstd is not None and len(payload) > self._compress_threshold:
+            payload = zstd.compress(payload)
+            flags |= self._COMPRESSED
+        return self._HEADER.pack(self._MARKER, flags, self._fingerprint) + payload
+
+    def deserialize(self, obj: bytes) -> Any:
+        if len(obj) < self._HEADER.size:
+            msg = "Value is too short for a row entry"
+            raise SerializationError(msg)
+        marker, flags, fingerprint = self._HEADER.unpack_from(obj)
+        if marker != self._MARKER or fingerprint != self._fingerprint:
+            msg = "Row entry was written with another schema"
+            raise SerializationError(msg)
+
+        payload = obj[self._HEADER.size:]
+        if flags & self._COMPRESSED:
+            if zstd is None:
+                msg = "Row entry is zstd-compressed, but zstd is not available"
+                raise SerializationError(msg)
+            payload = zstd.decompress(payload)
+
+        kind, data = self._codec.deserialize(payload)
+        if kind == self._NONE:
+            return None
+        if kind == self._ROWS:
+            return [self._unpack_row(values) for values in data]
+        return self._unpack_row(data)
@@ -0,0 +1,82 @@
+"""Generation counters of cache namespaces and tags.
+
+Every `cached` entry is stored together with the generations of its tags
+(the namespace tag and the tags declared by the function) read before the
+value was computed. Invalidating a tag is one INCR of its counter (seeded
+with the current time if it was lost): entries stored under the previous
+generation no longer match and are recomputed on the next read, without
+looking them up or deleting them (they expire by TTL).
+Generations are kept in the in-process cache for a few seconds and dropped
+in every process through the invalidation channel when they change.
+"""
+from __future__ import annotations
+
+import struct
+import time
+from typing import TYPE_CHECKING
+
+from bot.cache.keys import generation_key, namespace_tag
+from bot.cache.local import MISSING, local_cache, publish_invalidation
+from bot.cache.serialization import SerializationError
+from bot.core.loader import redis_client
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+# How long a generation is trusted without asking Redis, seconds
+GENERATION_LOCAL_TTL = 10
+
+_COUNT = struct.Struct("!B")
+_GENERATION = struct.Struct("!Q")
+
+
+async def get_generations(tags: Sequence[str]) -> tuple[int, ...]:
+    """Current generations of tags (from the in-process cache when possible)."""
+    keys = [generation_key(tag) for tag in tags]
+    generations = [local_cache.get(key) for key in keys]
+    missing = [index for index, generation in enumerate(generations) if generation is MISSING]
+    if missing:
+        values = await redis_client.mget([keys[index] for index in missing])
+        for index, value in zip(missing, values, strict=True):
+            if value is None:
+                # A lost counter must not start over and match old entries: start from the current time
+                await redis_client.set(keys[index], time.time_ns(), nx=True)
+                value = await redis_client.get(keys[index])
+            generations[index] = int(value)
+            local_cache.set(keys[index], generations[index], GENERATION_LOCAL_TTL)
+    return tuple(generations)
+
+
+async def invalidate_tags(*tags: str) -> None:
+    """Invalidate every cached entry carrying any of the tags, in all processes."""
+    if not tags:
+        return
+    keys = [generation_key(tag) for tag in tags]
+    async with redis_client.pipeline(transaction=False) as pipeline:
+        for key in keys:
+            # INCR of a lost counter would restart it at 1 and match old entries: seed it like get_generations
+            await pipeline.set(key, time.time_ns(), nx=True)
+            await pipeline.incr(key)
+        await pipeline.execute()
+    await publish_invalidation(*keys)
+
+
+async def invalidate_namespace(namespace: str) -> None:
+    """Invalidate every entry of a `cached` namespace."""
+    await invalidate_tags(namespace_tag(namespace))
+
+
+def pack_generations(generations: Sequence[int]) -> bytes:
+    return _COUNT.pack(len(generations)) + b"".join(_GENERATION.pack(generation) for generation in generations)
+
+
+def unpack_generations(value: bytes) -> tuple[tuple[int, ...], bytes]:
+    """Split a stored value into its generations and the rest."""
+    try:
+        (count,) = _COUNT.unpack_from(value)
+        end = _COUNT.size + count * _GENERATION.size
+        generations = struct.unpack_from(f"!{count}Q", value, _COUNT.size)
+    except struct.error as e:
+        msg = "Value has no generations header"
+        raise SerializationError(msg) from e
+    return generations, value[end:]
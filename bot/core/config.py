@@ -75,6 +75,13 @@ class CacheSettings(EnvBaseSettings):
     REDIS_HOST: str = "redis"
     REDIS_PORT: int = 6379
     REDIS_PASS: str | None = None
+    REDIS_MAX_CONNECTIONS: int = 20
+    REDIS_SOCKET_TIMEOUT: float = 1.0  # секунды; дольше - Redis считается недоступным
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30  # секунды между PING простаивающих соединений
+    REDIS_FALLBACK_MAXSIZE: int = 10_000  # записей в кэше процесса, пока Redis недоступен
+    CACHE_LOCAL_MAXSIZE: int = 10_000  # записей в L1-кэше процесса перед Redis (@cached(local_ttl=...))
+    CACHE_SCHEMA_VERSION: int = 1  # увеличить, чтобы после деплоя не читать закэшированные строки старого формата
+    CACHE_COMPRESS_THRESHOLD: int = 1024  # байт; закэшированные строки длиннее сжимаются zstd
 
     # REDIS_DATABASE: int = 1
     # REDIS_USERNAME: int | None = None
@@ -88,9 +95,25 @@ class CacheSettings(EnvBaseSettings):
         return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}/0"
 
 
-class Settings(BotSettings, DBSettings, CacheSettings):
+class PrayerSettings(EnvBaseSettings):
+    # local - астрономический расчёт без сети, aladhan - запросы к api.aladhan.com
+    PRAYER_TIMES_BACKEND: str = "local"
+    # Карточки расписания: процессов отрисовки и TrueType-шрифт (путь или имя в системных шрифтах)
+    PRAYER_CARD_WORKERS: int = 2
+    PRAYER_CARD_FONT: str = "DejaVuSans.ttf"
+
+
+class BroadcastSettings(EnvBaseSettings):
+    BROADCAST_RATE_LIMIT: float = 30  # сообщений в секунду на всех получателей
+    BROADCAST_WORKERS: int = 16  # параллельных отправителей
+
+
+class Settings(BotSettings, DBSettings, CacheSettings, PrayerSettings, BroadcastSettings):
     DEBUG: bool = False
 
+    # Часовой пояс, в котором вводится и хранится (без пояса) время мероприятий и трансляций
+    EVENTS_TIMEZONE: str = "Europe/Moscow"
+
     SENTRY_DSN: str | None = None
 
     AMPLITUDE_API_KEY: str  # or for example it could be POSTHOG_API_KEY
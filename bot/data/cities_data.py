@@ -0,0 +1,150 @@
+"""
+Офлайн-справочник городов (газеттир): координаты и часовые пояса для локального
+расчёта времени намазов и привязки пользователей к каноническому городу.
+Города Башкирии (BASHKIRIA_CITIES) и крупные города России и мира.
+"""
+
+from typing import List, NamedTuple, Optional, Tuple
+
+
+class CityRecord(NamedTuple):
+    """Запись справочника городов"""
+    id: str  # канонический идентификатор, хранится в users.city_id
+    name: str  # отображаемое название
+    aliases: Tuple[str, ...]  # другие написания (латиница, старые названия)
+    latitude: float
+    longitude: float
+    timezone: str  # IANA
+    region: Optional[str] = None  # регион или страна; различает одноимённые города
+
+
+CITIES: List[CityRecord] = [
+    # Башкортостан
+    CityRecord("agidel", "Агидель", ("Agidel",), 55.8989, 53.9336, "Asia/Yekaterinburg", "Башкортостан"),
+    CityRecord("baymak", "Баймак", ("Baymak", "Baimak"), 52.5912, 58.3110, "Asia/Yekaterinburg", "Башкортостан"),
+    CityRecord("belebey", "Белебей", ("Belebey", "Belebei"), 54.1039, 54.1324, "Asia/Yekaterinburg", "Башкортостан"),
+    CityRecord("beloretsk", "Белорецк", ("Beloretsk",), 53.9676, 58.4102, "Asia/Yekaterinburg", "Башкортостан"),
+    CityRecord("birsk", "Бирск", ("Birsk",), 55.4164, 55.5308, "Asia/Yekaterinburg", "Башкортостан"),
+    CityRecord("blagoveshchensk-ba", "Благовещенск", ("Blagoveshchensk",), 55.0495, 55.9654, "Asia/Yekaterinburg", "Башкортостан"),
+    CityRecord("davlekanovo", "Давлеканово", ("Davlekanovo",), 54.2225, 55.0305, "Asia/Yekaterinburg", "Башкортостан"),
+    CityRecord("dyurtyuli", "Дюртюли", ("Dyurtyuli", "Durtuli"), 55.4848, 54.8524, "Asia/Yekaterinburg", "Башкортостан"),
+    CityRecord("ishimbay", "Ишимбай", ("Ishimbay", "Ishimbai"), 53.4546, 56.0438, "Asia/Yekaterinburg", "Башкортостан"),
+    CityRecord("kumertau", "Кумертау", ("Kumertau",), 52.7671, 55.7833, "Asia/Yekaterinburg", "Башкортостан"),
+    CityRecord("mezhgorye", "Межгорье", ("Mezhgorye", "Mezhgorie"), 54.0397, 57.8131, "Asia/Yekaterinburg", "Башкортостан"),
+    CityRecord("meleuz", "Мелеуз", ("Meleuz",), 52.9590, 55.9282, "Asia/Yekaterinburg", "Башкортостан"),
+    CityRecord("neftekamsk", "Нефтекамск", ("Neftekamsk",), 56.0886, 54.2482, "Asia/Yekaterinburg", "Башкортостан"),
+    CityRecord("oktyabrsky", "Октябрьский", ("Oktyabrsky", "Oktyabrskiy"), 54.4815, 53.4711, "Asia/Yekaterinburg", "Башкортостан"),
+    CityRecord("salavat", "Салават", ("Salavat",), 53.3617, 55.9250, "Asia/Yekaterinburg", "Башкортостан"),
+    CityRecord("sibay", "Сибай", ("Sibay", "Sibai"), 52.7208, 58.6659, "Asia/Yekaterinburg", "Башкортостан"),
+    CityRecord("sterlitamak", "Стерлитамак", ("Sterlitamak",), 53.6300, 55.9306, "Asia/Yekaterinburg", "Башкортостан"),
+    CityRecord("tuymazy", "Туймазы", ("Tuymazy", "Tuimazy"), 54.5999, 53.6950, "Asia/Yekaterinburg", "Башкортостан"),
+    CityRecord("ufa", "Уфа", ("Ufa", "Өфө"), 54.7388, 55.9721, "Asia/Yekaterinburg", "Башкортостан"),
+    CityRecord("uchaly", "Учалы", ("Uchaly",), 54.3194, 59.3889, "Asia/Yekaterinburg", "Башкортостан"),
+    CityRecord("yanaul", "Янаул", ("Yanaul",), 56.2650, 54.9299, "Asia/Yekaterinburg", "Башкортостан"),
+
+    # Россия
+    CityRecord("moscow", "Москва", ("Moscow", "Moskva"), 55.7558, 37.6173, "Europe/Moscow"),
+    CityRecord("saint-petersburg", "Санкт-Петербург", ("Saint Petersburg", "St Petersburg", "Петербург", "Питер", "СПб"), 59.9386, 30.3141, "Europe/Moscow"),
+    CityRecord("kazan", "Казань", ("Kazan", "Казан"), 55.7961, 49.1064, "Europe/Moscow"),
+    CityRecord("naberezhnye-chelny", "Набережные Челны", ("Naberezhnye Chelny", "Чаллы"), 55.7436, 52.3958, "Europe/Moscow"),
+    CityRecord("almetyevsk", "Альметьевск", ("Almetyevsk",), 54.9014, 52.2973, "Europe/Moscow"),
+    CityRecord("nizhnekamsk", "Нижнекамск", ("Nizhnekamsk",), 55.6366, 51.8245, "Europe/Moscow"),
+    CityRecord("yekaterinburg", "Екатеринбург", ("Yekaterinburg", "Ekaterinburg"), 56.8389, 60.6057, "Asia/Yekaterinburg"),
+    CityRecord("chelyabinsk", "Челябинск", ("Chelyabinsk",), 55.1644, 61.4368, "Asia/Yekaterinburg"),
+    CityRecord("magnitogorsk", "Магнитогорск", ("Magnitogorsk",), 53.4072, 58.9791, "Asia/Yekaterinburg"),
+    CityRecord("orenburg", "Оренбург", ("Orenburg",), 51.7682, 55.0970, "Asia/Yekaterinburg"),
+    CityRecord("orsk", "Орск", ("Orsk",), 51.2293, 58.4752, "Asia/Yekaterinburg"),
+    CityRecord("perm", "Пермь", ("Perm",), 58.0105, 56.2502, "Asia/Yekaterinburg"),
+    CityRecord("tyumen", "Тюмень", ("Tyumen",), 57.1522, 65.5272, "Asia/Yekaterinburg"),
+    CityRecord("izhevsk", "Ижевск", ("Izhevsk",), 56.8528, 53.2115, "Europe/Samara"),
+    CityRecord("samara", "Самара", ("Samara",), 53.1959, 50.1002, "Europe/Samara"),
+    CityRecord("tolyatti", "Тольятти", ("Tolyatti", "Togliatti"), 53.5078, 49.4204, "Europe/Samara"),
+    CityRecord("ulyanovsk", "Ульяновск", ("Ulyanovsk",), 54.3142, 48.4031, "Europe/Ulyanovsk"),
+    CityRecord("penza", "Пенза", ("Penza",), 53.1959, 45.0183, "Europe/Moscow"),
+    CityRecord("saratov", "Саратов", ("Saratov",), 51.5336, 46.0343, "Europe/Saratov"),
+    CityRecord("volgograd", "Волгоград", ("Volgograd",), 48.7080, 44.5133, "Europe/Volgograd"),
+    CityRecord("astrakhan", "Астрахань", ("Astrakhan",), 46.3497, 48.0408, "Europe/Astrakhan"),
+    CityRecord("nizhny-novgorod", "Нижний Новгород", ("Nizhny Novgorod", "Nizhniy Novgorod"), 56.2965, 43.9361, "Europe/Moscow"),
+    CityRecord("voronezh", "Воронеж", ("Voronezh",), 51.6720, 39.1843, "Europe/Moscow"),
+    CityRecord("rostov-on-don", "Ростов-на-Дону", ("Rostov-on-Don", "Rostov"), 47.2357, 39.7015, "Europe/Moscow"),
+    CityRecord("krasnodar", "Краснодар", ("Krasnodar",), 45.0355, 38.9753, "Europe/Moscow"),
+    CityRecord("makhachkala", "Махачкала", ("Makhachkala",), 42.9849, 47.5047, "Europe/Moscow"),
+    CityRecord("derbent", "Дербент", ("Derbent",), 42.0578, 48.2888, "Europe/Moscow"),
+    CityRecord("grozny", "Грозный", ("Grozny",), 43.3178, 45.6949, "Europe/Moscow"),
+    CityRecord("nalchik", "Нальчик", ("Nalchik",), 43.4853, 43.6071, "Europe/Moscow"),
+    CityRecord("vladikavkaz", "Владикавказ", ("Vladikavkaz",), 43.0367, 44.6678, "Europe/Moscow"),
+    CityRecord("magas", "Магас", ("Magas",), 43.1688, 44.8131, "Europe/Moscow"),
+    CityRecord("cherkessk", "Черкесск", ("Cherkessk",), 44.2233, 42.0578, "Europe/Moscow"),
+    CityRecord("maykop", "Майкоп", ("Maykop", "Maikop"), 44.6098, 40.1006, "Europe/Moscow"),
+    CityRecord("novosibirsk", "Новосибирск", ("Novosibirsk",), 55.0084, 82.9357, "Asia/Novosibirsk"),
+    CityRecord("omsk", "Омск", ("Omsk",), 54.9885, 73.3242, "Asia/Omsk"),
+    CityRecord("krasnoyarsk", "Красноярск", ("Krasnoyarsk",), 56.0153, 92.8932, "Asia/Krasnoyarsk"),
+    CityRecord("vladivostok", "Владивосток", ("Vladivostok",), 43.1155, 131.8855, "Asia/Vladivostok"),
+    CityRecord("blagoveshchensk-amur", "Благовещенск", ("Blagoveshchensk",), 50.2907, 127.5272, "Asia/Yakutsk", "Амурская область"),
+
+    # Центральная Азия и Кавказ
+    CityRecord("tashkent", "Ташкент", ("Tashkent", "Toshkent"), 41.2995, 69.2401, "Asia/Tashkent"),
+    CityRecord("samarkand", "Самарканд", ("Samarkand", "Samarqand"), 39.6270, 66.9750, "Asia/Samarkand"),
+    CityRecord("bukhara", "Бухара", ("Bukhara", "Buxoro"), 39.7747, 64.4286, "Asia/Samarkand"),
+    CityRecord("almaty", "Алматы", ("Almaty", "Алма-Ата"), 43.2220, 76.8512, "Asia/Almaty"),
+    CityRecord("astana", "Астана", ("Astana", "Нур-Султан"), 51.1694, 71.4491, "Asia/Almaty"),
+    CityRecord("shymkent", "Шымкент", ("Shymkent",), 42.3417, 69.5901, "Asia/Almaty"),
+    CityRecord("bishkek", "Бишкек", ("Bishkek",), 42.8746, 74.5698, "Asia/Bishkek"),
+    CityRecord("osh", "Ош", ("Osh",), 40.5283, 72.7985, "Asia/Bishkek"),
+    CityRecord("dushanbe", "Душанбе", ("Dushanbe",), 38.5598, 68.7870, "Asia/Dushanbe"),
+    CityRecord("ashgabat", "Ашхабад", ("Ashgabat",), 37.9601, 58.3261, "Asia/Ashgabat"),
+    CityRecord("baku", "Баку", ("Baku", "Bakı"), 40.4093, 49.8671, "Asia/Baku"),
+    CityRecord("tbilisi", "Тбилиси", ("Tbilisi",), 41.7151, 44.8271, "Asia/Tbilisi"),
+    CityRecord("yerevan", "Ереван", ("Yerevan",), 40.1792, 44.4991, "Asia/Yerevan"),
+
+    # Ближний Восток
+    CityRecord("mecca", "Мекка", ("Mecca", "Makkah", "Макка"), 21.3891, 39.8579, "Asia/Riyadh"),
+    CityRecord("medina", "Медина", ("Medina", "Madinah", "Мадина"), 24.5247, 39.5692, "Asia/Riyadh"),
+    CityRecord("riyadh", "Эр-Рияд", ("Riyadh", "Рияд"), 24.7136, 46.6753, "Asia/Riyadh"),
+    CityRecord("jeddah", "Джидда", ("Jeddah", "Jiddah"), 21.4858, 39.1925, "Asia/Riyadh"),
+    CityRecord("dubai", "Дубай", ("Dubai",), 25.2048, 55.2708, "Asia/Dubai"),
+    CityRecord("abu-dhabi", "Абу-Даби", ("Abu Dhabi",), 24.4539, 54.3773, "Asia/Dubai"),
+    CityRecord("doha", "Доха", ("Doha",), 25.2854, 51.5310, "Asia/Qatar"),
+    CityRecord("kuwait-city", "Эль-Кувейт", ("Kuwait City", "Kuwait", "Кувейт"), 29.3759, 47.9774, "Asia/Kuwait"),
+    CityRecord("manama", "Манама", ("Manama",), 26.2285, 50.5860, "Asia/Bahrain"),
+    CityRecord("muscat", "Маскат", ("Muscat",), 23.5880, 58.3829, "Asia/Muscat"),
+    CityRecord("amman", "Амман", ("Amman",), 31.9454, 35.9284, "Asia/Amman"),
+    CityRecord("jerusalem", "Иерусалим", ("Jerusalem", "Al-Quds", "Аль-Кудс"), 31.7683, 35.2137, "Asia/Jerusalem"),
+    CityRecord("beirut", "Бейрут", ("Beirut",), 33.8938, 35.5018, "Asia/Beirut"),
+    CityRecord("damascus", "Дамаск", ("Damascus",), 33.5138, 36.2765, "Asia/Damascus"),
+    CityRecord("baghdad", "Багдад", ("Baghdad",), 33.3152, 44.3661, "Asia/Baghdad"),
+    CityRecord("tehran", "Тегеран", ("Tehran",), 35.6892, 51.3890, "Asia/Tehran"),
+    CityRecord("istanbul", "Стамбул", ("Istanbul", "İstanbul"), 41.0082, 28.9784, "Europe/Istanbul"),
+    CityRecord("ankara", "Анкара", ("Ankara",), 39.9334, 32.8597, "Europe/Istanbul"),
+    CityRecord("cairo", "Каир", ("Cairo",), 30.0444, 31.2357, "Africa/Cairo"),
+
+    # Южная и Юго-Восточная Азия
+    CityRecord("kabul", "Кабул", ("Kabul",), 34.5553, 69.2075, "Asia/Kabul"),
+    CityRecord("islamabad", "Исламабад", ("Islamabad",), 33.6844, 73.0479, "Asia/Karachi"),
+    CityRecord("karachi", "Карачи", ("Karachi",), 24.8607, 67.0011, "Asia/Karachi"),
+    CityRecord("lahore", "Лахор", ("Lahore",), 31.5204, 74.3587, "Asia/Karachi"),
+    CityRecord("delhi", "Дели", ("Delhi", "New Delhi", "Нью-Дели"), 28.6139, 77.2090, "Asia/Kolkata"),
+    CityRecord("mumbai", "Мумбаи", ("Mumbai", "Bombay"), 19.0760, 72.8777, "Asia/Kolkata"),
+    CityRecord("dhaka", "Дакка", ("Dhaka",), 23.8103, 90.4125, "Asia/Dhaka"),
+    CityRecord("kuala-lumpur", "Куала-Лумпур", ("Kuala Lumpur",), 3.1390, 101.6869, "Asia/Kuala_Lumpur"),
+    CityRecord("singapore", "Сингапур", ("Singapore",), 1.3521, 103.8198, "Asia/Singapore"),
+    CityRecord("jakarta", "Джакарта", ("Jakarta",), -6.2088, 106.8456, "Asia/Jakarta"),
+
+    # Африка
+    CityRecord("casablanca", "Касабланка", ("Casablanca",), 33.5731, -7.5898, "Africa/Casablanca"),
+    CityRecord("rabat", "Рабат", ("Rabat",), 34.0209, -6.8416, "Africa/Casablanca"),
+    CityRecord("algiers", "Алжир", ("Algiers", "Alger"), 36.7538, 3.0588, "Africa/Algiers"),
+    CityRecord("tunis", "Тунис", ("Tunis",), 36.8065, 10.1815, "Africa/Tunis"),
+    CityRecord("khartoum", "Хартум", ("Khartoum",), 15.5007, 32.5599, "Africa/Khartoum"),
+    CityRecord("lagos", "Лагос", ("Lagos",), 6.5244, 3.3792, "Africa/Lagos"),
+
+    # Европа и Америка
+    CityRecord("sarajevo", "Сараево", ("Sarajevo",), 43.8563, 18.4131, "Europe/Sarajevo"),
+    CityRecord("minsk", "Минск", ("Minsk",), 53.9006, 27.5590, "Europe/Minsk"),
+    CityRecord("kyiv", "Киев", ("Kyiv", "Kiev", "Київ"), 50.4501, 30.5234, "Europe/Kyiv"),
+    CityRecord("london", "Лондон", ("London",), 51.5074, -0.1278, "Europe/London"),
+    CityRecord("paris", "Париж", ("Paris",), 48.8566, 2.3522, "Europe/Paris"),
+    CityRecord("berlin", "Берлин", ("Berlin",), 52.5200, 13.4050, "Europe/Berlin"),
+    CityRecord("new-york", "Нью-Йорк", ("New York", "NYC"), 40.7128, -74.0060, "America/New_York"),
+    CityRecord("toronto", "Торонто", ("Toronto",), 43.6532, -79.3832, "America/Toronto"),
+]
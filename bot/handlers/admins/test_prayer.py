@@ -66,14 +66,19 @@ async def cmd_test_scheduler(
 ) -> None:
     """Тестовая команда для проверки работы планировщика"""
     try:
-        from bot.services.scheduler import check_prayer_times
+        from bot.services.scheduler import prayer_planner
         
         await message.answer(_("🔄 Запуск тестовой проверки планировщика..."))
         
-        # Запускаем проверку вручную
-        await check_prayer_times()
+        # Перестраиваем план уведомлений вручную
+        await prayer_planner.replan()
         
-        await message.answer(_("✅ Тестовая проверка планировщика завершена"))
+        await message.answer(
+            _("✅ Тестовая проверка планировщика завершена\n\nЗапланировано: {count}\nБлижайшее (UTC): {next}").format(
+                count=prayer_planner.pending,
+                next=prayer_planner.next_fire_at or "-",
+            )
+        )
         
     except Exception as e:
         await message.answer(f"❌ Ошибка при тесте планировщика: {str(e)}")
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 from datetime import date, datetime, timedelta
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from aiogram import F, Router
 from bot.handlers.common.show_main_menu import show_main_menu
 from aiogram.filters import Command
+from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 from aiogram.utils.i18n import gettext as _, lazy_gettext as __
 from loguru import logger
@@ -18,13 +19,128 @@ from bot.keyboards.inline.prayers import (
     get_notification_settings_kb,
     get_madhab_selection_kb,
     get_city_selection_kb,
+    get_city_location_kb,
 )
+from bot.core.loader import i18n
+from bot.keyboards.reply import get_main_menu
+from bot.services.gazetteer import gazetteer
+from bot.services.geocoder import nearest_city_index
+from bot.states.prayer import PrayerSettingsState
+from bot.services.prayer_cards import PrayerCardRenderer, render_day_card, render_week_card
 from bot.services.prayer_service import PrayerService
+from bot.services.scheduler import request_prayer_replan
 from database.crud import get_user_by_telegram_id, get_user_settings, update_settings
 from database.models import User, Settings
 
 router = Router(name="prayer_schedule")
 
+PRAYER_KEYS = ("Fajr", "Dhuhr", "Asr", "Maghrib", "Isha")
+
+
+def _prayer_names() -> Dict[str, str]:
+    """Локализованные названия намазов"""
+    return {
+        "Fajr": _("Фаджр"),
+        "Dhuhr": _("Зухр"),
+        "Asr": _("Аср"),
+        "Maghrib": _("Магриб"),
+        "Isha": _("Иша"),
+    }
+
+
+def _format_time(time_str: str) -> str:
+    try:
+        return datetime.strptime(time_str, "%H:%M").strftime("%H:%M")
+    except ValueError:
+        return time_str
+
+
+async def edit_or_answer(message: Message, text: str, **kwargs: Any) -> None:
+    """Показать текст вместо сообщения: фото (карточку) нельзя отредактировать в текст"""
+    if not message.photo:
+        await message.edit_text(text, **kwargs)
+        return
+    try:
+        await message.delete()
+    except Exception as e:
+        logger.warning(f"Could not delete previous message: {e}")
+    await message.answer(text, **kwargs)
+
+
+async def answer_day_schedule(message: Message, city: str, madhab: str, timings_data: Dict[str, Any]) -> None:
+    """Отправить расписание на сегодня карточкой (текстом, если карточку отправить не удалось)"""
+    city = gazetteer.display_name(city)
+    names = _prayer_names()
+    timings = timings_data["timings"]
+    rows = [(names[key], _format_time(timings[key])) for key in PRAYER_KEYS if timings.get(key)]
+    today = date.today()
+
+    try:
+        await PrayerCardRenderer.answer_card(
+            message,
+            PrayerCardRenderer.card_key("day", city, madhab, today, i18n.current_locale),
+            render_day_card,
+            (city, f"{today:%d.%m.%Y} · " + _("Мазхаб: {madhab}").format(madhab=madhab), rows),
+            reply_markup=get_prayer_main_kb(),
+        )
+        return
+    except Exception as e:
+        logger.error(f"Could not send prayer card for {city}: {e}")
+
+    message_text = _(
+        "📍 {city} | 🗓️ {date}\n"
+        "🕌 Мазхаб: {madhab}\n"
+        "──────────────────\n"
+    ).format(city=city, date=today.strftime("%d.%m.%Y"), madhab=madhab)
+    message_text += "\n".join(f"{name}: {time}" for name, time in rows)
+    await message.answer(message_text, reply_markup=get_prayer_main_kb())
+
+
+async def answer_week_schedule(
+    message: Message,
+    city: str,
+    madhab: str,
+    start_date: date,
+    week_data: List[Dict[str, Any]],
+    offset_days: int,
+) -> None:
+    """Отправить расписание на неделю карточкой (текстом, если карточку отправить не удалось)"""
+    city = gazetteer.display_name(city)
+    names = _prayer_names()
+    days = [
+        (
+            day_data["date"].strftime("%d.%m"),
+            [_format_time(day_data["timings"].get(key) or "—") for key in PRAYER_KEYS],
+        )
+        for day_data in week_data
+    ]
+
+    try:
+        await PrayerCardRenderer.answer_card(
+            message,
+            PrayerCardRenderer.card_key("week", city, madhab, start_date, i18n.current_locale),
+            render_week_card,
+            (
+                _("Расписание намазов на неделю"),
+                f"{city} · " + _("Мазхаб: {madhab}").format(madhab=madhab),
+                [names[key] for key in PRAYER_KEYS],
+                days,
+            ),
+            reply_markup=get_prayer_week_kb(offset_days),
+        )
+        return
+    except Exception as e:
+        logger.error(f"Could not send weekly prayer card for {city}: {e}")
+
+    message_text = _("📅 Расписание намазов на неделю\n")
+    message_text += _("📍 Город: {city}\n").format(city=city)
+    message_text += _("🕌 Мазхаб: {madhab}\n\n").format(madhab=madhab)
+    for label, times in days:
+        message_text += f"<b>{label}</b>:\n"
+        message_text += "".join(f"  {names[key]}: {time}\n" for key, time in zip(PRAYER_KEYS, times))
+        message_text += "\n"
+    await message.answer(message_text, reply_markup=get_prayer_week_kb(offset_days), parse_mode="HTML")
+
 
 @router.message(F.text == __("Расписание намазов"))
 async def handle_prayer_text(message: Message, session: AsyncSession) -> None:
@@ -40,8 +156,8 @@ async def handle_prayer_text(message: Message, session: AsyncSession) -> None:
             await message.answer(_("Настройки не найдены"))
             return
 
-        # Получаем город из профиля пользователя
-        city = user.city or "Moscow"
+        # Город из профиля: id из газеттира, если город распознан, иначе введённое название
+        city = user.city_id or user.city or "Moscow"
         madhab = settings.madhab or "Hanafi"
 
         # Получаем время намазов на сегодня
@@ -54,54 +170,7 @@ async def handle_prayer_text(message: Message, session: AsyncSession) -> None:
             )
             return
 
-        # Формируем сообщение с улучшенным форматированием
-        today_date = date.today().strftime("%d.%m.%Y")
-        message_text = _(
-            "📍 {city} | 🗓️ {date}\n"
-            "🕌 Мазхаб: {madhab}\n"
-            "──────────────────\n"
-        ).format(city=city, date=today_date, madhab=madhab)
-
-        # Добавляем время намазов без эмодзи
-        prayer_times = [
-            ("Fajr", _("Фаджр")),
-            ("Dhuhr", _("Зухр")),
-            ("Asr", _("Аср")),
-            ("Maghrib", _("Магриб")),
-            ("Isha", _("Иша")),
-        ]
-
-        # Собираем строки для выравнивания
-        prayer_lines = []
-        for prayer_key, prayer_name in prayer_times:
-            time_str = timings_data["timings"].get(prayer_key, "N/A")
-            if time_str != "N/A":
-                try:
-                    dt = datetime.strptime(time_str, "%H:%M")
-                    time_display = dt.strftime("%H:%M")
-                except ValueError:
-                    time_display = time_str
-                # Выравнивание с использованием фиксированной ширины названий
-                if prayer_name == "Фаджр":
-                    line = f"{prayer_name}:   {time_display}"
-                elif prayer_name == "Зухр":
-                    line = f"{prayer_name}:   {time_display}"
-                elif prayer_name == "Аср":
-                    line = f"{prayer_name}:    {time_display}"
-                elif prayer_name == "Магриб":
-                    line = f"{prayer_name}: {time_display}"
-                elif prayer_name == "Иша":
-                    line = f"{prayer_name}:    {time_display}"
-                else:
-                    line = f"{prayer_name}: {time_display}"
-                prayer_lines.append(line)
-        
-        message_text += "\n".join(prayer_lines)
-
-        await message.answer(
-            message_text,
-            reply_markup=get_prayer_main_kb()
-        )
+        await answer_day_schedule(message, city, madhab, timings_data)
 
     except Exception as e:
         logger.error(f"Error in handle_prayer_text: {e}")
@@ -123,8 +192,8 @@ async def handle_prayer_main(callback: CallbackQuery, session: AsyncSession) ->
             await callback.answer(_("Настройки не найдены"), show_alert=True)
             return
 
-        # Получаем город из профиля пользователя
-        city = user.city or "Moscow"
+        # Город из профиля: id из газеттира, если город распознан, иначе введённое название
+        city = user.city_id or user.city or "Moscow"
         madhab = settings.madhab or "Hanafi"
 
         # Получаем время намазов на сегодня
@@ -145,70 +214,15 @@ async def handle_prayer_main(callback: CallbackQuery, session: AsyncSession) ->
             )
             return
 
-        # Формируем сообщение с улучшенным форматированием
-        today_date = date.today().strftime("%d.%m.%Y")
-        message_text = _(
-            "📍 {city} | 🗓️ {date}\n"
-            "🕌 Мазхаб: {madhab}\n"
-            "──────────────────\n"
-        ).format(city=city, date=today_date, madhab=madhab)
-
-        # Добавляем время намазов без эмодзи
-        prayer_times = [
-            ("Fajr", _("Фаджр")),
-            ("Dhuhr", _("Зухр")),
-            ("Asr", _("Аср")),
-            ("Maghrib", _("Магриб")),
-            ("Isha", _("Иша")),
-        ]
-
-        # Собираем строки для выравнивания
-        prayer_lines = []
-        for prayer_key, prayer_name in prayer_times:
-            time_str = timings_data["timings"].get(prayer_key, "N/A")
-            if time_str != "N/A":
-                try:
-                    dt = datetime.strptime(time_str, "%H:%M")
-                    time_display = dt.strftime("%H:%M")
-                except ValueError:
-                    time_display = time_str
-                # Выравнивание с использованием фиксированной ширины названий
-                if prayer_name == "Фаджр":
-                    line = f"{prayer_name}:   {time_display}"
-                elif prayer_name == "Зухр":
-                    line = f"{prayer_name}:   {time_display}"
-                elif prayer_name == "Аср":
-                    line = f"{prayer_name}:    {time_display}"
-                elif prayer_name == "Магриб":
-                    line = f"{prayer_name}: {time_display}"
-                elif prayer_name == "Иша":
-                    line = f"{prayer_name}:    {time_display}"
-                else:
-                    line = f"{prayer_name}: {time_display}"
-                prayer_lines.append(line)
-        
-        message_text += "\n".join(prayer_lines)
-
-        # Отправляем/редактируем сообщение
+        # Фото (меню или карточку недели) нельзя отредактировать в другую карточку,
+        # поэтому предыдущее фото удаляется и отправляется новое сообщение
         if callback.message.photo:
-            # Удаляем предыдущее сообщение (фото-меню) и отправляем новое текстовое сообщение
-            # Это предотвращает TelegramBadRequest при попытке edit_text фото в текст
             try:
                 await callback.message.delete()
             except Exception as e:
                 logger.warning(f"Could not delete previous message: {e}")
-            
-            # Отправляем новое сообщение
-            await callback.message.answer(
-                message_text,
-                reply_markup=get_prayer_main_kb()
-            )
-        else:
-            await callback.message.answer(
-                message_text,
-                reply_markup=get_prayer_main_kb()
-            )
-        
+
+        await answer_day_schedule(callback.message, city, madhab, timings_data)
         await callback.answer()
 
     except Exception as e:
@@ -240,7 +254,7 @@ async def handle_prayer_week(callback: CallbackQuery, session: AsyncSession) ->
             await callback.answer(_("Настройки не найдены"), show_alert=True)
             return
 
-        city = user.city or "Moscow"
+        city = user.city_id or user.city or "Moscow"
         madhab = settings.madhab or "Hanafi"
         start_date = date.today() + timedelta(days=offset_days)
 
@@ -248,40 +262,20 @@ async def handle_prayer_week(callback: CallbackQuery, session: AsyncSession) ->
         week_data = await PrayerService.get_week_timings(city, madhab, start_date)
         
         if not week_data:
-            await callback.message.edit_text(
+            await edit_or_answer(
+                callback.message,
                 _("❌ Не удалось получить расписание на неделю."),
                 reply_markup=get_prayer_week_kb(offset_days)
             )
             return
 
-        # Формируем сообщение
-        message_text = _("📅 Расписание намазов на неделю\n")
-        message_text += _("📍 Город: {city}\n").format(city=city)
-        message_text += _("🕌 Мазхаб: {madhab}\n\n").format(madhab=madhab)
+        # Каждая неделя - отдельная карточка со своим file_id: сообщение заменяется новым
+        try:
+            await callback.message.delete()
+        except Exception as e:
+            logger.warning(f"Could not delete previous message: {e}")
 
-        for day_data in week_data:
-            day_date = day_data["date"].strftime("%d.%m.%Y")
-            message_text += f"<b>{day_date}</b>:\n"
-            
-            for prayer_key in ["Fajr", "Dhuhr", "Asr", "Maghrib", "Isha"]:
-                time_str = day_data["timings"].get(prayer_key, "N/A")
-                if time_str != "N/A":
-                    try:
-                        dt = datetime.strptime(time_str, "%H:%M")
-                        time_display = dt.strftime("%H:%M")
-                    except ValueError:
-                        time_display = time_str
-                    
-                    prayer_name = PrayerService.get_prayer_display_name(prayer_key)
-                    message_text += f"  {prayer_name}: {time_display}\n"
-            
-            message_text += "\n"
-
-        await callback.message.edit_text(
-            message_text,
-            reply_markup=get_prayer_week_kb(offset_days),
-            parse_mode="HTML"
-        )
+        await answer_week_schedule(callback.message, city, madhab, start_date, week_data, offset_days)
         await callback.answer()
 
     except Exception as e:
@@ -306,7 +300,7 @@ async def handle_prayer_settings(callback: CallbackQuery, session: AsyncSession)
         # Hotfix: проверка и исправление некорректного города
         if user.city is None or "python" in user.city.lower():
             from database.crud import update_user
-            await update_user(session, user.id, {"city": "Уфа"})
+            await update_user(session, user.id, gazetteer.user_city_fields("Уфа"))
             # Обновляем объект пользователя
             user = await get_user_by_telegram_id(session, callback.from_user.id)
 
@@ -316,13 +310,14 @@ async def handle_prayer_settings(callback: CallbackQuery, session: AsyncSession)
         timings_data = None
         if user.city:
             timings_data = await PrayerService.get_today_timings(
-                user.city, 
+                user.city_id or user.city, 
                 settings.madhab or "Hanafi"
             )
 
         timings = timings_data["timings"] if timings_data else None
 
-        await callback.message.edit_text(
+        await edit_or_answer(
+            callback.message,
             _("⚙️ Настройки намазов"),
             reply_markup=get_prayer_settings_kb(settings, city, timings)
         )
@@ -351,7 +346,7 @@ async def handle_open_notification_settings(callback: CallbackQuery, session: As
         timings_data = None
         if user.city:
             timings_data = await PrayerService.get_today_timings(
-                user.city, 
+                user.city_id or user.city, 
                 settings.madhab or "Hanafi"
             )
         
@@ -388,7 +383,7 @@ async def handle_open_prayer_settings(callback: CallbackQuery, session: AsyncSes
         timings_data = None
         if user.city:
             timings_data = await PrayerService.get_today_timings(
-                user.city, 
+                user.city_id or user.city, 
                 settings.madhab or "Hanafi"
             )
 
@@ -442,6 +437,7 @@ async def handle_prayer_toggle(callback: CallbackQuery, session: AsyncSession) -
         # Обновляем в БД
         update_data = {field_name: new_value}
         await update_settings(session, settings.id, update_data)
+        request_prayer_replan()
         
         # Получаем обновленные настройки
         settings = await get_user_settings(session, user.id)
@@ -450,7 +446,7 @@ async def handle_prayer_toggle(callback: CallbackQuery, session: AsyncSession) -
         timings_data = None
         if user.city:
             timings_data = await PrayerService.get_today_timings(
-                user.city, 
+                user.city_id or user.city, 
                 settings.madhab or "Hanafi"
             )
         
@@ -486,7 +482,16 @@ async def handle_change_city(callback: CallbackQuery) -> None:
 async def handle_city_selection(callback: CallbackQuery, session: AsyncSession) -> None:
     """Обработка выбора города из списка"""
     try:
-        city = callback.data.split(":")[1]
+        value = callback.data.split(":", 1)[1]
+        # В callback - id города; в старых сообщениях ещё встречается название
+        known_city = gazetteer.get(value) or gazetteer.resolve(value)
+        if known_city is None:
+            await callback.message.edit_text(
+                _("📍 Выберите город из списка:"),
+                reply_markup=get_city_selection_kb()
+            )
+            await callback.answer()
+            return
         
         # Сохраняем город в профиль пользователя
         user = await get_user_by_telegram_id(session, callback.from_user.id)
@@ -495,7 +500,9 @@ async def handle_city_selection(callback: CallbackQuery, session: AsyncSession)
             return
         
         from database.crud import update_user
-        await update_user(session, user.id, {"city": city})
+        city = known_city.name
+        await update_user(session, user.id, known_city.user_fields())
+        request_prayer_replan()
         
         # Получаем обновленные настройки для отображения
         settings = await get_user_settings(session, user.id)
@@ -550,6 +557,7 @@ async def handle_madhab_selection(callback: CallbackQuery, session: AsyncSession
 
         # Обновляем мазхаб
         await update_settings(session, settings.id, {"madhab": madhab})
+        request_prayer_replan()
         
         await callback.message.edit_text(
             _("✅ Мазхаб изменен на {madhab}").format(madhab=madhab),
@@ -561,3 +569,65 @@ async def handle_madhab_selection(callback: CallbackQuery, session: AsyncSession
     except Exception as e:
         logger.error(f"Error in handle_madhab_selection: {e}")
         await callback.answer(_("Произошла ошибка"), show_alert=True)
+
+
+@router.callback_query(F.data == "prayer_city_by_location")
+async def handle_city_by_location(callback: CallbackQuery, state: FSMContext) -> None:
+    """Запрос геолокации для определения ближайшего города"""
+    await callback.message.answer(
+        _("📍 Отправьте местоположение, и мы определим ближайший город:"),
+        reply_markup=get_city_location_kb()
+    )
+    await state.set_state(PrayerSettingsState.waiting_for_location)
+    await callback.answer()
+
+
+@router.message(PrayerSettingsState.waiting_for_location, F.location)
+async def handle_city_location(message: Message, state: FSMContext, session: AsyncSession) -> None:
+    """Сохранение ближайшего к геолокации города"""
+    await state.clear()
+    try:
+        nearest = nearest_city_index.nearest(message.location.latitude, message.location.longitude)
+        if nearest is None:
+            await message.answer(
+                _("😔 Рядом с вами не найдено городов из нашего списка. Выберите город вручную:"),
+                reply_markup=get_main_menu()
+            )
+            await message.answer(_("📍 Выберите город из списка:"), reply_markup=get_city_selection_kb())
+            return
+        
+        user = await get_user_by_telegram_id(session, message.from_user.id)
+        settings = await get_user_settings(session, user.id) if user else None
+        if not user or not settings:
+            await message.answer(_("Пользователь не найден"), reply_markup=get_main_menu())
+            return
+        
+        from database.crud import update_user
+        city = nearest.city.name
+        await update_user(session, user.id, nearest.city.user_fields())
+        request_prayer_replan()
+        
+        await message.answer(
+            _("✅ Город определён: {city} ({distance} км от вас)").format(
+                city=city, distance=round(nearest.distance_km)
+            ),
+            reply_markup=get_main_menu()
+        )
+        
+        timings_data = await PrayerService.get_today_timings(city, settings.madhab or "Hanafi")
+        timings = timings_data["timings"] if timings_data else None
+        await message.answer(
+            _("⚙️ Настройки намазов"),
+            reply_markup=get_prayer_settings_kb(settings, city, timings)
+        )
+        
+    except Exception as e:
+        logger.error(f"Error in handle_city_location: {e}")
+        await message.answer(_("❌ Произошла ошибка при сохранении города."), reply_markup=get_main_menu())
+
+
+@router.message(PrayerSettingsState.waiting_for_location)
+async def handle_city_location_cancel(message: Message, state: FSMContext) -> None:
+    """Выход из ожидания геолокации: кнопка отмены или любое другое сообщение"""
+    await state.clear()
+    await message.answer(_("Действие отменено."), reply_markup=get_main_menu())
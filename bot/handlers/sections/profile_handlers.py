@@ -8,7 +8,11 @@ from sqlalchemy import select
 from bot.states.profile import ProfileStates
 from database.models import User, Settings
 from database.crud import get_user_with_settings, get_or_create_user_with_settings
-from bot.keyboards.inline.profile import profile_keyboard, gender_keyboard, language_keyboard
+from bot.keyboards.inline.profile import profile_keyboard, gender_keyboard, language_keyboard, city_suggestions_keyboard
+from bot.keyboards.inline.prayers import get_city_location_kb
+from bot.services.gazetteer import gazetteer
+from bot.services.geocoder import nearest_city_index
+from bot.services.scheduler import request_prayer_replan
 from bot.core.loader import i18n
 
 router = Router(name="profile")
@@ -82,7 +86,7 @@ async def edit_gender_handler(callback: types.CallbackQuery, state: FSMContext)
 async def edit_city_handler(callback: types.CallbackQuery, state: FSMContext) -> None:
     """Запуск FSM для ввода города."""
     await callback.answer()
-    await callback.message.answer(_("Введите ваш город:"))
+    await callback.message.answer(_("Введите ваш город:"), reply_markup=get_city_location_kb())
     await state.set_state(ProfileStates.entering_city)
 
 
@@ -146,8 +150,8 @@ async def cancel_handler(callback: types.CallbackQuery, state: FSMContext) -> No
 
 
 import logging
-from bot.cache.redis import clear_cache
-from database.crud import get_user_language
+from bot.cache.keys import user_tag
+from bot.cache.tags import invalidate_tags
 from bot.keyboards.reply import get_main_menu
 
 logger = logging.getLogger(__name__)
@@ -183,9 +187,9 @@ async def set_language_handler(
     await session.commit()
     logger.info(f"Language saved to DB: {lang} for user_id {user.id}")
     
-    # Инвалидация кэша для get_user_language (если используется)
+    # Инвалидация всего закэшированного о пользователе
     try:
-        await clear_cache(get_user_language, session, callback.from_user.id)
+        await invalidate_tags(user_tag(callback.from_user.id))
     except Exception as e:
         logger.warning(f"Cache invalidation error: {e}")
 
@@ -224,20 +228,100 @@ async def process_gender(message: types.Message, state: FSMContext, session: Asy
     # Можно автоматически вернуть в профиль, но пока просто сообщение
 
 
-@router.message(ProfileStates.entering_city)
+@router.message(ProfileStates.entering_city, F.location)
+@router.message(ProfileStates.confirming_city, F.location)
+async def process_city_location(message: types.Message, state: FSMContext, session: AsyncSession) -> None:
+    """Определение города по отправленной геолокации."""
+    nearest = nearest_city_index.nearest(message.location.latitude, message.location.longitude)
+    if nearest is None:
+        await message.answer(
+            _("😔 Рядом с вами не найдено городов из нашего списка. Введите город вручную:"),
+            reply_markup=get_city_location_kb(),
+        )
+        return
+
+    await save_user_city(session, message.from_user.id, nearest.city.user_fields())
+    await state.clear()
+    await message.answer(
+        _("✅ Город определён: {city} ({distance} км от вас)").format(
+            city=nearest.city.name, distance=round(nearest.distance_km)
+        ),
+        reply_markup=get_main_menu(),
+    )
+
+
+@router.message(ProfileStates.entering_city, F.text == __("❌ Отмена"))
+@router.message(ProfileStates.confirming_city, F.text == __("❌ Отмена"))
+async def cancel_city(message: types.Message, state: FSMContext) -> None:
+    """Отмена ввода города."""
+    await state.clear()
+    await message.answer(_("Действие отменено."), reply_markup=get_main_menu())
+
+
+@router.message(ProfileStates.entering_city, F.text)
+@router.message(ProfileStates.confirming_city, F.text)
 async def process_city(message: types.Message, state: FSMContext, session: AsyncSession) -> None:
     """Обработка введённого города."""
-    city = message.text.strip()
+    city = " ".join(message.text.split())
+    matches = gazetteer.lookup(city)
+    if len(matches) == 1:
+        # Сохраняется канонический город из газеттира: "уфа", "Ufa" и "г. Уфа" - одно место
+        await save_user_city(session, message.from_user.id, matches[0].user_fields())
+        await state.clear()
+        await message.answer(_("Город обновлён."), reply_markup=get_main_menu())
+        return
+
+    # Одноимённые или похожие города пользователь выбирает сам: молча привязанный
+    # похожий город ("Ишим" -> Ишимбай) даёт чужие время намазов и часовой пояс
+    candidates = matches or gazetteer.suggest(city)
+    if candidates:
+        await state.update_data(typed_city=city)
+        await state.set_state(ProfileStates.confirming_city)
+        await message.answer(
+            _("Уточните город:") if matches else _("Возможно, вы имели в виду:"),
+            reply_markup=city_suggestions_keyboard(candidates, city),
+        )
+        return
+
+    await save_user_city(session, message.from_user.id, gazetteer.user_city_fields(city))
+    await state.clear()
+    await message.answer(_("Город обновлён."), reply_markup=get_main_menu())
+
+
+@router.callback_query(F.data.startswith("profile_city"))
+async def confirm_city(callback: types.CallbackQuery, state: FSMContext, session: AsyncSession) -> None:
+    """Выбор города из предложенных или сохранение введённого названия как есть."""
+    if callback.data == "profile_city_typed":
+        typed_city = (await state.get_data()).get("typed_city")
+        fields = gazetteer.user_city_fields(typed_city) if typed_city else None
+    else:
+        city = gazetteer.get(callback.data.split(":", 1)[1])
+        fields = city.user_fields() if city else None
+    if fields is None:
+        await callback.answer(_("Введите ваш город:"), show_alert=True)
+        return
+
+    await save_user_city(session, callback.from_user.id, fields)
+    await state.clear()
+    await callback.answer()
+    try:
+        await callback.message.delete()
+    except Exception as e:
+        logger.warning(f"Could not delete previous message: {e}")
+    await callback.message.answer(_("Город обновлён."), reply_markup=get_main_menu())
+
+
+async def save_user_city(session: AsyncSession, telegram_id: int, fields: dict) -> None:
+    """Сохранить город пользователя и перестроить план уведомлений."""
     user = await session.execute(
-        select(User).where(User.telegram_id == message.from_user.id)
+        select(User).where(User.telegram_id == telegram_id)
     )
     user = user.scalar_one_or_none()
     if user:
-        user.city = city
+        for field, value in fields.items():
+            setattr(user, field, value)
         await session.commit()
-
-    await state.clear()
-    await message.answer(_("Город обновлён."))
+        request_prayer_replan()
 
 
 @router.callback_query(F.data == "profile_settings")
@@ -15,6 +15,7 @@ from bot.keyboards.inline.settings import (
     settings_about_keyboard,
 )
 from bot.keyboards.inline.profile import language_keyboard
+from bot.services.scheduler import request_prayer_replan
 from bot.states.settings import TimezoneStates
 from bot.states.profile import ProfileStates
 
@@ -246,6 +247,8 @@ async def toggle_setting_handler(
         return
     
     await session.commit()
+    if setting_type == "prayer_notifications":
+        request_prayer_replan()
     
     # Обновляем клавиатуру
     await callback.message.edit_reply_markup(
@@ -271,6 +274,7 @@ async def timezone_select_handler(
     
     settings.timezone = timezone
     await session.commit()
+    request_prayer_replan()
     
     await callback.message.edit_text(
         _("⏳ Часовой пояс обновлен на: {tz}").format(tz=timezone),
@@ -350,6 +354,7 @@ async def process_timezone(
     # Сохраняем часовой пояс (можно добавить более сложную валидацию через pytz)
     settings.timezone = timezone_input
     await session.commit()
+    request_prayer_replan()
     
     await state.clear()
     
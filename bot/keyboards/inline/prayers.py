@@ -1,10 +1,10 @@
-from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton, ReplyKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.utils.i18n import gettext as _
 
 from database.models import Settings
 from bot.services.prayer_service import PrayerService
-from bot.core.config import BASHKIRIA_CITIES
+from bot.services.gazetteer import BASHKORTOSTAN, gazetteer
 
 
 def get_prayer_main_kb() -> InlineKeyboardMarkup:
@@ -203,19 +203,29 @@ def get_city_selection_kb() -> InlineKeyboardMarkup:
     """Клавиатура выбора города из списка Башкирии"""
     builder = InlineKeyboardBuilder()
     
-    # Добавляем кнопки с городами (по 2 в ряд)
-    for i in range(0, len(BASHKIRIA_CITIES), 2):
-        row_cities = BASHKIRIA_CITIES[i:i+2]
+    # Добавляем кнопки с городами (по 2 в ряд); в callback - id города из газеттира,
+    # название неоднозначно (Благовещенск есть и в Башкирии, и в Амурской области)
+    cities = gazetteer.region_cities(BASHKORTOSTAN)
+    for i in range(0, len(cities), 2):
+        row_cities = cities[i:i+2]
         buttons = []
         for city in row_cities:
             buttons.append(
                 InlineKeyboardButton(
-                    text=city,
-                    callback_data=f"prayer_select_city:{city}"
+                    text=city.name,
+                    callback_data=f"prayer_select_city:{city.id}"
                 )
             )
         builder.row(*buttons)
     
+    # Определение ближайшего города по геолокации
+    builder.row(
+        InlineKeyboardButton(
+            text=_("📍 Определить по геолокации"),
+            callback_data="prayer_city_by_location"
+        )
+    )
+    
     # Кнопка "Назад"
     builder.row(
         InlineKeyboardButton(
@@ -246,3 +256,15 @@ def get_city_confirmation_kb(city: str) -> InlineKeyboardMarkup:
     )
     
     return builder.as_markup()
+
+
+def get_city_location_kb() -> ReplyKeyboardMarkup:
+    """Клавиатура отправки геолокации для определения города (Reply) с кнопкой отмены"""
+    return ReplyKeyboardMarkup(
+        keyboard=[
+            [KeyboardButton(text=_("📍 Отправить местоположение"), request_location=True)],
+            [KeyboardButton(text=_("❌ Отмена"))],
+        ],
+        resize_keyboard=True,
+        one_time_keyboard=True,
+    )
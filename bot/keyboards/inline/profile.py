@@ -1,7 +1,10 @@
+from typing import Sequence
+
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.utils.i18n import gettext as _
 
+from bot.services.gazetteer import City
 from database.models import User, Settings
 
 
@@ -68,3 +71,17 @@ def language_keyboard() -> InlineKeyboardMarkup:
         InlineKeyboardButton(text=_("Отмена"), callback_data="cancel"),
     )
     return builder.as_markup()
+
+
+def city_suggestions_keyboard(cities: Sequence[City], typed_city: str) -> InlineKeyboardMarkup:
+    """Клавиатура уточнения города: города из справочника и введённое название как есть."""
+    builder = InlineKeyboardBuilder()
+    for city in cities:
+        builder.row(InlineKeyboardButton(text=city.name, callback_data=f"profile_city:{city.id}"))
+    builder.row(
+        InlineKeyboardButton(
+            text=_("✏️ Оставить «{city}»").format(city=typed_city),
+            callback_data="profile_city_typed",
+        )
+    )
+    return builder.as_markup()
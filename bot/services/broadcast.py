@@ -0,0 +1,232 @@
+"""
+Массовая рассылка сообщений с соблюдением лимитов Telegram.
+
+Общий token bucket ограничивает скорость (~30 сообщений/с на бота), каждому
+чату отправляется не чаще раза в секунду. Ответ 429 (RetryAfter) ставит на
+паузу весь bucket, сетевые и серверные ошибки повторяются с экспоненциальной
+задержкой. Отправку ведёт ограниченный пул корутин.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from loguru import logger
+
+from bot.services.metrics import broadcast_duration, broadcast_errors, broadcast_messages
+
+
+@dataclass(frozen=True)
+class BroadcastMessage:
+    """Сообщение одному получателю"""
+    chat_id: int
+    text: str
+    parse_mode: Optional[str] = None
+    key: Optional[int] = None  # идентификатор у вызывающей стороны (например, запись outbox)
+
+
+@dataclass
+class BroadcastResult:
+    """Итоги рассылки"""
+    name: str
+    total: int = 0
+    sent: int = 0
+    retries: int = 0
+    failed: List[BroadcastMessage] = field(default_factory=list)
+    blocked: List[BroadcastMessage] = field(default_factory=list)  # бот заблокирован получателем
+    errors: Counter = field(default_factory=Counter)  # класс ошибки -> количество
+    elapsed: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Фактическая скорость отправки, сообщений в секунду"""
+        return self.sent / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class TokenBucket:
+    """Token bucket с возможностью приостановки (для RetryAfter)"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        """Остановить выдачу токенов на `seconds` секунд и обнулить накопленные"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+        self._updated = self._paused_until
+
+    async def acquire(self) -> None:
+        # Очередь на замке даёт отправителям токены по порядку обращения
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._tokens = min(self.capacity, self._tokens + max(now - self._updated, 0.0) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class Broadcaster:
+    """Рассылка списка сообщений пулом отправителей с общими лимитами бота"""
+
+    # Минимальный интервал между сообщениями в один чат, секунды
+    PER_CHAT_INTERVAL = 1.0
+    # Повторы при сетевых/серверных ошибках и 429
+    MAX_RETRIES = 5
+    BACKOFF_BASE = 1.0
+    BACKOFF_MAX = 30.0
+
+    def __init__(
+        self,
+        bot: Bot,
+        rate_limit: float = 30,
+        workers: int = 16,
+        on_blocked: Optional[Callable[[List[int]], Awaitable[None]]] = None,
+    ) -> None:
+        self._bot = bot
+        self._bucket = TokenBucket(rate_limit)
+        self._workers = max(workers, 1)
+        self._chat_last_sent: Dict[int, float] = {}
+        # Вызывается после каждой рассылки со списком чатов, заблокировавших бота
+        self._on_blocked = on_blocked
+
+    async def broadcast(self, messages: Iterable[BroadcastMessage], name: str = "broadcast") -> BroadcastResult:
+        """Отправить сообщения и вернуть итоги; ошибки отдельных получателей не прерывают рассылку"""
+        queue: asyncio.Queue[BroadcastMessage] = asyncio.Queue()
+        for message in messages:
+            queue.put_nowait(message)
+
+        result = BroadcastResult(name=name, total=queue.qsize())
+        if not result.total:
+            return result
+
+        started = time.monotonic()
+        workers = [
+            asyncio.create_task(self._worker(queue, result))
+            for _ in range(min(self._workers, result.total))
+        ]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+        result.elapsed = time.monotonic() - started
+        self._prune_chats()
+        self._observe(result)
+
+        logger.info(
+            f"Рассылка {name}: получателей {result.total}, отправлено {result.sent}, "
+            f"заблокировали {len(result.blocked)}, ошибок {len(result.failed)}, повторов {result.retries}, "
+            f"{result.elapsed:.1f} с ({result.rate:.1f} сообщ./с)"
+        )
+        if result.errors:
+            logger.debug(f"Рассылка {name}, ошибки: {dict(result.errors)}")
+
+        if result.blocked and self._on_blocked is not None:
+            try:
+                await self._on_blocked([message.chat_id for message in result.blocked])
+            except Exception as e:
+                logger.error(f"Рассылка {name}: не удалось отметить заблокировавших бота: {e}")
+        return result
+
+    @staticmethod
+    def _observe(result: BroadcastResult) -> None:
+        broadcast_duration.labels(broadcast=result.name).observe(result.elapsed)
+        broadcast_messages.labels(broadcast=result.name, result="sent").inc(result.sent)
+        broadcast_messages.labels(broadcast=result.name, result="failed").inc(len(result.failed))
+        broadcast_messages.labels(broadcast=result.name, result="blocked").inc(len(result.blocked))
+        for error, count in result.errors.items():
+            broadcast_errors.labels(broadcast=result.name, error=error).inc(count)
+
+    async def _worker(self, queue: asyncio.Queue[BroadcastMessage], result: BroadcastResult) -> None:
+        while True:
+            try:
+                message = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await self._send(message, result)
+
+    async def _send(self, message: BroadcastMessage, result: BroadcastResult) -> None:
+        attempt = 0
+        while True:
+            await self._wait_for_chat(message.chat_id)
+            await self._bucket.acquire()
+            try:
+                await self._bot.send_message(
+                    chat_id=message.chat_id,
+                    text=message.text,
+                    parse_mode=message.parse_mode,
+                )
+                result.sent += 1
+                return
+            except TelegramRetryAfter as e:
+                # Лимит превышен для всего бота: останавливаем всех отправителей
+                self._bucket.pause(e.retry_after)
+                delay = None
+                error = e
+            except TelegramForbiddenError as e:
+                # Бот заблокирован или аккаунт удалён - повторять бессмысленно
+                result.blocked.append(message)
+                result.errors[type(e).__name__] += 1
+                return
+            except TelegramBadRequest as e:
+                result.failed.append(message)
+                result.errors[type(e).__name__] += 1
+                logger.warning(f"Рассылка {result.name}: чат {message.chat_id} отклонил сообщение: {e}")
+                return
+            except (TelegramNetworkError, TelegramServerError, asyncio.TimeoutError) as e:
+                delay = min(self.BACKOFF_MAX, self.BACKOFF_BASE * 2 ** attempt) * (0.5 + random.random())
+                error = e
+            except Exception as e:
+                result.failed.append(message)
+                result.errors[type(e).__name__] += 1
+                logger.error(f"Рассылка {result.name}: ошибка отправки в чат {message.chat_id}: {e}")
+                return
+
+            result.errors[type(error).__name__] += 1
+            attempt += 1
+            if attempt > self.MAX_RETRIES:
+                result.failed.append(message)
+                logger.warning(f"Рассылка {result.name}: чат {message.chat_id}, попытки исчерпаны: {error}")
+                return
+            result.retries += 1
+            if delay:
+                await asyncio.sleep(delay)
+
+    async def _wait_for_chat(self, chat_id: int) -> None:
+        last_sent = self._chat_last_sent.get(chat_id)
+        now = time.monotonic()
+        if last_sent is not None and now - last_sent < self.PER_CHAT_INTERVAL:
+            await asyncio.sleep(self.PER_CHAT_INTERVAL - (now - last_sent))
+        self._chat_last_sent[chat_id] = time.monotonic()
+
+    def _prune_chats(self) -> None:
+        threshold = time.monotonic() - self.PER_CHAT_INTERVAL
+        self._chat_last_sent = {
+            chat_id: last_sent
+            for chat_id, last_sent in self._chat_last_sent.items()
+            if last_sent > threshold
+        }
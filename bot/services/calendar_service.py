@@ -2,7 +2,7 @@
 Сервис для работы с религиозным календарём (Хиджра) и событиями.
 """
 import datetime
-from typing import Optional, List, Tuple
+from typing import Dict, Optional, List, NamedTuple, Tuple
 from hijri_converter import Hijri, Gregorian
 from dateutil.relativedelta import relativedelta
 import logging
@@ -10,14 +10,31 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+class ReligiousDate(NamedTuple):
+    """Дата из предрасчитанного религиозного календаря."""
+    date: datetime.date
+    key: str  # "juma" или "hijri-<месяц>-<день>"
+    name: str
+    description: str
+
+
 class HijriCalendarService:
     """Сервис для работы с датами Хиджры."""
     
+    # На сколько дней вперёд строится религиозный календарь
+    CALENDAR_DAYS = 400
+    
+    # Важные даты по годам Хиджры: конвертация выполняется один раз на год
+    _important_dates_cache: Dict[int, List[dict]] = {}
+    # Предрасчитанный календарь: дата -> религиозные даты этого дня
+    _religious_calendar: Dict[datetime.date, List[ReligiousDate]] = {}
+    _calendar_range: Optional[Tuple[datetime.date, datetime.date]] = None
+    
     @staticmethod
     def gregorian_to_hijri(date: datetime.date) -> Hijri:
         """Конвертирует григорианскую дату в Хиджру."""
         try:
-            return Hijri.from_gregorian(date.year, date.month, date.day)
+            return Gregorian(date.year, date.month, date.day).to_hijri()
         except Exception as e:
             logger.error(f"Ошибка конвертации даты {date}: {e}")
             # Возвращаем текущую дату Хиджры как fallback
@@ -59,6 +76,16 @@ class HijriCalendarService:
         if year is None:
             year = Hijri.today().year
         
+        cached = HijriCalendarService._important_dates_cache.get(year)
+        if cached is None:
+            cached = HijriCalendarService._important_dates_cache[year] = (
+                HijriCalendarService._compute_important_dates(year)
+            )
+        # Копии: вызывающие дополняют словари своими полями
+        return [dict(event) for event in cached]
+    
+    @staticmethod
+    def _compute_important_dates(year: int) -> List[dict]:
         important_dates = [
             {
                 "name": "Рамадан",
@@ -117,6 +144,50 @@ class HijriCalendarService:
         
         return important_dates
     
+    @staticmethod
+    def build_religious_calendar(
+        start: Optional[datetime.date] = None,
+        days: Optional[int] = None,
+    ) -> Dict[datetime.date, List[ReligiousDate]]:
+        """Строит календарь религиозных дат и пятниц на `days` дней начиная со `start`."""
+        start = start or datetime.date.today()
+        end = start + datetime.timedelta(days=(days or HijriCalendarService.CALENDAR_DAYS) - 1)
+        
+        calendar: Dict[datetime.date, List[ReligiousDate]] = {}
+        first_year = HijriCalendarService.gregorian_to_hijri(start).year
+        last_year = HijriCalendarService.gregorian_to_hijri(end).year
+        for year in range(first_year, last_year + 1):
+            for event in HijriCalendarService.get_important_islamic_dates(year):
+                day = event["gregorian_date"]
+                if day is None or not start <= day <= end:
+                    continue
+                calendar.setdefault(day, []).append(ReligiousDate(
+                    date=day,
+                    key=f"hijri-{event['hijri_month']}-{event['hijri_day']}",
+                    name=event["name"],
+                    description=event["description"],
+                ))
+        
+        friday = start + datetime.timedelta(days=(4 - start.weekday()) % 7)
+        while friday <= end:
+            calendar.setdefault(friday, []).append(
+                ReligiousDate(date=friday, key="juma", name="Джума", description="Пятничная молитва")
+            )
+            friday += datetime.timedelta(days=7)
+        
+        HijriCalendarService._religious_calendar = calendar
+        HijriCalendarService._calendar_range = (start, end)
+        logger.info(f"Религиозный календарь построен: {start} - {end}, дат {len(calendar)}")
+        return calendar
+    
+    @staticmethod
+    def get_religious_dates(day: datetime.date) -> List[ReligiousDate]:
+        """Религиозные даты дня из предрасчитанного календаря (строится при необходимости)."""
+        calendar_range = HijriCalendarService._calendar_range
+        if calendar_range is None or not calendar_range[0] <= day <= calendar_range[1]:
+            HijriCalendarService.build_religious_calendar(min(day, datetime.date.today()))
+        return list(HijriCalendarService._religious_calendar.get(day, []))
+    
     @staticmethod
     def get_upcoming_event(days_limit: int = 30) -> Optional[dict]:
         """Возвращает ближайшее важное событие в пределах указанного количества дней."""
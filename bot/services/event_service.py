@@ -2,17 +2,25 @@
 Сервис для работы с мероприятиями общины.
 """
 import datetime
-from typing import List, Optional, Tuple
-from sqlalchemy import select, and_, or_, func
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import select, and_, or_, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
-from database.models import CommunityEvent, EventRegistration, EventType, EventStatus, RegistrationStatus, User
+from database.models import CommunityEvent, EventRegistration, EventType, EventStatus, RegistrationStatus, Settings, User
 from bot.services.calendar_service import HijriCalendarService
 
 logger = logging.getLogger(__name__)
 
 
+class ReminderRecipient(NamedTuple):
+    """Получатель напоминания о мероприятии"""
+    registration_id: int
+    user_id: int
+    chat_id: int  # telegram_id пользователя
+    language: Optional[str]
+
+
 class EventService:
     """Сервис для работы с мероприятиями."""
     
@@ -277,37 +285,58 @@ class EventService:
             return False, f"Ошибка отмены мероприятия: {str(e)}"
     
     @staticmethod
-    async def get_events_for_notification(
+    async def get_pending_reminders(
         session: AsyncSession,
+        now: datetime.datetime,
         hours_before: int = 24
-    ) -> List[Tuple[CommunityEvent, List[EventRegistration]]]:
-        """Возвращает мероприятия, о которых нужно отправить уведомления."""
-        now = datetime.datetime.now()
+    ) -> List[Tuple[CommunityEvent, List[ReminderRecipient]]]:
+        """
+        Возвращает мероприятия, начинающиеся в ближайшие `hours_before` часов после `now`
+        (по часам хранения времени мероприятий, без пояса),
+        с получателями, которым ещё не отправлено напоминание (один запрос).
+        """
         notification_time = now + datetime.timedelta(hours=hours_before)
         
-        query = select(CommunityEvent).where(
-            and_(
-                CommunityEvent.status == EventStatus.ACTIVE,
-                CommunityEvent.start_time >= now,
-                CommunityEvent.start_time <= notification_time
+        query = (
+            select(
+                CommunityEvent,
+                EventRegistration.id,
+                User.id,
+                User.telegram_id,
+                Settings.language,
             )
-        )
-        
-        result = await session.execute(query)
-        events = list(result.scalars().all())
-        
-        events_with_registrations = []
-        for event in events:
-            # Получаем подтверждённые регистрации
-            reg_query = select(EventRegistration).where(
+            .join(EventRegistration, EventRegistration.event_id == CommunityEvent.id)
+            .join(User, User.id == EventRegistration.user_id)
+            .join(Settings, Settings.user_id == User.id)
+            .where(
                 and_(
-                    EventRegistration.event_id == event.id,
-                    EventRegistration.status == RegistrationStatus.CONFIRMED
+                    CommunityEvent.status == EventStatus.ACTIVE,
+                    CommunityEvent.start_time >= now,
+                    CommunityEvent.start_time <= notification_time,
+                    EventRegistration.status == RegistrationStatus.CONFIRMED,
+                    EventRegistration.reminded_at.is_(None),
+                    Settings.notify_event_reminder == True,
+                    User.is_block == False,
                 )
             )
-            reg_result = await session.execute(reg_query)
-            registrations = list(reg_result.scalars().all())
-            
-            events_with_registrations.append((event, registrations))
+            .order_by(CommunityEvent.start_time, CommunityEvent.id)
+        )
+        result = await session.execute(query)
         
-        return events_with_registrations
+        reminders: Dict[int, Tuple[CommunityEvent, List[ReminderRecipient]]] = {}
+        for event, registration_id, user_id, chat_id, language in result:
+            _, recipients = reminders.setdefault(event.id, (event, []))
+            recipients.append(ReminderRecipient(registration_id, user_id, chat_id, language))
+        return list(reminders.values())
+    
+    @staticmethod
+    async def mark_reminded(session: AsyncSession, registration_ids: List[int]) -> None:
+        """Отмечает регистрации, по которым напоминание поставлено в очередь."""
+        if not registration_ids:
+            return
+        await session.execute(
+            update(EventRegistration)
+            .where(EventRegistration.id.in_(registration_ids))
+            .values(reminded_at=datetime.datetime.now())
+        )
+        await session.commit()
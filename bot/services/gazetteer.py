@@ -0,0 +1,179 @@
+"""
+Газеттир: поиск канонического города по введённому пользователем названию.
+
+Названия нормализуются (регистр, ё, дефисы, префикс "г.") и транслитерируются
+в латиницу, поэтому "Уфа", "ufa" и "Ufa " дают один и тот же город. Город
+привязывается только при точном совпадении с названием, идентификатором или
+другим написанием; для опечаток нечёткий поиск по триграммам только предлагает
+похожие города, выбирает пользователь. Одноимённые города различаются регионом.
+Все индексы строятся один раз в памяти из справочника bot.data.cities_data,
+сеть не нужна.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+from bot.data.cities_data import CITIES, CityRecord
+
+_TRANSLIT = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e", "ж": "zh",
+    "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o",
+    "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "kh", "ц": "ts",
+    "ч": "ch", "ш": "sh", "щ": "shch", "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "yu",
+    "я": "ya",
+    # Башкирские и татарские буквы
+    "ә": "a", "ө": "o", "ү": "u", "ғ": "g", "ҡ": "k", "ң": "n", "ҙ": "z", "ҫ": "s",
+    "һ": "h", "җ": "zh",
+})
+
+# Регион городов из списка выбора в настройках намазов
+BASHKORTOSTAN = "Башкортостан"
+
+# Префиксы, которые пользователи пишут перед названием
+_PREFIX_RE = re.compile(r"^(?:г|гор|город|city|c)\.?\s+")
+_SEPARATORS_RE = re.compile(r"[\s\-‐–—_.,'’`\"()]+")
+# Транслитерации расходятся в этих сочетаниях (oktyabrskiy/oktyabrsky, yu/iu)
+_LATIN_VARIANTS = (("iy", "y"), ("yy", "y"), ("ij", "y"), ("iu", "yu"), ("ia", "ya"), ("j", "y"), ("x", "kh"))
+
+
+class City(NamedTuple):
+    """Канонический город"""
+    id: str
+    name: str  # уникальное название; у одноимённых городов - с регионом
+    latitude: float
+    longitude: float
+    timezone: str
+    region: Optional[str] = None
+
+    def user_fields(self) -> Dict[str, Optional[str]]:
+        """Поля User для сохранения города"""
+        return {"city": self.name, "city_id": self.id}
+
+
+def normalize_name(name: str) -> str:
+    """Нормализовать название: регистр, ё, разделители, префикс "г." ("г. Уфа " -> "уфа")"""
+    name = " ".join(name.split()).casefold().replace("ё", "е")
+    name = _PREFIX_RE.sub("", name)
+    return _SEPARATORS_RE.sub(" ", name).strip()
+
+
+def transliterate(name: str) -> str:
+    """Латинский ключ названия: кириллица транслитерируется, диакритика и пробелы убираются"""
+    latin = normalize_name(name).translate(_TRANSLIT)
+    latin = unicodedata.normalize("NFKD", latin)
+    latin = "".join(char for char in latin if char.isalnum() and not unicodedata.combining(char))
+    for variant, canonical in _LATIN_VARIANTS:
+        latin = latin.replace(variant, canonical)
+    return latin
+
+
+def _trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+class Gazetteer:
+    """Индексы справочника городов: точный ключ и триграммы транслитерации"""
+
+    # Минимальное сходство (коэффициент Дайса по триграммам) для подсказки
+    FUZZY_THRESHOLD = 0.6
+
+    def __init__(self, records: Iterable[CityRecord]) -> None:
+        self._cities: Dict[str, City] = {}
+        # Ключ -> города; у одноимённых городов общий ключ названия
+        self._by_key: Dict[str, List[str]] = {}
+        self._trigram_index: Dict[str, Set[str]] = {}
+        self._key_trigrams: Dict[str, Set[str]] = {}
+
+        records = list(records)
+        homonyms = Counter(transliterate(record.name) for record in records)
+        for record in records:
+            name = record.name
+            if homonyms[transliterate(name)] > 1 and record.region:
+                name = f"{record.name} ({record.region})"
+            city = City(record.id, name, record.latitude, record.longitude, record.timezone, record.region)
+            self._cities[city.id] = city
+            for alias in dict.fromkeys((name, record.name, record.id, *record.aliases)):
+                key = transliterate(alias)
+                if not key:
+                    continue
+                city_ids = self._by_key.setdefault(key, [])
+                if city.id not in city_ids:
+                    city_ids.append(city.id)
+                trigrams = self._key_trigrams.setdefault(key, _trigrams(key))
+                for trigram in trigrams:
+                    self._trigram_index.setdefault(trigram, set()).add(key)
+
+    def __len__(self) -> int:
+        return len(self._cities)
+
+    def __iter__(self):
+        return iter(self._cities.values())
+
+    def get(self, city_id: Optional[str]) -> Optional[City]:
+        """Город по каноническому идентификатору"""
+        return self._cities.get(city_id) if city_id else None
+
+    def lookup(self, name: Optional[str]) -> List[City]:
+        """Города, точно совпадающие с названием, идентификатором или другим написанием"""
+        if not name:
+            return []
+        city = self._cities.get(name)
+        if city is not None:
+            return [city]
+        key = transliterate(name)
+        return [self._cities[city_id] for city_id in self._by_key.get(key, ())] if key else []
+
+    def resolve(self, name: Optional[str]) -> Optional[City]:
+        """
+        Канонический город по названию или идентификатору.
+        None, если точного совпадения нет или название носят несколько городов:
+        похожее название не привязывается молча (см. suggest).
+        """
+        matches = self.lookup(name)
+        return matches[0] if len(matches) == 1 else None
+
+    def user_city_fields(self, name: str) -> Dict[str, Optional[str]]:
+        """Поля User для сохранения города: канонический город при точном совпадении, иначе введённый текст"""
+        city = self.resolve(name)
+        if city is None:
+            return {"city": " ".join(name.split()), "city_id": None}
+        return city.user_fields()
+
+    def display_name(self, name: str) -> str:
+        """Название города для показа: каноническое при точном совпадении, иначе введённый текст"""
+        city = self.resolve(name)
+        return city.name if city is not None else " ".join(name.split())
+
+    def suggest(self, name: str, limit: int = 5) -> List[City]:
+        """Точно совпадающие (одноимённые) и похожие города по убыванию сходства - варианты для выбора"""
+        key = transliterate(name)
+        if not key:
+            return []
+        trigrams = _trigrams(key)
+
+        shared: Counter = Counter()
+        for trigram in trigrams:
+            shared.update(self._trigram_index.get(trigram, ()))
+
+        best: Dict[str, float] = {}
+        for candidate, common in shared.items():
+            score = 2 * common / (len(trigrams) + len(self._key_trigrams[candidate]))
+            if score < self.FUZZY_THRESHOLD:
+                continue
+            for city_id in self._by_key[candidate]:
+                best[city_id] = max(best.get(city_id, 0.0), score)
+
+        # При равном сходстве (одноимённые города) - в порядке справочника
+        ranked = sorted((city_id for city_id in self._cities if city_id in best), key=best.__getitem__, reverse=True)
+        return [self._cities[city_id] for city_id in ranked[:limit]]
+
+    def region_cities(self, region: str) -> List[City]:
+        """Города региона в порядке справочника"""
+        return [city for city in self._cities.values() if city.region == region]
+
+
+gazetteer = Gazetteer(CITIES)
@@ -0,0 +1,111 @@
+"""
+Обратное геокодирование без внешних сервисов: ближайший город газеттира по
+координатам (геолокации из Telegram).
+
+Координаты городов переводятся в точки на единичной сфере и раскладываются
+в k-d дерево. Евклидово расстояние между такими точками (хорда) монотонно
+связано с расстоянием по дуге, поэтому ближайший сосед в дереве - ближайший
+город на поверхности Земли. Запрос обходит O(log n) узлов.
+"""
+from __future__ import annotations
+
+import math
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from bot.services.gazetteer import City, gazetteer
+
+EARTH_RADIUS_KM = 6371.0088
+
+Point = Tuple[float, float, float]
+
+
+class NearestCity(NamedTuple):
+    """Результат поиска ближайшего города"""
+    city: City
+    distance_km: float
+
+
+class _Node(NamedTuple):
+    point: Point
+    city: City
+    axis: int
+    left: Optional["_Node"]
+    right: Optional["_Node"]
+
+
+def _to_point(latitude: float, longitude: float) -> Point:
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    cos_lat = math.cos(lat)
+    return (cos_lat * math.cos(lon), cos_lat * math.sin(lon), math.sin(lat))
+
+
+def _chord_to_km(chord: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(chord / 2, 1.0))
+
+
+def _build(items: List[Tuple[Point, City]], depth: int) -> Optional[_Node]:
+    if not items:
+        return None
+    axis = depth % 3
+    items.sort(key=lambda item: item[0][axis])
+    median = len(items) // 2
+    point, city = items[median]
+    return _Node(
+        point=point,
+        city=city,
+        axis=axis,
+        left=_build(items[:median], depth + 1),
+        right=_build(items[median + 1:], depth + 1),
+    )
+
+
+class NearestCityIndex:
+    """k-d дерево городов по координатам"""
+
+    # Дальше этого расстояния город не считается "своим": время намазов заметно расходится
+    MAX_DISTANCE_KM = 150.0
+
+    def __init__(self, cities: Iterable[City]) -> None:
+        items = [(_to_point(city.latitude, city.longitude), city) for city in cities]
+        self._size = len(items)
+        self._root = _build(items, 0)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        max_distance_km: Optional[float] = MAX_DISTANCE_KM,
+    ) -> Optional[NearestCity]:
+        """Ближайший город (None, если в пределах max_distance_km городов нет)"""
+        if self._root is None:
+            return None
+
+        target = _to_point(latitude, longitude)
+        best_node: Optional[_Node] = None
+        best_distance = math.inf  # квадрат хорды
+
+        stack: List[_Node] = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = sum((a - b) ** 2 for a, b in zip(node.point, target))
+            if distance < best_distance:
+                best_node, best_distance = node, distance
+
+            delta = target[node.axis] - node.point[node.axis]
+            near, far = (node.left, node.right) if delta < 0 else (node.right, node.left)
+            # Дальнее поддерево проверяется, только если разделяющая плоскость ближе лучшего кандидата
+            if far is not None and delta * delta < best_distance:
+                stack.append(far)
+            if near is not None:
+                stack.append(near)
+
+        distance_km = _chord_to_km(math.sqrt(best_distance))
+        if max_distance_km is not None and distance_km > max_distance_km:
+            return None
+        return NearestCity(best_node.city, distance_km)
+
+
+nearest_city_index = NearestCityIndex(gazetteer)
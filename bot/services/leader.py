@@ -0,0 +1,161 @@
+"""
+Выбор ведущей реплики через advisory lock PostgreSQL.
+
+Планирование (задачи APScheduler и планировщик уведомлений) должно работать
+ровно в одном процессе, иначе каждая реплика повторяет сканирование базы и
+постановку уведомлений. Ведущей становится реплика, получившая сессионный
+pg_try_advisory_lock на выделенном соединении; остальные периодически пытаются
+его получить. Если соединение ведущей рвётся, PostgreSQL снимает блокировку
+и её забирает другая реплика.
+
+Через то же соединение ведущая слушает каналы LISTEN/NOTIFY, чтобы остальные
+реплики могли передать ей сигналы (например, о смене настроек пользователя).
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from database.engine import engine
+
+Callback = Callable[[], Awaitable[None]]
+
+
+class LeaderElection:
+    """Сессионная advisory-блокировка PostgreSQL как признак ведущей реплики"""
+
+    # Как часто проверять соединение ведущей и пытаться захватить блокировку остальным
+    CHECK_INTERVAL = 15
+
+    def __init__(
+        self,
+        lock_id: int,
+        on_elected: Callback,
+        on_revoked: Callback,
+        channels: Optional[Dict[str, Callable[[], None]]] = None,
+    ) -> None:
+        self._lock_id = lock_id
+        self._on_elected = on_elected
+        self._on_revoked = on_revoked
+        self._channels = channels or {}
+        self._conn: Optional[AsyncConnection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._notify_tasks: Set[asyncio.Task] = set()
+
+    @property
+    def is_leader(self) -> bool:
+        return self._conn is not None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._release()
+
+    def publish(self, channel: str) -> None:
+        """Отправить сигнал ведущей реплике (NOTIFY), не дожидаясь результата"""
+        try:
+            task = asyncio.get_running_loop().create_task(self._notify(channel))
+        except RuntimeError:
+            return
+        self._notify_tasks.add(task)
+        task.add_done_callback(self._notify_tasks.discard)
+
+    async def _notify(self, channel: str) -> None:
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT pg_notify(:channel, '')"), {"channel": channel})
+                await conn.commit()
+        except Exception as e:
+            logger.warning(f"Не удалось отправить сигнал {channel} ведущей реплике: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if self._conn is None:
+                    await self._try_acquire()
+                else:
+                    await self._conn.execute(text("SELECT 1"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Потеряно соединение ведущей реплики: {e}")
+                await self._release()
+            await asyncio.sleep(self.CHECK_INTERVAL)
+
+    async def _try_acquire(self) -> None:
+        conn = await engine.connect()
+        try:
+            # Без открытой транзакции соединение не висит в состоянии "idle in transaction"
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            acquired = await conn.scalar(
+                text("SELECT pg_try_advisory_lock(:lock_id)"), {"lock_id": self._lock_id}
+            )
+            if not acquired:
+                await conn.close()
+                return
+
+            if self._channels:
+                raw = await conn.get_raw_connection()
+                for channel in self._channels:
+                    await raw.driver_connection.add_listener(channel, self._on_notification)
+        except BaseException:
+            # Соединение может держать блокировку и слушателей: в пул оно не возвращается
+            await conn.invalidate()
+            await conn.close()
+            raise
+
+        self._conn = conn
+        logger.info("Эта реплика стала ведущей: планировщик запущен")
+        try:
+            await self._on_elected()
+        except Exception as e:
+            logger.error(f"Ошибка запуска задач ведущей реплики: {e}")
+
+    async def _release(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+
+        try:
+            await self._on_revoked()
+        except Exception as e:
+            logger.error(f"Ошибка остановки задач ведущей реплики: {e}")
+
+        try:
+            # Сброс соединения при возврате в пул не снимает LISTEN: иначе слушатели копились бы
+            # на соединениях пула, и каждый NOTIFY вызывал бы лишние перестроения плана
+            await self._remove_listeners(conn)
+            await conn.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": self._lock_id})
+        except Exception:
+            # Соединение уже разорвано (блокировку снимет PostgreSQL) - в пул оно не возвращается
+            try:
+                await conn.invalidate()
+            except Exception:
+                pass
+        try:
+            await conn.close()
+        except Exception:
+            pass
+        logger.info("Реплика больше не ведущая: планировщик приостановлен")
+
+    async def _remove_listeners(self, conn: AsyncConnection) -> None:
+        if not self._channels:
+            return
+        raw = await conn.get_raw_connection()
+        for channel in self._channels:
+            await raw.driver_connection.remove_listener(channel, self._on_notification)
+
+    def _on_notification(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        handler = self._channels.get(channel)
+        if handler is not None:
+            handler()
@@ -0,0 +1,117 @@
+"""
+Метрики Prometheus для фоновых задач: планировщик, рассылки, очередь уведомлений
+и расписания намазов. Регистрируются в общем реестре и отдаются тем же
+/metrics (MetricsView), что и метрики вебхука.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import prometheus_client
+from apscheduler.events import (
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MISSED,
+    EVENT_JOB_SUBMITTED,
+    JobExecutionEvent,
+    JobSubmissionEvent,
+)
+from apscheduler.schedulers.base import BaseScheduler
+
+from bot.middlewares.prometheus import METRICS_PREFIX
+
+# Задержки от долей секунды (норма) до минут (уведомление опоздало)
+LAG_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+scheduler_job_lag = prometheus_client.Histogram(
+    name=f"{METRICS_PREFIX}_scheduler_job_lag",
+    documentation="Delay between the scheduled fire time of a job and its actual start (in seconds).",
+    labelnames=["job"],
+    unit="seconds",
+    buckets=LAG_BUCKETS,
+)
+
+scheduler_job_runs = prometheus_client.Counter(
+    name=f"{METRICS_PREFIX}_scheduler_job_runs",
+    documentation="Total scheduler job runs by job and outcome (executed, error, missed).",
+    labelnames=["job", "outcome"],
+)
+
+prayer_plan_groups = prometheus_client.Gauge(
+    name=f"{METRICS_PREFIX}_prayer_plan_groups",
+    documentation="Subscriber groups (city, madhab) in the last prayer notification plan.",
+)
+
+prayer_plan_buckets = prometheus_client.Gauge(
+    name=f"{METRICS_PREFIX}_prayer_plan_buckets",
+    documentation="Prayer notification buckets waiting in the planner heap.",
+)
+
+prayer_notification_recipients = prometheus_client.Counter(
+    name=f"{METRICS_PREFIX}_prayer_notification_recipients",
+    documentation="Total prayer notification recipients by prayer.",
+    labelnames=["prayer"],
+)
+
+notification_queue_lag = prometheus_client.Histogram(
+    name=f"{METRICS_PREFIX}_notification_queue_lag",
+    documentation="Delay between the planned send time of an outbox notification and its claim by a sender (in seconds).",
+    labelnames=["kind"],
+    unit="seconds",
+    buckets=LAG_BUCKETS,
+)
+
+broadcast_messages = prometheus_client.Counter(
+    name=f"{METRICS_PREFIX}_broadcast_messages",
+    documentation="Total broadcast messages by broadcast and result (sent, failed, blocked).",
+    labelnames=["broadcast", "result"],
+)
+
+broadcast_errors = prometheus_client.Counter(
+    name=f"{METRICS_PREFIX}_broadcast_errors",
+    documentation="Total broadcast send errors (including retried ones) by broadcast and error class.",
+    labelnames=["broadcast", "error"],
+)
+
+broadcast_duration = prometheus_client.Histogram(
+    name=f"{METRICS_PREFIX}_broadcast_duration",
+    documentation="Histogram of broadcast batch duration by broadcast (in seconds).",
+    labelnames=["broadcast"],
+    unit="seconds",
+    buckets=(0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+
+prayer_api_request_duration = prometheus_client.Histogram(
+    name=f"{METRICS_PREFIX}_prayer_api_request_duration",
+    documentation="Histogram of prayer times API request duration by endpoint and outcome (in seconds).",
+    labelnames=["endpoint", "outcome"],
+    unit="seconds",
+)
+
+prayer_timetable_lookups = prometheus_client.Counter(
+    name=f"{METRICS_PREFIX}_prayer_timetable_lookups",
+    documentation="Total prayer timetable days served by source (local, redis, postgres, api, miss).",
+    labelnames=["source"],
+)
+
+
+def _on_job_submitted(event: JobSubmissionEvent) -> None:
+    now = datetime.now(timezone.utc)
+    for run_time in event.scheduled_run_times:
+        scheduler_job_lag.labels(job=event.job_id).observe(max((now - run_time).total_seconds(), 0.0))
+
+
+def _on_job_finished(event: JobExecutionEvent) -> None:
+    if event.code == EVENT_JOB_MISSED:
+        outcome = "missed"
+    elif event.exception is not None:
+        outcome = "error"
+    else:
+        outcome = "executed"
+    scheduler_job_runs.labels(job=event.job_id, outcome=outcome).inc()
+
+
+def instrument_scheduler(scheduler: BaseScheduler) -> None:
+    """Подписать метрики на события APScheduler"""
+    scheduler.add_listener(_on_job_submitted, EVENT_JOB_SUBMITTED)
+    scheduler.add_listener(_on_job_finished, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED)
@@ -0,0 +1,208 @@
+"""
+Планировщик уведомлений о намазах.
+
+Вместо ежеминутного опроса базы и API план строится раз в сутки (и при
+изменении настроек пользователей): все предстоящие намазы раскладываются
+в min-heap по моменту отправки в UTC. Диспетчер спит до ближайшего момента
+и просыпается только тогда, когда пора отправлять, либо когда план заменён.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from typing import Awaitable, Callable, Iterable, List, Optional, Set
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from loguru import logger
+
+from bot.services.metrics import prayer_plan_buckets, scheduler_job_lag
+
+
+@dataclass(frozen=True, order=True)
+class PrayerBucket:
+    """Группа уведомлений об одном намазе, отправляемых в один момент"""
+    fire_at: datetime  # UTC
+    city: str
+    madhab: str
+    prayer: str
+    day: date  # дата намаза по местному времени города
+
+
+PlanBuilder = Callable[[], Awaitable[Iterable[PrayerBucket]]]
+BucketDispatcher = Callable[[PrayerBucket], Awaitable[None]]
+
+
+# Смещение, введённое вручную: "+3", "UTC+5", "GMT-03:30"
+_UTC_OFFSET_RE = re.compile(r"^(?:UTC|GMT)?\s*([+-])(\d{1,2})(?::?(\d{2}))?$", re.IGNORECASE)
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def parse_timezone(value: Optional[str]) -> Optional[tzinfo]:
+    """Часовой пояс из настроек: имя IANA или смещение от UTC (None, если не распознан)"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return ZoneInfo(value)
+    except (ZoneInfoNotFoundError, ValueError):
+        pass
+
+    match = _UTC_OFFSET_RE.match(value)
+    if not match:
+        return None
+    sign, hours, minutes = match.groups()
+    offset = timedelta(hours=int(hours), minutes=int(minutes or 0))
+    if offset > timedelta(hours=14):
+        return None
+    return timezone(-offset if sign == "-" else offset)
+
+
+class NotificationPlanner:
+    """Min-heap запланированных уведомлений и диспетчер, спящий до ближайшего из них"""
+
+    # Пауза перед перестроением плана: серия изменений настроек даёт одно перестроение
+    REPLAN_DELAY = 5
+    # Опоздавшие больше чем на это время уведомления не отправляются
+    MISFIRE_GRACE = timedelta(minutes=2)
+    # Одновременно отправляемых групп: каждая держит два соединения с базой
+    # (курсор получателей и запись в outbox), пул не должен исчерпываться
+    DISPATCH_CONCURRENCY = 2
+    # Попыток отправить группу и пауза перед первым повтором (дальше удваивается), секунд
+    DISPATCH_ATTEMPTS = 5
+    RETRY_DELAY = 10
+
+    def __init__(self, build_plan: PlanBuilder, dispatch: BucketDispatcher) -> None:
+        self._build_plan = build_plan
+        self._dispatch = dispatch
+        self._heap: List[PrayerBucket] = []
+        self._changed = asyncio.Event()
+        # Всё, что запланировано не позже этого момента, уже отправлено
+        self._watermark = utc_now()
+        self._task: Optional[asyncio.Task] = None
+        self._replan_task: Optional[asyncio.Task] = None
+        self._replan_requested = False
+        self._dispatch_tasks: Set[asyncio.Task] = set()
+        self._dispatch_slots = asyncio.Semaphore(self.DISPATCH_CONCURRENCY)
+        self._stopping = asyncio.Event()
+
+    @property
+    def pending(self) -> int:
+        """Количество запланированных групп уведомлений"""
+        return len(self._heap)
+
+    @property
+    def next_fire_at(self) -> Optional[datetime]:
+        """Момент ближайшей отправки (UTC)"""
+        return self._heap[0].fire_at if self._heap else None
+
+    def load(self, buckets: Iterable[PrayerBucket]) -> None:
+        """Заменить план; уже отправленные и безнадёжно опоздавшие группы отбрасываются"""
+        threshold = max(self._watermark, utc_now() - self.MISFIRE_GRACE)
+        heap = [bucket for bucket in buckets if bucket.fire_at > threshold]
+        heapq.heapify(heap)
+        self._heap = heap
+        prayer_plan_buckets.set(len(heap))
+        self._changed.set()
+        logger.info(f"План уведомлений о намазах обновлён: групп {len(heap)}, ближайшая {self.next_fire_at}")
+
+    async def replan(self) -> None:
+        """Построить план заново"""
+        self.load(await self._build_plan())
+
+    def request_replan(self) -> None:
+        """Запросить перестроение плана (например, после изменения настроек пользователя)"""
+        self._replan_requested = True
+        if self._replan_task is not None and not self._replan_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._replan_task = loop.create_task(self._delayed_replan())
+
+    async def _delayed_replan(self) -> None:
+        while self._replan_requested:
+            await asyncio.sleep(self.REPLAN_DELAY)
+            self._replan_requested = False
+            try:
+                await self.replan()
+            except Exception as e:
+                logger.error(f"Ошибка перестроения плана уведомлений: {e}")
+
+    def start(self) -> None:
+        """Запустить диспетчер (нужен работающий event loop)"""
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            # Группы последних минут ставятся в очередь повторно: дубли отсекает
+            # ключ идемпотентности outbox, зато ничего не теряется при смене реплики
+            self._watermark = utc_now() - self.MISFIRE_GRACE
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Остановить диспетчер и отменить отложенное перестроение плана"""
+        # Ожидающие повтора группы не ждут паузу до конца: их повторно поставит
+        # в очередь следующая ведущая реплика (см. start)
+        self._stopping.set()
+        tasks = [task for task in (self._task, self._replan_task) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, *self._dispatch_tasks, return_exceptions=True)
+        self._task = None
+        self._replan_task = None
+
+    async def _run(self) -> None:
+        while True:
+            self._changed.clear()
+            if not self._heap:
+                await self._changed.wait()
+                continue
+
+            delay = (self._heap[0].fire_at - utc_now()).total_seconds()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            now = utc_now()
+            while self._heap and self._heap[0].fire_at <= now:
+                bucket = heapq.heappop(self._heap)
+                prayer_plan_buckets.set(len(self._heap))
+                self._watermark = max(self._watermark, bucket.fire_at)
+                scheduler_job_lag.labels(job="prayer_bucket").observe((now - bucket.fire_at).total_seconds())
+                if bucket.fire_at < now - self.MISFIRE_GRACE:
+                    logger.warning(f"Пропущено опоздавшее уведомление: {bucket}")
+                    continue
+                task = asyncio.create_task(self._safe_dispatch(bucket))
+                self._dispatch_tasks.add(task)
+                task.add_done_callback(self._dispatch_tasks.discard)
+
+    async def _safe_dispatch(self, bucket: PrayerBucket) -> None:
+        """Отправить группу; при ошибке группа ждёт повтора с растущей паузой"""
+        delay = self.RETRY_DELAY
+        for attempt in range(1, self.DISPATCH_ATTEMPTS + 1):
+            try:
+                async with self._dispatch_slots:
+                    await self._dispatch(bucket)
+                return
+            except Exception as e:
+                logger.error(
+                    f"Ошибка отправки уведомлений {bucket.prayer} в {bucket.city} "
+                    f"(попытка {attempt} из {self.DISPATCH_ATTEMPTS}): {e}"
+                )
+            if attempt == self.DISPATCH_ATTEMPTS:
+                break
+            # Повтор безопасен: уже поставленные в очередь уведомления отсекает ключ идемпотентности outbox
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+                return
+            except asyncio.TimeoutError:
+                delay *= 2
+        logger.error(f"Уведомления {bucket.prayer} в {bucket.city} на {bucket.fire_at} не отправлены")
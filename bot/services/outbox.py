@@ -0,0 +1,274 @@
+"""
+Очередь уведомлений в PostgreSQL (outbox).
+
+Планировщик ставит уведомления в таблицу notification_outbox с ключом
+идемпотентности (пользователь, вид, ссылка, дата), поэтому повторная постановка
+(перезапуск, смена ведущей реплики) не создаёт дублей. Отправитель забирает
+записи через SELECT ... FOR UPDATE SKIP LOCKED и отмечает результат, поэтому
+после деплоя или смены ведущей реплики отправка продолжается с места остановки.
+Отправитель работает только на ведущей реплике: лимит скорости Telegram общий
+для токена бота, а token bucket у каждого процесса свой. Запись, захваченная
+упавшим процессом, снова становится доступной по истечении аренды (LEASE).
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional, Sequence
+
+from loguru import logger
+from sqlalchemy import DateTime, and_, delete, func, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from bot.services.broadcast import BroadcastMessage, Broadcaster
+from bot.services.metrics import notification_queue_lag
+from bot.services.notification_planner import utc_now
+from database.engine import AsyncSessionLocal as async_session_maker
+from database.models import OutboxMessage, OutboxStatus
+
+
+@dataclass(frozen=True)
+class OutboxItem:
+    """Получатель уведомления"""
+    user_id: int
+    chat_id: int
+    text: str
+    parse_mode: Optional[str] = None
+
+
+class NotificationOutbox:
+    """Операции с очередью уведомлений"""
+
+    # Сколько записей вставлять одним INSERT
+    INSERT_CHUNK = 1000
+    # Через сколько захваченная, но не отмеченная запись снова доступна для отправки
+    LEASE = timedelta(minutes=5)
+    # Сколько дней хранить обработанные записи
+    RETENTION_DAYS = 7
+    # Попыток отправки записи; после неудачной попытки запись снова ставится
+    # в очередь с паузой RETRY_DELAY, удваивающейся с каждой попыткой
+    MAX_ATTEMPTS = 3
+    RETRY_DELAY = timedelta(minutes=1)
+
+    @classmethod
+    async def enqueue(
+        cls,
+        kind: str,
+        ref: str,
+        day: date,
+        items: Iterable[OutboxItem],
+        send_after: datetime,
+        expires_at: Optional[datetime] = None,
+    ) -> int:
+        """
+        Поставить уведомления в очередь; уже поставленные (по ключу идемпотентности) пропускаются.
+
+        Returns:
+            Количество новых записей
+        """
+        rows = [
+            {
+                "user_id": item.user_id,
+                "chat_id": item.chat_id,
+                "kind": kind,
+                "ref": ref,
+                "date": day,
+                "text": item.text,
+                "parse_mode": item.parse_mode,
+                "status": OutboxStatus.PENDING,
+                "attempts": 0,
+                "send_after": send_after,
+                "expires_at": expires_at,
+            }
+            for item in items
+        ]
+        if not rows:
+            return 0
+
+        inserted = 0
+        async with async_session_maker() as session:
+            for start in range(0, len(rows), cls.INSERT_CHUNK):
+                stmt = (
+                    insert(OutboxMessage)
+                    .values(rows[start:start + cls.INSERT_CHUNK])
+                    .on_conflict_do_nothing(constraint="uq_notification_outbox_key")
+                    .returning(OutboxMessage.id)
+                )
+                result = await session.execute(stmt)
+                inserted += len(result.all())
+            await session.commit()
+        return inserted
+
+    @classmethod
+    async def claim(cls, limit: int) -> List[BroadcastMessage]:
+        """Захватить до `limit` готовых к отправке записей; просроченные помечаются как expired"""
+        now = utc_now()
+        claimable = or_(
+            OutboxMessage.status == OutboxStatus.PENDING,
+            and_(
+                OutboxMessage.status == OutboxStatus.PROCESSING,
+                OutboxMessage.claimed_at < now - cls.LEASE,
+            ),
+        )
+
+        async with async_session_maker() as session:
+            await session.execute(
+                update(OutboxMessage)
+                .where(claimable, OutboxMessage.expires_at < now)
+                .values(status=OutboxStatus.EXPIRED)
+            )
+
+            ids = (
+                select(OutboxMessage.id)
+                .where(claimable, OutboxMessage.send_after <= now)
+                .order_by(OutboxMessage.send_after)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            stmt = (
+                update(OutboxMessage)
+                .where(OutboxMessage.id.in_(ids))
+                .values(
+                    status=OutboxStatus.PROCESSING,
+                    claimed_at=now,
+                    attempts=OutboxMessage.attempts + 1,
+                )
+                .returning(
+                    OutboxMessage.id,
+                    OutboxMessage.chat_id,
+                    OutboxMessage.text,
+                    OutboxMessage.parse_mode,
+                    OutboxMessage.kind,
+                    OutboxMessage.send_after,
+                )
+            )
+            result = await session.execute(stmt)
+            claimed = []
+            for row in result:
+                notification_queue_lag.labels(kind=row.kind).observe((now - row.send_after).total_seconds())
+                claimed.append(
+                    BroadcastMessage(chat_id=row.chat_id, text=row.text, parse_mode=row.parse_mode, key=row.id)
+                )
+            await session.commit()
+        return claimed
+
+    @classmethod
+    async def complete(
+        cls,
+        sent_ids: Sequence[int],
+        failed_ids: Sequence[int] = (),
+        blocked_ids: Sequence[int] = (),
+    ) -> None:
+        """
+        Отметить результат отправки захваченных записей.
+        Неотправленные записи повторяются, пока не исчерпаны MAX_ATTEMPTS попыток (их счёт ведёт claim).
+        """
+        now = utc_now()
+        async with async_session_maker() as session:
+            for ids, status in (
+                (sent_ids, OutboxStatus.SENT),
+                (blocked_ids, OutboxStatus.BLOCKED),
+            ):
+                if ids:
+                    await session.execute(
+                        update(OutboxMessage)
+                        .where(OutboxMessage.id.in_(ids))
+                        .values(status=status, sent_at=now if status == OutboxStatus.SENT else None)
+                    )
+            if failed_ids:
+                await session.execute(
+                    update(OutboxMessage)
+                    .where(OutboxMessage.id.in_(failed_ids), OutboxMessage.attempts < cls.MAX_ATTEMPTS)
+                    .values(
+                        status=OutboxStatus.PENDING,
+                        claimed_at=None,
+                        send_after=literal(now, DateTime(timezone=True))
+                        + func.power(2, OutboxMessage.attempts - 1) * literal(cls.RETRY_DELAY),
+                    )
+                )
+                await session.execute(
+                    update(OutboxMessage)
+                    .where(OutboxMessage.id.in_(failed_ids), OutboxMessage.attempts >= cls.MAX_ATTEMPTS)
+                    .values(status=OutboxStatus.FAILED)
+                )
+            await session.commit()
+
+    @classmethod
+    async def purge(cls) -> None:
+        """Удалить обработанные записи старше RETENTION_DAYS"""
+        try:
+            async with async_session_maker() as session:
+                await session.execute(
+                    delete(OutboxMessage).where(
+                        OutboxMessage.status.in_([
+                            OutboxStatus.SENT,
+                            OutboxStatus.FAILED,
+                            OutboxStatus.BLOCKED,
+                            OutboxStatus.EXPIRED,
+                        ]),
+                        OutboxMessage.created_at < utc_now() - timedelta(days=cls.RETENTION_DAYS),
+                    )
+                )
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Outbox purge failed: {e}")
+
+
+class OutboxWorker:
+    """Отправитель: забирает записи из очереди пачками и рассылает их через Broadcaster"""
+
+    BATCH_SIZE = 200
+    # Как часто проверять очередь без явного сигнала (отложенные записи, аренды)
+    POLL_INTERVAL = 30
+
+    def __init__(self, broadcaster: Broadcaster) -> None:
+        self._broadcaster = broadcaster
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def kick(self) -> None:
+        """Разбудить отправителя после постановки новых записей"""
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            # Сбрасываем сигнал до захвата: kick() во время запроса не должен потеряться
+            self._wakeup.clear()
+            try:
+                sent = await self.process_batch()
+            except Exception as e:
+                logger.error(f"Ошибка обработки очереди уведомлений: {e}")
+                sent = 0
+
+            if sent:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def process_batch(self) -> int:
+        """Отправить одну пачку записей; возвращает количество захваченных записей"""
+        messages = await NotificationOutbox.claim(self.BATCH_SIZE)
+        if not messages:
+            return 0
+
+        result = await self._broadcaster.broadcast(messages, name="outbox")
+        failed_ids = [message.key for message in result.failed]
+        blocked_ids = [message.key for message in result.blocked]
+        done = set(failed_ids) | set(blocked_ids)
+        sent_ids = [message.key for message in messages if message.key not in done]
+        await NotificationOutbox.complete(sent_ids, failed_ids, blocked_ids)
+        return len(messages)
@@ -0,0 +1,205 @@
+"""
+Карточки расписания намазов (изображения).
+
+Карточка на день и на неделю рисуется Pillow в пуле процессов, чтобы отрисовка
+не блокировала event loop. Содержимое карточки определяется только городом,
+мазхабом, датой и языком, поэтому каждая карточка рисуется и загружается в
+Telegram один раз: file_id загруженного фото сохраняется в Redis, и все
+последующие показы - отправка по file_id без загрузки.
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import lru_cache, partial
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import BufferedInputFile, InlineKeyboardMarkup, Message
+from loguru import logger
+from PIL import Image, ImageDraw, ImageFont
+
+from bot.core.config import settings
+from bot.core.loader import redis_client
+from bot.services.gazetteer import gazetteer
+
+# (название намаза, время)
+CardRow = Tuple[str, str]
+
+BACKGROUND = (18, 52, 43)
+ACCENT = (212, 175, 55)
+TEXT = (240, 240, 232)
+MUTED = (160, 190, 178)
+STRIPE = (24, 64, 53)
+
+WIDTH = 900
+PADDING = 56
+
+
+@lru_cache(maxsize=8)
+def _font(size: int) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+    try:
+        return ImageFont.truetype(settings.PRAYER_CARD_FONT, size)
+    except OSError:
+        return ImageFont.load_default(size)
+
+
+def _to_png(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def _header(draw: ImageDraw.ImageDraw, width: int, title: str, subtitle: str) -> int:
+    """Заголовок карточки; возвращает координату начала таблицы"""
+    draw.text((PADDING, PADDING), title, font=_font(52), fill=ACCENT)
+    draw.text((PADDING, PADDING + 72), subtitle, font=_font(30), fill=MUTED)
+    top = PADDING + 130
+    draw.line((PADDING, top, width - PADDING, top), fill=ACCENT, width=3)
+    return top + 24
+
+
+def render_day_card(title: str, subtitle: str, rows: Sequence[CardRow]) -> bytes:
+    """Карточка расписания на день (PNG)"""
+    row_height = 84
+    height = PADDING + 154 + row_height * len(rows) + PADDING
+    image = Image.new("RGB", (WIDTH, height), BACKGROUND)
+    draw = ImageDraw.Draw(image)
+
+    top = _header(draw, WIDTH, title, subtitle)
+    name_font, time_font = _font(40), _font(48)
+    for index, (name, time) in enumerate(rows):
+        y = top + index * row_height
+        if index % 2 == 0:
+            draw.rounded_rectangle((PADDING - 16, y, WIDTH - PADDING + 16, y + row_height - 8), radius=16, fill=STRIPE)
+        middle = y + (row_height - 8) // 2
+        # Время выравнивается по правому краю: длина названия на любом языке не ломает колонки
+        draw.text((PADDING, middle), name, font=name_font, fill=TEXT, anchor="lm")
+        draw.text((WIDTH - PADDING, middle), time, font=time_font, fill=ACCENT, anchor="rm")
+    return _to_png(image)
+
+
+def render_week_card(title: str, subtitle: str, headers: Sequence[str], days: Sequence[Tuple[str, Sequence[str]]]) -> bytes:
+    """Карточка расписания на неделю: строки - дни, колонки - намазы (PNG)"""
+    width = 1280
+    row_height = 68
+    first_column = 220
+    height = PADDING + 154 + row_height * (len(days) + 1) + PADDING
+    image = Image.new("RGB", (width, height), BACKGROUND)
+    draw = ImageDraw.Draw(image)
+
+    top = _header(draw, width, title, subtitle)
+    column_width = (width - 2 * PADDING - first_column) / max(len(headers), 1)
+    header_font, cell_font = _font(28), _font(34)
+    middle = top + row_height // 2
+    for column, header in enumerate(headers):
+        x = PADDING + first_column + column_width * (column + 0.5)
+        draw.text((x, middle), header, font=header_font, fill=MUTED, anchor="mm")
+
+    for index, (label, times) in enumerate(days, start=1):
+        y = top + index * row_height
+        if index % 2 == 1:
+            draw.rounded_rectangle((PADDING - 16, y, width - PADDING + 16, y + row_height - 6), radius=14, fill=STRIPE)
+        middle = y + (row_height - 6) // 2
+        draw.text((PADDING, middle), label, font=cell_font, fill=TEXT, anchor="lm")
+        for column, time in enumerate(times):
+            x = PADDING + first_column + column_width * (column + 0.5)
+            draw.text((x, middle), time, font=cell_font, fill=ACCENT, anchor="mm")
+    return _to_png(image)
+
+
+class PrayerCardRenderer:
+    """Отрисовка карточек в пуле процессов и кэш file_id загруженных в Telegram карточек"""
+
+    KEY_PREFIX = "prayer:card"
+    # Карточка на прошедшую дату больше не показывается, хранить file_id дольше незачем
+    FILE_ID_TTL = 8 * 24 * 60 * 60
+
+    _executor: Optional[ProcessPoolExecutor] = None
+
+    @classmethod
+    def _get_executor(cls) -> ProcessPoolExecutor:
+        if cls._executor is None:
+            # spawn, а не fork: форк унаследовал бы event loop и открытые соединения Redis и PostgreSQL
+            cls._executor = ProcessPoolExecutor(
+                max_workers=settings.PRAYER_CARD_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return cls._executor
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """Остановить пул отрисовки"""
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=False, cancel_futures=True)
+            cls._executor = None
+
+    @classmethod
+    def card_key(cls, kind: str, city: str, madhab: str, day: date, locale: str) -> str:
+        # Ключ - название, которое рисуется на карточке: разные написания одного города
+        # получают одну карточку, а разные названия не получают чужой заголовок
+        return f"{cls.KEY_PREFIX}:{kind}:{gazetteer.display_name(city)}:{madhab}:{day.isoformat()}:{locale}"
+
+    @classmethod
+    async def _get_file_id(cls, key: str) -> Optional[str]:
+        try:
+            value = await redis_client.get(key)
+        except Exception as e:
+            logger.warning(f"Prayer card cache read failed: {e}")
+            return None
+        if isinstance(value, bytes):
+            value = value.decode()
+        return value
+
+    @classmethod
+    async def _set_file_id(cls, key: str, file_id: Optional[str]) -> None:
+        try:
+            if file_id is None:
+                await redis_client.delete(key)
+            else:
+                await redis_client.set(key, file_id, ex=cls.FILE_ID_TTL)
+        except Exception as e:
+            logger.warning(f"Prayer card cache write failed: {e}")
+
+    @classmethod
+    async def render(cls, render: Callable[..., bytes], *args: Any) -> bytes:
+        """Нарисовать карточку в пуле процессов"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(cls._get_executor(), partial(render, *args))
+
+    @classmethod
+    async def answer_card(
+        cls,
+        message: Message,
+        key: str,
+        render: Callable[..., bytes],
+        render_args: Sequence[Any],
+        caption: Optional[str] = None,
+        reply_markup: Optional[InlineKeyboardMarkup] = None,
+    ) -> Message:
+        """
+        Отправить карточку в чат сообщения: по сохранённому file_id, а если его нет
+        (или Telegram его не принял) - нарисовать, загрузить и сохранить file_id.
+        """
+        file_id = await cls._get_file_id(key)
+        if file_id is not None:
+            try:
+                return await message.answer_photo(photo=file_id, caption=caption, reply_markup=reply_markup)
+            except TelegramBadRequest as e:
+                logger.warning(f"Cached prayer card {key} rejected, re-uploading: {e}")
+                await cls._set_file_id(key, None)
+
+        image = await cls.render(render, *render_args)
+        filename = key.rsplit(":", 4)[0].replace(":", "_") + ".png"
+        sent = await message.answer_photo(
+            photo=BufferedInputFile(image, filename=filename),
+            caption=caption,
+            reply_markup=reply_markup,
+        )
+        if sent.photo:
+            await cls._set_file_id(key, sent.photo[-1].file_id)
+        return sent
+
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import time
 from datetime import date, datetime, timedelta
 from typing import Any, Dict, List, Optional
 
@@ -8,10 +9,14 @@ import aiohttp
 from loguru import logger
 
 from bot.core.config import settings
+from bot.services.gazetteer import gazetteer
+from bot.services.metrics import prayer_api_request_duration, prayer_timetable_lookups
+from bot.services.prayer_calc import ASR_SHADOW_FACTORS, CALCULATION_METHODS, calculate_timetable
+from bot.services.prayer_timetable import PrayerTimetableStore, date_range, normalize_city
 
 
 class PrayerService:
-    """Сервис для получения времени намазов через API Aladhan.com"""
+    """Сервис для получения времени намазов: локальный расчёт или API Aladhan.com"""
     
     BASE_URL = "http://api.aladhan.com/v1"
     
@@ -26,22 +31,106 @@ class PrayerService:
     # Порядок намазов для отображения
     PRAYER_ORDER = ["Fajr", "Sunrise", "Dhuhr", "Asr", "Maghrib", "Isha"]
     
+    # Ограничение параллельных запросов к API
+    MAX_CONCURRENT_REQUESTS = 4
+    
+    # Со скольких нужных дат в месяце выгоднее запросить календарь на весь месяц
+    MONTHLY_FETCH_MIN_DAYS = 2
+    
+    _session: Optional[aiohttp.ClientSession] = None
+    _semaphore: Optional[asyncio.Semaphore] = None
+    
     @classmethod
     def _get_method_from_madhab(cls, madhab: str) -> int:
         """Получить метод расчета по мазхабу"""
         return cls.MADHAB_METHODS.get(madhab, 1)  # По умолчанию Hanafi
     
+    @classmethod
+    def _get_school_from_madhab(cls, madhab: str) -> int:
+        """Получить школу расчета Асра (API parameter): 1 - ханафитская, 0 - шафиитская"""
+        return 1 if madhab == "Hanafi" else 0
+    
+    @classmethod
+    def _calculate_locally(
+        cls,
+        city: str,
+        madhab: str,
+        start_date: date,
+        days: int = 1,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Рассчитать время намазов без сети (None, если координаты города неизвестны)"""
+        if settings.PRAYER_TIMES_BACKEND != "local":
+            return None
+        
+        known_city = gazetteer.resolve(city)
+        if known_city is None:
+            return None
+        
+        latitude, longitude, timezone = known_city.latitude, known_city.longitude, known_city.timezone
+        method = cls._get_method_from_madhab(madhab)
+        asr_factor = ASR_SHADOW_FACTORS.get(madhab, 1)
+        timetable = calculate_timetable(latitude, longitude, timezone, start_date, days, method, asr_factor)
+        meta = {
+            "latitude": latitude,
+            "longitude": longitude,
+            "timezone": timezone,
+            "method": {"id": method, "name": CALCULATION_METHODS[method].name},
+            "school": "HANAFI" if asr_factor == 2 else "STANDARD",
+            "source": "local",
+        }
+        
+        return [
+            {
+                "date": start_date + timedelta(days=day_offset),
+                "city": city,
+                "madhab": madhab,
+                "timings": timings,
+                "meta": meta,
+            }
+            for day_offset, timings in enumerate(timetable)
+        ]
+    
+    @classmethod
+    def _get_session(cls) -> aiohttp.ClientSession:
+        """Общая HTTP-сессия (пул соединений переиспользуется между запросами)"""
+        if cls._session is None or cls._session.closed:
+            cls._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+        return cls._session
+    
+    @classmethod
+    def _get_semaphore(cls) -> asyncio.Semaphore:
+        if cls._semaphore is None:
+            cls._semaphore = asyncio.Semaphore(cls.MAX_CONCURRENT_REQUESTS)
+        return cls._semaphore
+    
+    @classmethod
+    async def close(cls) -> None:
+        """Закрыть общую HTTP-сессию"""
+        if cls._session is not None and not cls._session.closed:
+            await cls._session.close()
+        cls._session = None
+    
     @classmethod
     async def _make_request(cls, url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Выполнить HTTP-запрос к API"""
+        """Выполнить HTTP-запрос к API (не более MAX_CONCURRENT_REQUESTS одновременно)"""
+        endpoint = url.removeprefix(cls.BASE_URL).strip("/").split("/")[0]
+        outcome = "error"
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params, timeout=10) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        logger.error(f"API error: {response.status} - {await response.text()}")
-                        return None
+            async with cls._get_semaphore():
+                started = time.monotonic()
+                try:
+                    async with cls._get_session().get(url, params=params) as response:
+                        if response.status == 200:
+                            outcome = "ok"
+                            return await response.json()
+                        else:
+                            outcome = f"http_{response.status}"
+                            logger.error(f"API error: {response.status} - {await response.text()}")
+                            return None
+                finally:
+                    prayer_api_request_duration.labels(endpoint=endpoint, outcome=outcome).observe(
+                        time.monotonic() - started
+                    )
         except asyncio.TimeoutError:
             logger.error("API request timeout")
             return None
@@ -49,6 +138,163 @@ class PrayerService:
             logger.error(f"API request failed: {e}")
             return None
     
+    @staticmethod
+    def _clean_timings(timings: Dict[str, str]) -> Dict[str, str]:
+        """Убрать суффикс часового пояса из ответа календаря ("05:12 (+05)" -> "05:12")"""
+        return {key: value.split(" ")[0] for key, value in timings.items()}
+    
+    @classmethod
+    async def _fetch_day(
+        cls,
+        city: str,
+        madhab: str,
+        current_date: date,
+        country: str = "Russia"
+    ) -> Dict[date, Dict[str, str]]:
+        """Запросить расписание у API Aladhan на один день"""
+        params = {
+            "city": city,
+            "country": country,
+            "method": cls._get_method_from_madhab(madhab),
+            "school": cls._get_school_from_madhab(madhab),
+            "date": current_date.isoformat(),
+        }
+        
+        url = f"{cls.BASE_URL}/timingsByCity"
+        data = await cls._make_request(url, params)
+        
+        if not data or "data" not in data:
+            logger.warning(f"Failed to get data for {current_date}")
+            return {}
+        
+        return {current_date: cls._clean_timings(data["data"]["timings"])}
+    
+    @classmethod
+    async def _fetch_month(
+        cls,
+        city: str,
+        madhab: str,
+        year: int,
+        month: int,
+        country: str = "Russia"
+    ) -> Dict[date, Dict[str, str]]:
+        """Запросить у API Aladhan расписание на весь месяц одним запросом"""
+        params = {
+            "city": city,
+            "country": country,
+            "method": cls._get_method_from_madhab(madhab),
+            "school": cls._get_school_from_madhab(madhab),
+        }
+        
+        url = f"{cls.BASE_URL}/calendarByCity/{year}/{month}"
+        data = await cls._make_request(url, params)
+        
+        if not data or not isinstance(data.get("data"), list):
+            logger.warning(f"Failed to get calendar for {month:02d}.{year}")
+            return {}
+        
+        fetched = {}
+        for day_data in data["data"]:
+            try:
+                day = datetime.strptime(day_data["date"]["gregorian"]["date"], "%d-%m-%Y").date()
+            except (KeyError, ValueError):
+                continue
+            fetched[day] = cls._clean_timings(day_data["timings"])
+        return fetched
+    
+    @classmethod
+    async def _fetch_from_api(
+        cls,
+        city: str,
+        madhab: str,
+        dates: List[date],
+        country: str = "Russia"
+    ) -> Dict[date, Dict[str, str]]:
+        """
+        Запросить расписание у API Aladhan.
+        
+        Даты группируются по месяцам: месяц с несколькими нужными датами запрашивается
+        целиком через календарь, одиночные даты - отдельными запросами. Все запросы
+        выполняются параллельно (не более MAX_CONCURRENT_REQUESTS одновременно).
+        
+        Returns:
+            Расписания по датам; для месячных запросов включает весь месяц
+        """
+        by_month: Dict[tuple[int, int], List[date]] = {}
+        for current_date in dates:
+            by_month.setdefault((current_date.year, current_date.month), []).append(current_date)
+        
+        month_keys = [key for key, month_dates in by_month.items() if len(month_dates) >= cls.MONTHLY_FETCH_MIN_DAYS]
+        single_dates = [
+            current_date
+            for key, month_dates in by_month.items()
+            if key not in month_keys
+            for current_date in month_dates
+        ]
+        
+        month_results = await asyncio.gather(
+            *(cls._fetch_month(city, madhab, year, month, country) for year, month in month_keys)
+        )
+        
+        fetched: Dict[date, Dict[str, str]] = {}
+        for key, month_result in zip(month_keys, month_results):
+            fetched.update(month_result)
+            # Календарь недоступен - добираем недостающие дни месяца по одному
+            single_dates.extend(current_date for current_date in by_month[key] if current_date not in month_result)
+        
+        day_results = await asyncio.gather(
+            *(cls._fetch_day(city, madhab, current_date, country) for current_date in single_dates)
+        )
+        for day_result in day_results:
+            fetched.update(day_result)
+        
+        return fetched
+    
+    @classmethod
+    async def get_timetable(
+        cls,
+        city: str,
+        madhab: str,
+        start_date: date,
+        days: int,
+        country: str = "Russia"
+    ) -> List[Dict[str, Any]]:
+        """
+        Получить расписание на `days` дней: локальный расчёт, затем хранилище
+        расписаний (Redis/PostgreSQL) и только для недостающих дат - API
+        """
+        local = cls._calculate_locally(city, madhab, start_date, days)
+        if local:
+            prayer_timetable_lookups.labels(source="local").inc(len(local))
+            return local
+        
+        dates = date_range(start_date, days)
+        city_key = normalize_city(city)
+        method = cls._get_method_from_madhab(madhab)
+        
+        timetable = await PrayerTimetableStore.get_many(city_key, method, dates)
+        missing = [day for day in dates if day not in timetable]
+        if missing:
+            fetched = await cls._fetch_from_api(city, madhab, missing, country)
+            await PrayerTimetableStore.put_many(city_key, method, fetched)
+            timetable.update(fetched)
+            served = sum(1 for day in missing if day in fetched)
+            prayer_timetable_lookups.labels(source="api").inc(served)
+            prayer_timetable_lookups.labels(source="miss").inc(len(missing) - served)
+        
+        meta = {"method": {"id": method}, "source": "aladhan"}
+        return [
+            {
+                "date": day,
+                "city": city,
+                "madhab": madhab,
+                "timings": timetable[day],
+                "meta": meta,
+            }
+            for day in dates
+            if day in timetable
+        ]
+    
     @classmethod
     async def get_today_timings(
         cls, 
@@ -67,29 +313,8 @@ class PrayerService:
         Returns:
             Словарь с данными или None в случае ошибки
         """
-        today = date.today()
-        method = cls._get_method_from_madhab(madhab)
-        
-        params = {
-            "city": city,
-            "country": country,
-            "method": method,
-            "date": today.isoformat(),
-        }
-        
-        url = f"{cls.BASE_URL}/timingsByCity"
-        data = await cls._make_request(url, params)
-        
-        if not data or "data" not in data:
-            return None
-        
-        return {
-            "date": today,
-            "city": city,
-            "madhab": madhab,
-            "timings": data["data"]["timings"],
-            "meta": data["data"]["meta"],
-        }
+        results = await cls.get_timetable(city, madhab, date.today(), 1, country)
+        return results[0] if results else None
     
     @classmethod
     async def get_week_timings(
@@ -114,39 +339,40 @@ class PrayerService:
         if start_date is None:
             start_date = date.today()
         
+        results = await cls.get_timetable(city, madhab, start_date, 7, country)
+        return results if results else None
+    
+    @classmethod
+    async def prefetch_timetable(
+        cls,
+        city: str,
+        madhab: str = "Hanafi",
+        days: int = 30,
+        country: str = "Russia"
+    ) -> int:
+        """
+        Заранее загрузить расписание на `days` дней в хранилище.
+        Города с известными координатами считаются локально и не требуют загрузки.
+        
+        Returns:
+            Количество загруженных из API дней
+        """
+        start_date = date.today()
+        if cls._calculate_locally(city, madhab, start_date):
+            return 0
+        
+        dates = date_range(start_date, days)
+        city_key = normalize_city(city)
         method = cls._get_method_from_madhab(madhab)
-        results = []
         
-        # Запрашиваем данные для каждого дня недели
-        for day_offset in range(7):
-            current_date = start_date + timedelta(days=day_offset)
-            
-            params = {
-                "city": city,
-                "country": country,
-                "method": method,
-                "date": current_date.isoformat(),
-            }
-            
-            url = f"{cls.BASE_URL}/timingsByCity"
-            data = await cls._make_request(url, params)
-            
-            if not data or "data" not in data:
-                logger.warning(f"Failed to get data for {current_date}")
-                continue
-            
-            results.append({
-                "date": current_date,
-                "city": city,
-                "madhab": madhab,
-                "timings": data["data"]["timings"],
-                "meta": data["data"]["meta"],
-            })
-            
-            # Небольшая задержка чтобы не перегружать API
-            await asyncio.sleep(0.1)
+        stored = await PrayerTimetableStore.get_many(city_key, method, dates)
+        missing = [day for day in dates if day not in stored]
+        if not missing:
+            return 0
         
-        return results if results else None
+        fetched = await cls._fetch_from_api(city, madhab, missing, country)
+        await PrayerTimetableStore.put_many(city_key, method, fetched)
+        return len(fetched)
     
     @classmethod
     def format_timing_for_display(
@@ -0,0 +1,148 @@
+"""
+Хранилище расписаний намазов: Redis (горячий слой) + PostgreSQL (постоянный слой).
+
+Ключ записи - нормализованный город, метод расчёта и дата. Мазхаб однозначно
+задаёт метод (см. PrayerService.MADHAB_METHODS), поэтому отдельная школа Асра
+в ключ не входит.
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Dict, Iterable, List
+
+import orjson
+from loguru import logger
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+
+from bot.core.loader import redis_client
+from bot.services.gazetteer import gazetteer
+from bot.services.metrics import prayer_timetable_lookups
+from database.engine import AsyncSessionLocal as async_session_maker
+from database.models import PrayerTimetable
+
+Timings = Dict[str, str]
+
+# Сколько дней хранить прошедшие расписания в PostgreSQL
+RETENTION_DAYS = 7
+
+
+def normalize_city(city: str) -> str:
+    """
+    Ключ города в хранилище: id канонического города из газеттира
+    ("Уфа", "ufa", "г. Уфа" -> "ufa"), для неизвестных - нормализованное название.
+    """
+    known_city = gazetteer.resolve(city)
+    if known_city is not None:
+        return known_city.id
+    return " ".join(city.split()).casefold()
+
+
+class PrayerTimetableStore:
+    """Двухуровневое хранилище расписаний намазов"""
+
+    KEY_PREFIX = "prayer:timetable"
+
+    @classmethod
+    def _redis_key(cls, city_key: str, method: int, day: date) -> str:
+        return f"{cls.KEY_PREFIX}:{city_key}:{method}:{day.isoformat()}"
+
+    @staticmethod
+    def _redis_ttl(day: date) -> int:
+        """Запись живёт до конца следующего дня после даты расписания"""
+        return max((day - date.today()).days + 2, 1) * 86400
+
+    @classmethod
+    async def get_many(cls, city_key: str, method: int, dates: Iterable[date]) -> Dict[date, Timings]:
+        """Прочитать расписания: сначала Redis, затем PostgreSQL (с прогревом Redis)"""
+        dates = list(dates)
+        found: Dict[date, Timings] = {}
+        if not dates:
+            return found
+
+        try:
+            values = await redis_client.mget([cls._redis_key(city_key, method, day) for day in dates])
+            for day, value in zip(dates, values):
+                if value is not None:
+                    found[day] = orjson.loads(value)
+        except Exception as e:
+            logger.warning(f"Timetable cache read failed: {e}")
+        prayer_timetable_lookups.labels(source="redis").inc(len(found))
+
+        missing = [day for day in dates if day not in found]
+        if not missing:
+            return found
+
+        try:
+            async with async_session_maker() as session:
+                stmt = select(PrayerTimetable.date, PrayerTimetable.timings).where(
+                    PrayerTimetable.city_key == city_key,
+                    PrayerTimetable.method == method,
+                    PrayerTimetable.date.in_(missing),
+                )
+                result = await session.execute(stmt)
+                from_db = {row.date: row.timings for row in result}
+        except Exception as e:
+            logger.warning(f"Timetable database read failed: {e}")
+            return found
+
+        if from_db:
+            prayer_timetable_lookups.labels(source="postgres").inc(len(from_db))
+            found.update(from_db)
+            await cls._write_redis(city_key, method, from_db)
+        return found
+
+    @classmethod
+    async def put_many(cls, city_key: str, method: int, timetable: Dict[date, Timings]) -> None:
+        """Сохранить расписания в PostgreSQL (upsert) и Redis"""
+        if not timetable:
+            return
+
+        try:
+            async with async_session_maker() as session:
+                stmt = insert(PrayerTimetable).values([
+                    {"city_key": city_key, "method": method, "date": day, "timings": timings}
+                    for day, timings in timetable.items()
+                ])
+                stmt = stmt.on_conflict_do_update(
+                    constraint="uq_prayer_timetable_city_method_date",
+                    set_={"timings": stmt.excluded.timings},
+                )
+                await session.execute(stmt)
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Timetable database write failed: {e}")
+
+        await cls._write_redis(city_key, method, timetable)
+
+    @classmethod
+    async def _write_redis(cls, city_key: str, method: int, timetable: Dict[date, Timings]) -> None:
+        try:
+            async with redis_client.pipeline(transaction=False) as pipeline:
+                for day, timings in timetable.items():
+                    await pipeline.set(
+                        cls._redis_key(city_key, method, day),
+                        orjson.dumps(timings),
+                        ex=cls._redis_ttl(day),
+                    )
+                await pipeline.execute()
+        except Exception as e:
+            logger.warning(f"Timetable cache write failed: {e}")
+
+    @classmethod
+    async def purge_expired(cls) -> None:
+        """Удалить из PostgreSQL расписания старше RETENTION_DAYS"""
+        try:
+            async with async_session_maker() as session:
+                stmt = delete(PrayerTimetable).where(
+                    PrayerTimetable.date < date.today() - timedelta(days=RETENTION_DAYS)
+                )
+                await session.execute(stmt)
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Timetable purge failed: {e}")
+
+
+def date_range(start: date, days: int) -> List[date]:
+    """Список из `days` последовательных дат начиная с `start`"""
+    return [start + timedelta(days=i) for i in range(days)]
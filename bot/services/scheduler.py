@@ -1,282 +1,611 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import datetime
-from typing import Dict, List, Tuple
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from enum import IntFlag
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
 from loguru import logger
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from sqlalchemy import select, and_, or_
+from sqlalchemy import Row, Select, select, and_, or_, case, func, literal
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from bot.core.config import DEFAULT_LOCALE, settings
+from bot.core.loader import i18n
+from bot.services.broadcast import Broadcaster
+from bot.services.calendar_service import HijriCalendarService, ReligiousDate
+from bot.services.event_service import EventService
+from bot.services.gazetteer import gazetteer
+from bot.services.leader import LeaderElection
+from bot.services.metrics import instrument_scheduler, prayer_notification_recipients, prayer_plan_groups
+from bot.services.notification_planner import NotificationPlanner, PrayerBucket, parse_timezone, utc_now
+from bot.services.outbox import NotificationOutbox, OutboxItem, OutboxWorker
 from bot.services.prayer_service import PrayerService
+from bot.services.prayer_timetable import PrayerTimetableStore
+from database.crud import get_due_stream_reminders, mark_stream_reminders_sent, set_users_blocked
 from database.engine import AsyncSessionLocal as async_session_maker
-from database.models import User, Settings
-from aiogram.utils.i18n import gettext as _
+from database.models import PRAYER_MASK_BITS, CommunityEvent, Stream, User, Settings
 
-# Глобальный экземпляр бота, будет установлен после инициализации
+# Глобальный экземпляр бота, рассыльщик и отправитель очереди уведомлений,
+# будут установлены после инициализации
 bot_instance = None
+broadcaster: Optional[Broadcaster] = None
+outbox_worker: Optional[OutboxWorker] = None
 
+# На сколько дней вперёд загружать расписания намазов
+PREFETCH_DAYS = 30
 
-async def check_prayer_times() -> None:
-    """Проверяет время намазов и отправляет уведомления пользователям"""
+
+# План строится со вчерашнего дня на PLAN_DAYS дней: локальная дата городов
+# западнее сервера может отставать, а прошедшие намазы отбрасывает планировщик
+PLAN_DAYS = 3
+
+
+# Ключ advisory-блокировки ведущей реплики и канал сигнала о перестроении плана
+SCHEDULER_LOCK_ID = 7210402611
+PRAYER_REPLAN_CHANNEL = "prayer_replan"
+
+# Опоздавшее дольше этого уведомление о намазе уже не отправляется
+PRAYER_NOTIFICATION_TTL = timedelta(minutes=30)
+
+# За сколько до начала трансляции напоминать подписавшимся
+STREAM_REMINDER_LEAD = timedelta(minutes=15)
+
+# Когда (по времени сервера) рассылать уведомления о религиозных датах и сколько они актуальны
+RELIGIOUS_NOTIFICATION_HOUR = 9
+RELIGIOUS_NOTIFICATION_TTL = timedelta(hours=12)
+
+# Получатели массовых уведомлений читаются из базы и ставятся в очередь пачками:
+# память не растёт с числом подписчиков, а отправка начинается до конца выборки
+RECIPIENT_CHUNK = 1000
+
+# Мазхаб и часовой пояс пользователей без настройки
+DEFAULT_MADHAB = "Hanafi"
+DEFAULT_TIMEZONE = "Europe/Moscow"
+MADHAB_EXPR = func.coalesce(Settings.madhab, literal(DEFAULT_MADHAB, literal_execute=True))
+
+# Город пользователя: id из газеттира, для нераспознанных городов - введённое название.
+# По id расписание считается по координатам города, а одноимённые города не смешиваются
+CITY_EXPR = func.coalesce(User.city_id, User.city)
+
+# Время мероприятий и трансляций хранится без пояса, по часам EVENTS_TIMEZONE
+EVENTS_ZONE = ZoneInfo(settings.EVENTS_TIMEZONE)
+
+
+class NotificationGroup(NamedTuple):
+    """Подписчики одного города и мазхаба"""
+    city: str  # id города из газеттира или название нераспознанного города (CITY_EXPR)
+    madhab: str
+    timezone: Optional[str]  # самый частый часовой пояс в группе
+    prayers: List[str]  # намазы, на которые в группе есть подписка
+
+
+async def build_prayer_plan() -> List[PrayerBucket]:
+    """Строит план уведомлений о намазах на ближайшие PLAN_DAYS дней"""
+    buckets: List[PrayerBucket] = []
     try:
-        # Получаем текущее локальное время в формате HH:MM
-        # Предполагаем, что сервер находится в том же часовом поясе, что и пользователи
-        now = datetime.now()
-        current_time = now.strftime("%H:%M")
-        logger.info(f"Проверка времени намазов: {current_time}")
-        
         async with async_session_maker() as session:
-            # 1. Получаем уникальные города, где есть пользователи с включенными уведомлениями
-            cities = await get_cities_with_notifications(session)
-            if not cities:
-                logger.info("Нет городов с активными уведомлениями")
-                return
-            
-            logger.info(f"Найдено городов для проверки: {len(cities)}")
-            
-            # 2. Для каждого города получаем время намазов
-            notifications_sent = 0
-            for city in cities:
-                try:
-                    city_notifications = await check_city_prayer_times(
-                        session, city, current_time
-                    )
-                    notifications_sent += city_notifications
-                except Exception as e:
-                    logger.error(f"Ошибка при проверке города {city}: {e}")
-            
-            if notifications_sent > 0:
-                logger.info(f"Отправлено уведомлений: {notifications_sent}")
-            else:
-                logger.debug("Нет уведомлений для отправки")
-                
+            # Группы подписчиков (город, мазхаб) и намазы, на которые в группе есть подписка
+            groups = await get_notification_groups(session)
+        if not groups:
+            logger.info("Нет городов с активными уведомлениями")
+            return buckets
+        
+        # Расписание запрашивается один раз на группу, группы - параллельно
+        start_date = date.today() - timedelta(days=1)
+        timetables = await asyncio.gather(
+            *(PrayerService.get_timetable(group.city, group.madhab, start_date, PLAN_DAYS) for group in groups),
+            return_exceptions=True,
+        )
+        
+        for group, timetable in zip(groups, timetables):
+            if isinstance(timetable, Exception):
+                logger.error(f"Ошибка получения расписания для города {group.city} ({group.madhab}): {timetable}")
+                continue
+            # Локальное время намазов переводится в UTC один раз при построении плана
+            zone = get_city_timezone(group.city, group.timezone)
+            for day_data in timetable:
+                for prayer_name in group.prayers:
+                    fire_at = _prayer_fire_at(day_data["date"], day_data["timings"].get(prayer_name), zone)
+                    if fire_at is not None:
+                        buckets.append(PrayerBucket(fire_at, group.city, group.madhab, prayer_name, day_data["date"]))
+        
+        prayer_plan_groups.set(len(groups))
+        logger.info(f"Групп (город, мазхаб) в плане уведомлений: {len(groups)}")
+        
     except Exception as e:
-        logger.error(f"Критическая ошибка в check_prayer_times: {e}")
+        logger.error(f"Критическая ошибка в build_prayer_plan: {e}")
+    
+    return buckets
+
+
+def get_city_timezone(city: str, user_timezone: Optional[str]) -> tzinfo:
+    """
+    Часовой пояс, в котором указано расписание города.
+    Для известных городов берётся пояс города (у многих пользователей остаётся
+    пояс по умолчанию), иначе - пояс из настроек пользователей.
+    """
+    known_city = gazetteer.resolve(city)
+    if known_city is not None:
+        return ZoneInfo(known_city.timezone)
+    return parse_timezone(user_timezone) or ZoneInfo(DEFAULT_TIMEZONE)
+
+
+def _prayer_fire_at(day: date, prayer_time: Optional[str], zone: tzinfo) -> Optional[datetime]:
+    """Момент намаза в UTC по локальному времени расписания (с учётом перехода на летнее время)"""
+    try:
+        local_time = datetime.strptime(prayer_time, "%H:%M").time()
+    except (TypeError, ValueError):
+        return None
+    return datetime.combine(day, local_time, tzinfo=zone).astimezone(timezone.utc)
 
 
-async def get_cities_with_notifications(session: AsyncSession) -> List[str]:
-    """Получает список уникальных городов, где есть пользователи с включенными уведомлениями"""
+async def get_notification_groups(session: AsyncSession) -> List[NotificationGroup]:
+    """Получает группы подписчиков (город, мазхаб) одним агрегирующим запросом"""
     try:
-        # Находим города, где есть пользователи с включенными уведомлениями о намазах
-        # и у которых указан город
         stmt = (
-            select(User.city)
+            select(
+                CITY_EXPR.label("city"),
+                MADHAB_EXPR.label("madhab"),
+                func.mode().within_group(Settings.timezone).label("timezone"),
+                func.bit_or(Settings.prayer_mask).label("prayer_mask"),
+            )
             .join(Settings, User.id == Settings.user_id)
             .where(
                 and_(
                     User.city.isnot(None),
                     User.city != "",
-                    Settings.prayer_notifications_on == True,
-                    or_(
-                        Settings.notify_fajr == True,
-                        Settings.notify_dhuhr == True,
-                        Settings.notify_asr == True,
-                        Settings.notify_maghrib == True,
-                        Settings.notify_isha == True,
-                    )
+                    User.is_block == False,
+                    Settings.prayer_mask != 0,
                 )
             )
-            .distinct()
+            .group_by(CITY_EXPR, MADHAB_EXPR)
         )
         
         result = await session.execute(stmt)
-        cities = [row[0] for row in result.fetchall() if row[0]]
-        return cities
+        return [
+            NotificationGroup(
+                city=row.city,
+                madhab=row.madhab,
+                timezone=row.timezone,
+                prayers=[prayer for prayer, bit in PRAYER_MASK_BITS.items() if row.prayer_mask & bit],
+            )
+            for row in result
+        ]
         
     except Exception as e:
-        logger.error(f"Ошибка при получении городов: {e}")
+        logger.error(f"Ошибка при получении групп подписчиков: {e}")
         return []
 
 
-async def check_city_prayer_times(
-    session: AsyncSession, 
-    city: str, 
-    current_time: str
-) -> int:
-    """Проверяет время намазов для конкретного города и отправляет уведомления"""
-    try:
-        # Получаем всех пользователей из этого города с их настройками
+async def dispatch_prayer_bucket(bucket: PrayerBucket) -> None:
+    """Отправляет уведомление о намазе подписчикам группы (город, мазхаб)"""
+    # Условия повторяют предикаты частичных индексов ix_users_city_active и
+    # ix_settings_prayer_subscribers, поэтому выборка обходится без чтения таблиц
+    madhab_filter = Settings.madhab == bucket.madhab
+    if bucket.madhab == DEFAULT_MADHAB:
+        madhab_filter = or_(madhab_filter, Settings.madhab.is_(None))
+    async with async_session_maker() as session:
         stmt = (
-            select(User, Settings)
+            select(User.id, User.telegram_id, Settings.language)
             .join(Settings, User.id == Settings.user_id)
             .where(
                 and_(
-                    User.city == city,
-                    Settings.prayer_notifications_on == True
+                    CITY_EXPR == bucket.city,
+                    User.is_block == False,
+                    Settings.prayer_mask != 0,
+                    Settings.prayer_mask.op("&")(PRAYER_MASK_BITS[bucket.prayer]) != 0,
+                    madhab_filter,
                 )
             )
         )
         
-        result = await session.execute(stmt)
-        users_data = result.fetchall()
-        
-        if not users_data:
-            return 0
-        
-        # Получаем время намазов для города (берем мазхаб первого пользователя для простоты)
-        # В реальной системе нужно было бы учитывать разные мазхабы, но для MVP используем первый
-        first_user_settings = users_data[0][1]
-        madhab = first_user_settings.madhab or "Hanafi"
-        
-        timings_data = await PrayerService.get_today_timings(city, madhab)
-        if not timings_data:
-            logger.warning(f"Не удалось получить время намазов для города {city}")
-            return 0
-        
-        timings = timings_data.get("timings", {})
-        if not timings:
-            return 0
-        
-        # Проверяем совпадение времени для каждого намаза
-        notifications_sent = 0
-        
-        # Маппинг названий намазов на поля в Settings
-        prayer_fields = {
-            "Fajr": "notify_fajr",
-            "Dhuhr": "notify_dhuhr",
-            "Asr": "notify_asr",
-            "Maghrib": "notify_maghrib",
-            "Isha": "notify_isha",
-        }
-        
-        for prayer_name, prayer_time in timings.items():
-            if prayer_time == current_time:
-                field_name = prayer_fields.get(prayer_name)
-                if not field_name:
-                    continue
-                
-                # Отправляем уведомления всем пользователям с включенным уведомлением для этого намаза
-                for user, settings in users_data:
-                    if getattr(settings, field_name, False):
-                        try:
-                            await send_prayer_notification(user, prayer_name, city)
-                            notifications_sent += 1
-                        except Exception as e:
-                            logger.error(f"Ошибка отправки уведомления пользователю {user.telegram_id}: {e}")
-        
-        return notifications_sent
-        
+        # Текст рендерится один раз на язык и переиспользуется для всех получателей
+        texts: Dict[str, str] = {}
+        city_name = gazetteer.display_name(bucket.city)
+        recipients = enqueued = 0
+        async for chunk in stream_chunks(session, stmt):
+            items = []
+            for user_id, chat_id, language in chunk:
+                locale = language or DEFAULT_LOCALE
+                text = texts.get(locale)
+                if text is None:
+                    text = texts[locale] = format_prayer_notification(bucket.prayer, city_name, locale)
+                items.append(OutboxItem(user_id, chat_id, text))
+            
+            # Уведомления ставятся в очередь, отправляет их OutboxWorker ведущей реплики
+            # Ключ идемпотентности - местная дата намаза: дата момента отправки в UTC у городов
+            # далеко от UTC (и после смены города) совпадает с датой соседнего дня
+            enqueued += await NotificationOutbox.enqueue(
+                kind="prayer",
+                ref=bucket.prayer,
+                day=bucket.day,
+                items=items,
+                send_after=bucket.fire_at,
+                expires_at=bucket.fire_at + PRAYER_NOTIFICATION_TTL,
+            )
+            recipients += len(chunk)
+            if outbox_worker is not None:
+                outbox_worker.kick()
+    
+    prayer_notification_recipients.labels(prayer=bucket.prayer).inc(recipients)
+    logger.info(
+        f"Уведомления о намазе {bucket.prayer} в {bucket.city} ({bucket.madhab}): "
+        f"получателей {recipients}, поставлено в очередь {enqueued}"
+    )
+
+
+async def stream_chunks(session: AsyncSession, stmt: Select) -> AsyncIterator[Sequence[Row]]:
+    """Читает результат запроса серверным курсором пачками по RECIPIENT_CHUNK строк"""
+    result = await session.stream(stmt.execution_options(yield_per=RECIPIENT_CHUNK))
+    async for chunk in result.partitions():
+        yield chunk
+
+
+prayer_planner = NotificationPlanner(build_prayer_plan, dispatch_prayer_bucket)
+
+
+async def plan_prayer_notifications() -> None:
+    """Ежедневное построение плана уведомлений о намазах"""
+    try:
+        await prayer_planner.replan()
     except Exception as e:
-        logger.error(f"Ошибка при проверке города {city}: {e}")
-        return 0
+        logger.error(f"Ошибка в plan_prayer_notifications: {e}")
 
 
-async def send_prayer_notification(user: User, prayer_name: str, city: str) -> None:
-    """Отправляет уведомление о времени намаза пользователю"""
-    global bot_instance
-    
-    if bot_instance is None:
-        logger.error("Экземпляр бота не установлен в планировщике")
-        return
+def request_prayer_replan() -> None:
+    """Перестроить план уведомлений после изменения города, мазхаба или подписок пользователя"""
+    if leader.is_leader:
+        prayer_planner.request_replan()
+    else:
+        # План строит ведущая реплика: передаём ей сигнал
+        leader.publish(PRAYER_REPLAN_CHANNEL)
+
+
+# Названия намазов (исходные строки каталога переводов)
+PRAYER_DISPLAY_NAMES = {
+    "Fajr": "Фаджр",
+    "Dhuhr": "Зухр",
+    "Asr": "Аср",
+    "Maghrib": "Магриб",
+    "Isha": "Иша",
+}
+
+
+def format_prayer_notification(prayer_name: str, city: str, locale: str) -> str:
+    """Текст уведомления о времени намаза на языке пользователя"""
+    # Контекста i18n из middleware в фоновых задачах нет, поэтому локаль передаётся явно
+    display_name = PRAYER_DISPLAY_NAMES.get(prayer_name)
+    prayer_display = i18n.gettext(display_name, locale=locale) if display_name else prayer_name
     
+    return i18n.gettext("🕌 Время намаза {prayer} в г. {city}!", locale=locale).format(
+        prayer=prayer_display,
+        city=city
+    )
+
+
+def to_events_time(moment: datetime) -> datetime:
+    """Момент (с поясом) во времени хранения мероприятий и трансляций"""
+    return moment.astimezone(EVENTS_ZONE).replace(tzinfo=None)
+
+
+def from_events_time(value: datetime) -> datetime:
+    """Время мероприятия или трансляции из базы в UTC"""
+    return value.replace(tzinfo=EVENTS_ZONE).astimezone(timezone.utc)
+
+
+def format_event_reminder(event: CommunityEvent, locale: str) -> str:
+    """Форматирует напоминание о мероприятии на языке пользователя"""
+    return i18n.gettext(
+        "🎪 *Напоминание о мероприятии*\n\n"
+        "Название: *{title}*\n"
+        "Дата и время: {start_time}\n"
+        "Место: {location}\n\n"
+        "Мероприятие начнётся через 24 часа!",
+        locale=locale,
+    ).format(
+        title=event.title,
+        start_time=event.start_time.strftime("%d.%m.%Y %H:%M"),
+        location=event.location or i18n.gettext("Не указано", locale=locale),
+    )
+
+
+async def check_event_notifications() -> None:
+    """Ставит в очередь напоминания о мероприятиях, начинающихся в ближайшие 24 часа"""
     try:
-        # Получаем локализованное название намаза
-        prayer_display_names = {
-            "Fajr": _("Фаджр"),
-            "Dhuhr": _("Зухр"),
-            "Asr": _("Аср"),
-            "Maghrib": _("Магриб"),
-            "Isha": _("Иша"),
-        }
-        
-        prayer_display = prayer_display_names.get(prayer_name, prayer_name)
-        
-        # Создаем сообщение
-        message = _("🕌 Время намаза {prayer} в г. {city}!").format(
-            prayer=prayer_display,
-            city=city
-        )
-        
-        # Отправляем сообщение
-        await bot_instance.send_message(
-            chat_id=user.telegram_id,
-            text=message
-        )
+        async with async_session_maker() as session:
+            events = await EventService.get_pending_reminders(session, now=to_events_time(utc_now()), hours_before=24)
+            
+            for event, recipients in events:
+                # Одна пачка на мероприятие, текст рендерится один раз на язык
+                texts: Dict[str, str] = {}
+                items = []
+                for recipient in recipients:
+                    locale = recipient.language or DEFAULT_LOCALE
+                    text = texts.get(locale)
+                    if text is None:
+                        text = texts[locale] = format_event_reminder(event, locale)
+                    items.append(OutboxItem(recipient.user_id, recipient.chat_id, text, parse_mode="Markdown"))
+                
+                # Ключ идемпотентности outbox отсекает повтор, если процесс упадёт до отметки reminded_at
+                enqueued = await NotificationOutbox.enqueue(
+                    kind="event",
+                    ref=str(event.id),
+                    day=event.start_time.date(),
+                    items=items,
+                    send_after=utc_now(),
+                    expires_at=from_events_time(event.start_time),
+                )
+                await EventService.mark_reminded(session, [recipient.registration_id for recipient in recipients])
+                logger.info(
+                    f"Напоминания о мероприятии {event.id}: получателей {len(recipients)}, "
+                    f"поставлено в очередь {enqueued}"
+                )
         
-        logger.debug(f"Уведомление отправлено пользователю {user.telegram_id}: {prayer_name} в {city}")
+        if events and outbox_worker is not None:
+            outbox_worker.kick()
+                
+    except Exception as e:
+        logger.error(f"Ошибка в check_event_notifications: {e}")
+
+
+def format_stream_reminder(stream: Stream, locale: str) -> str:
+    """Форматирует напоминание о трансляции на языке пользователя"""
+    text = i18n.gettext(
+        "🔴 Трансляция «{title}» начнётся в {start_time}",
+        locale=locale,
+    ).format(title=stream.title, start_time=stream.scheduled_time.strftime("%H:%M"))
+    if stream.speaker:
+        text += "\n" + i18n.gettext("Ведущий: {speaker}", locale=locale).format(speaker=stream.speaker)
+    if stream.stream_url:
+        text += "\n" + stream.stream_url
+    return text
+
+
+async def send_stream_reminders() -> None:
+    """Ставит в очередь напоминания о трансляциях, начинающихся в ближайшие STREAM_REMINDER_LEAD"""
+    try:
+        async with async_session_maker() as session:
+            now = utc_now()
+            streams = await get_due_stream_reminders(
+                session, since=to_events_time(now), until=to_events_time(now + STREAM_REMINDER_LEAD)
+            )
+            
+            for stream, recipients in streams:
+                texts: Dict[str, str] = {}
+                items = []
+                for _, user_id, chat_id, language in recipients:
+                    locale = language or DEFAULT_LOCALE
+                    text = texts.get(locale)
+                    if text is None:
+                        text = texts[locale] = format_stream_reminder(stream, locale)
+                    items.append(OutboxItem(user_id, chat_id, text))
+                
+                # Напоминание имеет смысл, пока трансляция идёт
+                ends_at = from_events_time(stream.scheduled_time) + timedelta(minutes=stream.duration_minutes or 60)
+                enqueued = await NotificationOutbox.enqueue(
+                    kind="stream",
+                    ref=str(stream.id),
+                    day=stream.scheduled_time.date(),
+                    items=items,
+                    send_after=utc_now(),
+                    expires_at=ends_at,
+                )
+                await mark_stream_reminders_sent(session, [reminder_id for reminder_id, *_ in recipients])
+                logger.info(
+                    f"Напоминания о трансляции {stream.id}: получателей {len(recipients)}, "
+                    f"поставлено в очередь {enqueued}"
+                )
         
+        if streams and outbox_worker is not None:
+            outbox_worker.kick()
+    
     except Exception as e:
-        # Игнорируем ошибки блокировки бота пользователем и другие
-        if "bot was blocked" in str(e).lower() or "user is deactivated" in str(e).lower():
-            logger.debug(f"Пользователь {user.telegram_id} заблокировал бота")
-        else:
-            logger.error(f"Ошибка отправки уведомления пользователю {user.telegram_id}: {e}")
+        logger.error(f"Ошибка в send_stream_reminders: {e}")
 
 
-async def check_event_notifications() -> None:
-    """Проверяет мероприятия и отправляет уведомления пользователям"""
+class ReligiousNotice(IntFlag):
+    """Виды уведомлений о религиозных датах (биты маски подписок пользователя)"""
+    JUMA = 1
+    ON_DAY = 2
+    DAY_BEFORE = 4
+
+
+# Поле настроек и шаблон текста для каждого вида уведомления
+RELIGIOUS_NOTICES = {
+    ReligiousNotice.JUMA: (Settings.notify_juma, "🕌 Джума мубарак! Сегодня пятница - день пятничной молитвы."),
+    ReligiousNotice.ON_DAY: (Settings.notify_on_day, "🌙 Сегодня {name}\n{description}"),
+    ReligiousNotice.DAY_BEFORE: (Settings.notify_1day_before, "🌙 Завтра {name}\n{description}"),
+}
+
+
+def format_religious_notice(notice: ReligiousNotice, religious_date: ReligiousDate, locale: str) -> str:
+    """Форматирует уведомление о религиозной дате на языке пользователя"""
+    template = RELIGIOUS_NOTICES[notice][1]
+    return i18n.gettext(template, locale=locale).format(
+        name=i18n.gettext(religious_date.name, locale=locale),
+        description=i18n.gettext(religious_date.description, locale=locale),
+    )
+
+
+async def send_religious_notifications() -> None:
+    """Ставит в очередь уведомления о пятнице и религиозных датах сегодня и завтра"""
     try:
-        global bot_instance
-        if bot_instance is None:
-            logger.error("Экземпляр бота не установлен в планировщике")
+        today = date.today()
+        occasions: List[Tuple[ReligiousNotice, ReligiousDate]] = []
+        for religious_date in HijriCalendarService.get_religious_dates(today):
+            notice = ReligiousNotice.JUMA if religious_date.key == "juma" else ReligiousNotice.ON_DAY
+            occasions.append((notice, religious_date))
+        for religious_date in HijriCalendarService.get_religious_dates(today + timedelta(days=1)):
+            if religious_date.key != "juma":
+                occasions.append((ReligiousNotice.DAY_BEFORE, religious_date))
+        if not occasions:
             return
         
+        # Один запрос на все виды: маска показывает, на какие из сегодняшних уведомлений подписан пользователь
+        notices = {notice for notice, _ in occasions}
+        mask_expr = sum(
+            case((RELIGIOUS_NOTICES[notice][0] == True, int(notice)), else_=0) for notice in notices
+        )
         async with async_session_maker() as session:
-            from bot.services.event_service import EventService
-            from database.models import Settings
-            
-            # Получаем мероприятия для уведомлений (за 24 часа до начала)
-            events_with_registrations = await EventService.get_events_for_notification(
-                session, hours_before=24
+            stmt = (
+                select(User.id, User.telegram_id, Settings.language, mask_expr.label("mask"))
+                .join(Settings, User.id == Settings.user_id)
+                .where(
+                    and_(
+                        User.is_block == False,
+                        or_(*(RELIGIOUS_NOTICES[notice][0] == True for notice in notices)),
+                    )
+                )
             )
             
-            notifications_sent = 0
-            for event, registrations in events_with_registrations:
-                # Отправляем уведомления всем зарегистрированным пользователям
-                for registration in registrations:
-                    try:
-                        # Проверяем настройки уведомлений пользователя
-                        stmt = select(Settings).where(Settings.user_id == registration.user_id)
-                        result = await session.execute(stmt)
-                        settings = result.scalar_one_or_none()
-                        
-                        if settings and settings.notify_event_reminder:
-                            # Форматируем сообщение
-                            start_time = event.start_time.strftime("%d.%m.%Y %H:%M")
-                            message = _(
-                                "🎪 *Напоминание о мероприятии*\n\n"
-                                "Название: *{title}*\n"
-                                "Дата и время: {start_time}\n"
-                                "Место: {location}\n\n"
-                                "Мероприятие начнётся через 24 часа!"
-                            ).format(
-                                title=event.title,
-                                start_time=start_time,
-                                location=event.location or _("Не указано")
-                            )
-                            
-                            await bot_instance.send_message(
-                                chat_id=registration.user_id,
-                                text=message,
-                                parse_mode="Markdown"
-                            )
-                            notifications_sent += 1
-                            
-                    except Exception as e:
-                        logger.error(f"Ошибка отправки уведомления о мероприятии: {e}")
-            
-            if notifications_sent > 0:
-                logger.info(f"Отправлено уведомлений о мероприятиях: {notifications_sent}")
-                
+            expires_at = utc_now() + RELIGIOUS_NOTIFICATION_TTL
+            texts: Dict[Tuple[int, str], str] = {}
+            recipients: Counter = Counter()
+            async for chunk in stream_chunks(session, stmt):
+                for index, (notice, religious_date) in enumerate(occasions):
+                    items = []
+                    for user_id, chat_id, language, mask in chunk:
+                        if not mask & notice:
+                            continue
+                        locale = language or DEFAULT_LOCALE
+                        text = texts.get((index, locale))
+                        if text is None:
+                            text = texts[index, locale] = format_religious_notice(notice, religious_date, locale)
+                        items.append(OutboxItem(user_id, chat_id, text))
+                    
+                    await NotificationOutbox.enqueue(
+                        kind="religious",
+                        ref=f"{notice.name.lower()}:{religious_date.key}",
+                        day=today,
+                        items=items,
+                        send_after=utc_now(),
+                        expires_at=expires_at,
+                    )
+                    recipients[f"{notice.name} {religious_date.key}"] += len(items)
+                if outbox_worker is not None:
+                    outbox_worker.kick()
+        
+        logger.info(f"Уведомления о религиозных датах, получателей: {dict(recipients)}")
+    
     except Exception as e:
-        logger.error(f"Ошибка в check_event_notifications: {e}")
+        logger.error(f"Ошибка в send_religious_notifications: {e}")
+
+
+def build_religious_calendar() -> None:
+    """Ежедневное перестроение календаря религиозных дат"""
+    try:
+        HijriCalendarService.build_religious_calendar()
+    except Exception as e:
+        logger.error(f"Ошибка в build_religious_calendar: {e}")
+
+
+async def prefetch_prayer_timetables() -> None:
+    """Заранее загружает расписания намазов в хранилище для всех городов с пользователями"""
+    try:
+        async with async_session_maker() as session:
+            stmt = (
+                select(CITY_EXPR, Settings.madhab)
+                .join(Settings, User.id == Settings.user_id)
+                .where(
+                    and_(
+                        User.city.isnot(None),
+                        User.city != "",
+                        User.is_block == False,
+                    )
+                )
+                .distinct()
+            )
+            result = await session.execute(stmt)
+            city_madhabs = result.fetchall()
+        
+        days_fetched = 0
+        for city, madhab in city_madhabs:
+            try:
+                days_fetched += await PrayerService.prefetch_timetable(
+                    city, madhab or "Hanafi", days=PREFETCH_DAYS
+                )
+            except Exception as e:
+                logger.error(f"Ошибка предзагрузки расписания для города {city}: {e}")
+        
+        await PrayerTimetableStore.purge_expired()
+        logger.info(
+            f"Предзагрузка расписаний завершена: городов {len(city_madhabs)}, загружено дней {days_fetched}"
+        )
+        
+    except Exception as e:
+        logger.error(f"Ошибка в prefetch_prayer_timetables: {e}")
 
 
 # Создаем глобальный экземпляр планировщика
 scheduler = AsyncIOScheduler()
 
+# Задачи, которые ведущая реплика выполняет сразу после избрания
+STARTUP_JOBS = ('religious_calendar_build', 'prayer_timetable_prefetch', 'prayer_notifications_plan')
+
+
+async def _on_leader_elected() -> None:
+    """Эта реплика стала ведущей: запускаем задачи планировщика и план уведомлений"""
+    scheduler.resume()
+    prayer_planner.start()
+    if outbox_worker is not None:
+        outbox_worker.start()
+    for job_id in STARTUP_JOBS:
+        scheduler.modify_job(job_id, next_run_time=datetime.now())
+
+
+async def _on_leader_revoked() -> None:
+    """Реплика потеряла ведущую роль: задачи планирования останавливаются"""
+    scheduler.pause()
+    await prayer_planner.stop()
+    if outbox_worker is not None:
+        await outbox_worker.stop()
+
+
+# Планированием и отправкой уведомлений из очереди занимается одна реплика: у всех
+# реплик общий токен бота, и лимит Telegram соблюдается только при одном отправителе
+leader = LeaderElection(
+    SCHEDULER_LOCK_ID,
+    on_elected=_on_leader_elected,
+    on_revoked=_on_leader_revoked,
+    channels={PRAYER_REPLAN_CHANNEL: prayer_planner.request_replan},
+)
+
 
 def setup_scheduler() -> None:
     """Настраивает и запускает планировщик"""
     try:
-        # Добавляем задачу проверки времени намазов каждую минуту
+        instrument_scheduler(scheduler)
+        
+        # План уведомлений о намазах: при старте и ежедневно после предзагрузки расписаний
+        scheduler.add_job(
+            plan_prayer_notifications,
+            'cron',
+            hour=0,
+            minute=20,
+            id='prayer_notifications_plan',
+            replace_existing=True
+        )
+        
+        # Предзагрузка расписаний намазов: при старте и ежедневно после полуночи
+        scheduler.add_job(
+            prefetch_prayer_timetables,
+            'cron',
+            hour=0,
+            minute=10,
+            id='prayer_timetable_prefetch',
+            replace_existing=True
+        )
+        
+        # Очистка обработанных записей очереди уведомлений
         scheduler.add_job(
-            check_prayer_times,
+            NotificationOutbox.purge,
             'cron',
-            second=0,  # Запускаем в начале каждой минуты
-            id='prayer_notifications',
+            hour=3,
+            minute=0,
+            id='notification_outbox_purge',
             replace_existing=True
         )
         
@@ -289,6 +618,35 @@ def setup_scheduler() -> None:
             replace_existing=True
         )
         
+        # Календарь религиозных дат: при старте и ежедневно
+        scheduler.add_job(
+            build_religious_calendar,
+            'cron',
+            hour=0,
+            minute=5,
+            id='religious_calendar_build',
+            replace_existing=True
+        )
+        
+        # Уведомления о пятнице и религиозных датах
+        scheduler.add_job(
+            send_religious_notifications,
+            'cron',
+            hour=RELIGIOUS_NOTIFICATION_HOUR,
+            minute=0,
+            id='religious_notifications',
+            replace_existing=True
+        )
+        
+        # Напоминания о трансляциях (запрос по частичным индексам, пусто - почти бесплатно)
+        scheduler.add_job(
+            send_stream_reminders,
+            'interval',
+            minutes=1,
+            id='stream_reminders',
+            replace_existing=True
+        )
+        
         logger.info("Планировщик уведомлений настроен")
         
     except Exception as e:
@@ -299,15 +657,21 @@ def start_scheduler() -> None:
     """Запускает планировщик"""
     try:
         if not scheduler.running:
-            scheduler.start()
+            # Задачи выполняются, только пока реплика ведущая (см. _on_leader_elected)
+            scheduler.start(paused=True)
+            leader.start()
             logger.info("Планировщик уведомлений запущен")
     except Exception as e:
         logger.error(f"Ошибка запуска планировщика: {e}")
 
 
-def stop_scheduler() -> None:
+async def stop_scheduler() -> None:
     """Останавливает планировщик"""
     try:
+        await leader.stop()
+        await prayer_planner.stop()
+        if outbox_worker is not None:
+            await outbox_worker.stop()
         if scheduler.running:
             scheduler.shutdown()
             logger.info("Планировщик уведомлений остановлен")
@@ -315,8 +679,22 @@ def stop_scheduler() -> None:
         logger.error(f"Ошибка остановки планировщика: {e}")
 
 
+async def mark_chats_blocked(chat_ids: List[int]) -> None:
+    """Отмечает пользователей, заблокировавших бота: рассылки их больше не выбирают"""
+    async with async_session_maker() as session:
+        await set_users_blocked(session, chat_ids)
+    logger.info(f"Отмечено заблокировавших бота пользователей: {len(chat_ids)}")
+
+
 def set_bot_instance(bot):
     """Устанавливает экземпляр бота для использования в планировщике"""
-    global bot_instance
+    global bot_instance, broadcaster, outbox_worker
     bot_instance = bot
+    broadcaster = Broadcaster(
+        bot,
+        settings.BROADCAST_RATE_LIMIT,
+        settings.BROADCAST_WORKERS,
+        on_blocked=mark_chats_blocked,
+    )
+    outbox_worker = OutboxWorker(broadcaster)
     logger.info("Экземпляр бота установлен в планировщике")
@@ -1,9 +1,12 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
+from datetime import datetime
+from typing import TYPE_CHECKING, NamedTuple
 
 from sqlalchemy import func, select, update
 
-from bot.cache.redis import build_key, cached, clear_cache
+from bot.cache.keys import USERS_TAG, user_tag
+from bot.cache.redis import DEFAULT_TTL, build_key, cached
+from bot.cache.tags import invalidate_tags
 from bot.database.models import UserModel
 
 if TYPE_CHECKING:
@@ -11,6 +14,22 @@ if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import AsyncSession
 
 
+class UserRow(NamedTuple):
+    """Cached copy of a users row (plain values instead of an ORM instance)."""
+
+    id: int
+    first_name: str
+    last_name: str | None
+    username: str | None
+    language_code: str | None
+    referrer: str | None
+    created_at: datetime
+    is_admin: bool
+    is_suspicious: bool
+    is_block: bool
+    is_premium: bool
+
+
 async def add_user(
     session: AsyncSession,
     user: User,
@@ -36,10 +55,14 @@ async def add_user(
 
     session.add(new_user)
     await session.commit()
-    await clear_cache(user_exists, user_id)
+    await invalidate_tags(user_tag(user_id), USERS_TAG)
+
+
+def _user_tags(session: AsyncSession, user_id: int) -> list[str]:
+    return [user_tag(user_id)]
 
 
-@cached(key_builder=lambda session, user_id: build_key(user_id))
+@cached(key_builder=lambda session, user_id: build_key(user_id), tags=_user_tags, local_ttl=DEFAULT_TTL)
 async def user_exists(session: AsyncSession, user_id: int) -> bool:
     """Checks if the user is in the database."""
     query = select(UserModel.id).filter_by(id=user_id).limit(1)
@@ -50,7 +73,7 @@ async def user_exists(session: AsyncSession, user_id: int) -> bool:
     return bool(user)
 
 
-@cached(key_builder=lambda session, user_id: build_key(user_id))
+@cached(key_builder=lambda session, user_id: build_key(user_id), tags=_user_tags)
 async def get_first_name(session: AsyncSession, user_id: int) -> str:
     query = select(UserModel.first_name).filter_by(id=user_id)
 
@@ -60,7 +83,7 @@ async def get_first_name(session: AsyncSession, user_id: int) -> str:
     return first_name or ""
 
 
-@cached(key_builder=lambda session, user_id: build_key(user_id))
+@cached(key_builder=lambda session, user_id: build_key(user_id), tags=_user_tags, local_ttl=DEFAULT_TTL)
 async def get_language_code(session: AsyncSession, user_id: int) -> str:
     query = select(UserModel.language_code).filter_by(id=user_id)
 
@@ -79,9 +102,10 @@ async def set_language_code(
 
     await session.execute(stmt)
     await session.commit()
+    await invalidate_tags(user_tag(user_id), USERS_TAG)
 
 
-@cached(key_builder=lambda session, user_id: build_key(user_id))
+@cached(key_builder=lambda session, user_id: build_key(user_id), tags=_user_tags, local_ttl=DEFAULT_TTL)
 async def is_admin(session: AsyncSession, user_id: int) -> bool:
     query = select(UserModel.is_admin).filter_by(id=user_id)
 
@@ -96,19 +120,19 @@ async def set_is_admin(session: AsyncSession, user_id: int, is_admin: bool) -> N
 
     await session.execute(stmt)
     await session.commit()
+    await invalidate_tags(user_tag(user_id), USERS_TAG)
 
 
-@cached(key_builder=lambda session: build_key())
-async def get_all_users(session: AsyncSession) -> list[UserModel]:
-    query = select(UserModel)
+@cached(key_builder=lambda session: build_key(), tags=[USERS_TAG], lock=True, row_type=UserRow)
+async def get_all_users(session: AsyncSession) -> list[UserRow]:
+    query = select(*(getattr(UserModel, field) for field in UserRow._fields))
 
     result = await session.execute(query)
 
-    users = result.scalars()
-    return list(users)
+    return [UserRow(*row) for row in result]
 
 
-@cached(key_builder=lambda session: build_key())
+@cached(key_builder=lambda session: build_key(), tags=[USERS_TAG], lock=True)
 async def get_user_count(session: AsyncSession) -> int:
     query = select(func.count()).select_from(UserModel)
 
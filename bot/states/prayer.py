@@ -9,3 +9,4 @@ class PrayerStates(StatesGroup):
 class PrayerSettingsState(StatesGroup):
     """Состояния FSM для настроек намазов"""
     waiting_for_city = State()
+    waiting_for_location = State()
@@ -5,4 +5,5 @@ class ProfileStates(StatesGroup):
     """Состояния FSM для редактирования профиля."""
     entering_gender = State()
     entering_city = State()
+    confirming_city = State()
     waiting_for_name = State()
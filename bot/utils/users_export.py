@@ -2,13 +2,17 @@ from __future__ import annotations
 import csv
 import io
 from datetime import datetime, timezone
+from typing import TYPE_CHECKING
 
 from aiogram.types import BufferedInputFile
 
 from bot.database.models import UserModel
 
+if TYPE_CHECKING:
+    from bot.services.users import UserRow
 
-async def convert_users_to_csv(users: list[UserModel]) -> BufferedInputFile:
+
+async def convert_users_to_csv(users: list[UserRow]) -> BufferedInputFile:
     """Export all users in csv file."""
     columns = UserModel.__table__.columns
     data = [[getattr(user, column.name) for column in columns] for user in users]
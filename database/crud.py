@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from sqlalchemy import select, update, delete, func, and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, selectinload
@@ -79,6 +81,10 @@ async def get_or_create_user_with_settings(
     if user.full_name != full_name:
         user.full_name = full_name
         updated = True
+    # Пользователь снова пишет боту - значит, разблокировал его
+    if user.is_block:
+        user.is_block = False
+        updated = True
     if updated:
         await session.commit()
     
@@ -225,6 +231,19 @@ async def update_user_settings(session: AsyncSession, telegram_id: int, **kwargs
     return settings
 
 
+async def set_users_blocked(session: AsyncSession, telegram_ids: list[int]) -> None:
+    """Отметить пользователей, заблокировавших бота (одним UPDATE)"""
+    if not telegram_ids:
+        return
+    stmt = (
+        update(User)
+        .where(User.telegram_id.in_(telegram_ids), User.is_block == False)
+        .values(is_block=True)
+    )
+    await session.execute(stmt)
+    await session.commit()
+
+
 async def update_user(session: AsyncSession, user_id: int, update_data: dict) -> None:
     """Обновить данные пользователя"""
     stmt = select(User).where(User.id == user_id)
@@ -451,6 +470,50 @@ async def create_stream_reminder(
     return reminder
 
 
+async def get_due_stream_reminders(
+    session: AsyncSession, since: datetime, until: datetime
+) -> list[tuple[Stream, list[tuple[int, int, int, str | None]]]]:
+    """
+    Получить неотправленные напоминания о стримах, начинающихся после `since` и до `until`
+    (по часам хранения времени стримов, без пояса) одним запросом.
+    Возвращает список (стрим, [(id напоминания, user_id, telegram_id, язык)]).
+    """
+    stmt = (
+        select(Stream, StreamReminder.id, User.id, User.telegram_id, Settings.language)
+        .join(StreamReminder, StreamReminder.stream_id == Stream.id)
+        .join(User, User.id == StreamReminder.user_id)
+        .outerjoin(Settings, Settings.user_id == User.id)
+        .where(
+            Stream.is_upcoming == True,
+            Stream.scheduled_time > since,
+            Stream.scheduled_time <= until,
+            StreamReminder.reminded_at.is_(None),
+            User.is_block == False,
+        )
+        .order_by(Stream.scheduled_time, Stream.id)
+    )
+    result = await session.execute(stmt)
+
+    reminders: dict[int, tuple[Stream, list[tuple[int, int, int, str | None]]]] = {}
+    for stream, reminder_id, user_id, telegram_id, language in result:
+        _, recipients = reminders.setdefault(stream.id, (stream, []))
+        recipients.append((reminder_id, user_id, telegram_id, language))
+    return list(reminders.values())
+
+
+async def mark_stream_reminders_sent(session: AsyncSession, reminder_ids: list[int]) -> None:
+    """Отметить напоминания о стримах отправленными (одним UPDATE)"""
+    if not reminder_ids:
+        return
+    stmt = (
+        update(StreamReminder)
+        .where(StreamReminder.id.in_(reminder_ids))
+        .values(reminded_at=datetime.now())
+    )
+    await session.execute(stmt)
+    await session.commit()
+
+
 async def get_user_stream_reminders(
     session: AsyncSession, user_id: int
 ) -> list[StreamReminder]:
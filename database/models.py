@@ -1,4 +1,4 @@
-from sqlalchemy import BigInteger, Integer, String, DateTime, ForeignKey, Boolean, func, Text, Enum, UniqueConstraint, Float
+from sqlalchemy import BigInteger, Integer, SmallInteger, String, DateTime, ForeignKey, Boolean, func, Text, Enum, UniqueConstraint, Float, Date, JSON, Index, Computed, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 import enum
 import json
@@ -14,7 +14,11 @@ class User(Base):
     full_name: Mapped[str] = mapped_column(String, nullable=False)
     gender: Mapped[str | None] = mapped_column(String, nullable=True)
     city: Mapped[str | None] = mapped_column(String, nullable=True)
+    # Канонический город из газеттира (bot.data.cities_data); NULL - город не распознан
+    city_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
     streak_days: Mapped[int] = mapped_column(Integer, default=0)
+    # Пользователь заблокировал бота или удалил аккаунт: рассылки его пропускают
+    is_block: Mapped[bool] = mapped_column(Boolean, default=False, server_default="false")
     # Новые поля для обучения
     education_level: Mapped[str | None] = mapped_column(String(50), nullable=True)
     total_courses_completed: Mapped[int] = mapped_column(Integer, default=0)
@@ -35,6 +39,16 @@ class User(Base):
     stream_reminders: Mapped[list["StreamReminder"]] = relationship("StreamReminder", back_populates="user")
     certificates: Mapped[list["Certificate"]] = relationship("Certificate", back_populates="user")
 
+    __table_args__ = (
+        # Получатели уведомлений города читаются только из индекса (город - как CITY_EXPR планировщика)
+        Index(
+            'ix_users_city_active',
+            text('coalesce(city_id, city)'),
+            postgresql_include=['id', 'telegram_id'],
+            postgresql_where=text('NOT is_block'),
+        ),
+    )
+
 class EventType(enum.Enum):
     LECTURE = "lecture"
     MEETING = "meeting"
@@ -85,13 +99,22 @@ class EventRegistration(Base):
     status: Mapped[RegistrationStatus] = mapped_column(Enum(RegistrationStatus, native_enum=False), default=RegistrationStatus.CONFIRMED)
     registered_at: Mapped[DateTime] = mapped_column(DateTime, default=func.now())
     cancelled_at: Mapped[DateTime | None] = mapped_column(DateTime, nullable=True)
+    # Когда отправлено напоминание о мероприятии (NULL - ещё не отправлено)
+    reminded_at: Mapped[DateTime | None] = mapped_column(DateTime, nullable=True)
     
     # Relationships
     user: Mapped["User"] = relationship("User", back_populates="event_registrations")
     event: Mapped["CommunityEvent"] = relationship("CommunityEvent", back_populates="registrations")
     
     # Unique constraint
-    __table_args__ = (UniqueConstraint('user_id', 'event_id', name='uq_user_event'),)
+    __table_args__ = (
+        UniqueConstraint('user_id', 'event_id', name='uq_user_event'),
+        Index(
+            'ix_event_registrations_event_id_pending_reminder',
+            'event_id',
+            postgresql_where=reminded_at.is_(None),
+        ),
+    )
 
 
 class ProposalStatus(enum.Enum):
@@ -119,6 +142,25 @@ class EventProposal(Base):
     reviewer: Mapped["User"] = relationship("User", foreign_keys=[reviewed_by])
 
 
+# Подписки на уведомления о намазах: поле настроек и бит в Settings.prayer_mask
+PRAYER_NOTIFY_FIELDS = {
+    "Fajr": "notify_fajr",
+    "Dhuhr": "notify_dhuhr",
+    "Asr": "notify_asr",
+    "Maghrib": "notify_maghrib",
+    "Isha": "notify_isha",
+}
+PRAYER_MASK_BITS = {prayer: 1 << index for index, prayer in enumerate(PRAYER_NOTIFY_FIELDS)}
+
+# Маска вычисляется самим PostgreSQL при любом изменении флагов (0 - уведомления выключены)
+PRAYER_MASK_SQL = "CASE WHEN prayer_notifications_on THEN ({}) ELSE 0 END::smallint".format(
+    " | ".join(
+        f"(coalesce({field}, false)::int << {index})"
+        for index, field in enumerate(PRAYER_NOTIFY_FIELDS.values())
+    )
+)
+
+
 class Settings(Base):
     __tablename__ = "settings"
 
@@ -143,6 +185,8 @@ class Settings(Base):
     notify_maghrib: Mapped[bool] = mapped_column(Boolean, default=True)
     notify_isha: Mapped[bool] = mapped_column(Boolean, default=True)
     madhab: Mapped[str] = mapped_column(String, default="Hanafi")  # Hanafi, Shafi, Maliki, Hanbali
+    # Биты PRAYER_MASK_BITS включённых уведомлений о намазах
+    prayer_mask: Mapped[int] = mapped_column(SmallInteger, Computed(PRAYER_MASK_SQL, persisted=True))
     
     # Новые поля для уведомлений о религиозных событиях
     notify_1day_before: Mapped[bool] = mapped_column(Boolean, default=True)
@@ -167,6 +211,16 @@ class Settings(Base):
     updated_at: Mapped[DateTime] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
     user: Mapped["User"] = relationship("User", back_populates="settings")
 
+    __table_args__ = (
+        # Подписчики уведомлений о намазах: выборка по user_id без чтения таблицы
+        Index(
+            'ix_settings_prayer_subscribers',
+            'user_id',
+            postgresql_include=['madhab', 'prayer_mask', 'language'],
+            postgresql_where=text('prayer_mask <> 0'),
+        ),
+    )
+
 
 # ==================== EDUCATION MODULE MODELS ====================
 
@@ -404,6 +458,10 @@ class Stream(Base):
     reminders: Mapped[list["StreamReminder"]] = relationship(
         "StreamReminder", back_populates="stream", cascade="all, delete-orphan"
     )
+    
+    __table_args__ = (
+        Index('ix_streams_upcoming_scheduled_time', 'scheduled_time', postgresql_where=is_upcoming.is_(True)),
+    )
 
 
 class StreamReminder(Base):
@@ -420,7 +478,14 @@ class StreamReminder(Base):
     stream: Mapped["Stream"] = relationship("Stream", back_populates="reminders")
     
     # Unique constraint
-    __table_args__ = (UniqueConstraint('user_id', 'stream_id', name='uq_user_stream_reminder'),)
+    __table_args__ = (
+        UniqueConstraint('user_id', 'stream_id', name='uq_user_stream_reminder'),
+        Index(
+            'ix_stream_reminders_stream_id_pending',
+            'stream_id',
+            postgresql_where=reminded_at.is_(None),
+        ),
+    )
 
 
 # ==================== CERTIFICATE MODEL ====================
@@ -441,3 +506,61 @@ class Certificate(Base):
     
     # Unique constraint
     __table_args__ = (UniqueConstraint('user_id', 'course_id', name='uq_user_course_certificate'),)
+
+
+# ==================== PRAYER TIMETABLE MODELS ====================
+
+class PrayerTimetable(Base):
+    """Сохранённое расписание намазов на день (ключ: нормализованный город, метод расчёта, дата)"""
+    __tablename__ = "prayer_timetables"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    city_key: Mapped[str] = mapped_column(String(200), nullable=False)
+    method: Mapped[int] = mapped_column(Integer, nullable=False)
+    date: Mapped[Date] = mapped_column(Date, nullable=False)
+    timings: Mapped[dict] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[DateTime] = mapped_column(DateTime, default=func.now())
+    
+    # Unique constraint
+    __table_args__ = (UniqueConstraint('city_key', 'method', 'date', name='uq_prayer_timetable_city_method_date'),)
+
+
+# ==================== NOTIFICATION OUTBOX MODELS ====================
+
+class OutboxStatus(enum.Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    SENT = "sent"
+    FAILED = "failed"
+    BLOCKED = "blocked"
+    EXPIRED = "expired"
+
+
+class OutboxMessage(Base):
+    """Уведомление в очереди на отправку (ключ идемпотентности: пользователь, вид, ссылка, дата)"""
+    __tablename__ = "notification_outbox"
+    
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    kind: Mapped[str] = mapped_column(String(32), nullable=False)  # prayer, event, ...
+    ref: Mapped[str] = mapped_column(String(200), nullable=False)  # намаз, id мероприятия, ...
+    date: Mapped[Date] = mapped_column(Date, nullable=False)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    parse_mode: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    status: Mapped[OutboxStatus] = mapped_column(
+        Enum(OutboxStatus, native_enum=False, length=20, values_callable=lambda statuses: [s.value for s in statuses]),
+        default=OutboxStatus.PENDING,
+        nullable=False,
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    send_after: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=False)
+    expires_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    claimed_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    sent_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), default=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint('user_id', 'kind', 'ref', 'date', name='uq_notification_outbox_key'),
+        Index('ix_notification_outbox_status_send_after', 'status', 'send_after'),
+    )
@@ -0,0 +1,41 @@
+"""add event_registrations.reminded_at
+
+Revision ID: 3b7f1c9e5d42
+Revises: 5a9c3e7d1b28
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7f1c9e5d42'
+down_revision: Union[str, None] = '5a9c3e7d1b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('event_registrations', sa.Column('reminded_at', sa.DateTime(), nullable=True))
+    # Регистрации, которым уже пора было напомнить, не получают напоминание повторно
+    op.execute(
+        "UPDATE event_registrations SET reminded_at = now() "
+        "FROM community_events "
+        "WHERE community_events.id = event_registrations.event_id "
+        "AND community_events.start_time <= now() + interval '24 hours'"
+    )
+    op.create_index(
+        'ix_event_registrations_event_id_pending_reminder',
+        'event_registrations',
+        ['event_id'],
+        unique=False,
+        postgresql_where=sa.text('reminded_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_event_registrations_event_id_pending_reminder', table_name='event_registrations')
+    op.drop_column('event_registrations', 'reminded_at')
@@ -0,0 +1,35 @@
+"""add prayer timetables
+
+Revision ID: 3c1f7a9d2b64
+Revises: eb80383fe184
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f7a9d2b64'
+down_revision: Union[str, None] = 'eb80383fe184'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('prayer_timetables',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('city_key', sa.String(length=200), nullable=False),
+    sa.Column('method', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('timings', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('city_key', 'method', 'date', name='uq_prayer_timetable_city_method_date')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('prayer_timetables')
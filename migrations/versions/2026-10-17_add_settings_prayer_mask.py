@@ -0,0 +1,57 @@
+"""add settings.prayer_mask and subscriber indexes
+
+Revision ID: 6f1a8c3e2d57
+Revises: 9d4e2a6c8b13
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f1a8c3e2d57'
+down_revision: Union[str, None] = '9d4e2a6c8b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PRAYER_MASK_SQL = (
+    "CASE WHEN prayer_notifications_on THEN ("
+    "(coalesce(notify_fajr, false)::int << 0) | "
+    "(coalesce(notify_dhuhr, false)::int << 1) | "
+    "(coalesce(notify_asr, false)::int << 2) | "
+    "(coalesce(notify_maghrib, false)::int << 3) | "
+    "(coalesce(notify_isha, false)::int << 4)"
+    ") ELSE 0 END::smallint"
+)
+
+
+def upgrade() -> None:
+    op.add_column(
+        'settings',
+        sa.Column('prayer_mask', sa.SmallInteger(), sa.Computed(PRAYER_MASK_SQL, persisted=True), nullable=False),
+    )
+    op.create_index(
+        'ix_settings_prayer_subscribers',
+        'settings',
+        ['user_id'],
+        unique=False,
+        postgresql_include=['madhab', 'prayer_mask', 'language'],
+        postgresql_where=sa.text('prayer_mask <> 0'),
+    )
+    op.create_index(
+        'ix_users_city_active',
+        'users',
+        ['city'],
+        unique=False,
+        postgresql_include=['id', 'telegram_id'],
+        postgresql_where=sa.text('NOT is_block'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_city_active', table_name='users')
+    op.drop_index('ix_settings_prayer_subscribers', table_name='settings')
+    op.drop_column('settings', 'prayer_mask')
@@ -0,0 +1,40 @@
+"""add stream reminder indexes
+
+Revision ID: 9d4e2a6c8b13
+Revises: 3b7f1c9e5d42
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4e2a6c8b13'
+down_revision: Union[str, None] = '3b7f1c9e5d42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_streams_upcoming_scheduled_time',
+        'streams',
+        ['scheduled_time'],
+        unique=False,
+        postgresql_where=sa.text('is_upcoming IS true'),
+    )
+    op.create_index(
+        'ix_stream_reminders_stream_id_pending',
+        'stream_reminders',
+        ['stream_id'],
+        unique=False,
+        postgresql_where=sa.text('reminded_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stream_reminders_stream_id_pending', table_name='stream_reminders')
+    op.drop_index('ix_streams_upcoming_scheduled_time', table_name='streams')
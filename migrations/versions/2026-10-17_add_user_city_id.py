@@ -0,0 +1,27 @@
+"""add users.city_id
+
+Revision ID: 2c5e9b7a4f16
+Revises: 6f1a8c3e2d57
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c5e9b7a4f16'
+down_revision: Union[str, None] = '6f1a8c3e2d57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Заполняется при следующем сохранении города пользователем
+    op.add_column('users', sa.Column('city_id', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'city_id')
@@ -0,0 +1,34 @@
+"""add users.is_block
+
+Revision ID: 5a9c3e7d1b28
+Revises: 8e2d4b6a1f3c
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a9c3e7d1b28'
+down_revision: Union[str, None] = '8e2d4b6a1f3c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # В базах, созданных начальной миграцией, колонка уже есть
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('users')}
+    if 'is_block' not in columns:
+        op.add_column('users', sa.Column('is_block', sa.Boolean(), server_default='false', nullable=False))
+
+
+def downgrade() -> None:
+    # Удаляем колонку, только если её добавила upgrade(): колонка начальной
+    # миграции создаётся без значения по умолчанию, добавленная здесь - с ним
+    columns = {column['name']: column for column in sa.inspect(op.get_bind()).get_columns('users')}
+    column = columns.get('is_block')
+    if column is not None and column.get('default') is not None:
+        op.drop_column('users', 'is_block')
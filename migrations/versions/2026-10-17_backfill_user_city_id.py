@@ -0,0 +1,67 @@
+"""backfill users.city_id and index users by city_id
+
+Revision ID: 7b3d9f1e5a20
+Revises: 2c5e9b7a4f16
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from bot.services.gazetteer import BASHKORTOSTAN, gazetteer
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3d9f1e5a20'
+down_revision: Union[str, None] = '2c5e9b7a4f16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _known_city(name: str):
+    matches = gazetteer.lookup(name)
+    if len(matches) > 1:
+        # До газеттира город выбирался из списка городов Башкортостана
+        matches = [city for city in matches if city.region == BASHKORTOSTAN]
+    return matches[0] if len(matches) == 1 else None
+
+
+def upgrade() -> None:
+    # Уже сохранённые города привязываются к газеттиру; нераспознанные остаются с city_id = NULL
+    bind = op.get_bind()
+    names = bind.execute(
+        sa.text("SELECT DISTINCT city FROM users WHERE city_id IS NULL AND city IS NOT NULL AND city <> ''")
+    ).scalars().all()
+    for name in names:
+        city = _known_city(name)
+        if city is not None:
+            bind.execute(
+                sa.text("UPDATE users SET city = :name, city_id = :city_id WHERE city_id IS NULL AND city = :typed"),
+                {"name": city.name, "city_id": city.id, "typed": name},
+            )
+
+    # Получатели группируются по id города, а для нераспознанных - по названию
+    op.drop_index('ix_users_city_active', table_name='users')
+    op.create_index(
+        'ix_users_city_active',
+        'users',
+        [sa.text('coalesce(city_id, city)')],
+        unique=False,
+        postgresql_include=['id', 'telegram_id'],
+        postgresql_where=sa.text('NOT is_block'),
+    )
+
+
+def downgrade() -> None:
+    # Заполненные city_id не очищаются: колонку удаляет предыдущая миграция
+    op.drop_index('ix_users_city_active', table_name='users')
+    op.create_index(
+        'ix_users_city_active',
+        'users',
+        ['city'],
+        unique=False,
+        postgresql_include=['id', 'telegram_id'],
+        postgresql_where=sa.text('NOT is_block'),
+    )
@@ -0,0 +1,6 @@
+import os
+
+# Settings are read on import of bot.core.config; tests never reach these services
+os.environ.setdefault("BOT_TOKEN", "123456:test")
+os.environ.setdefault("AMPLITUDE_API_KEY", "test")
+os.environ.setdefault("DEEPSEEK_API_KEY", "test")
@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+from bot.services.broadcast import TokenBucket
+
+
+async def _elapsed(bucket: TokenBucket, count: int) -> float:
+    started = time.monotonic()
+    for _ in range(count):
+        await bucket.acquire()
+    return time.monotonic() - started
+
+
+def test_burst_up_to_capacity_is_immediate() -> None:
+    assert asyncio.run(_elapsed(TokenBucket(rate=100, capacity=10), 10)) < 0.05
+
+
+def test_rate_after_burst() -> None:
+    # 10 токенов сразу, ещё 20 - со скоростью 100 в секунду
+    elapsed = asyncio.run(_elapsed(TokenBucket(rate=100, capacity=10), 30))
+    assert 0.18 <= elapsed < 0.5
+
+
+def test_pause_drops_tokens() -> None:
+    async def scenario() -> float:
+        bucket = TokenBucket(rate=100, capacity=10)
+        bucket.pause(0.2)
+        return await _elapsed(bucket, 1)
+
+    assert asyncio.run(scenario()) >= 0.2
+
+
+def test_concurrent_senders_share_rate() -> None:
+    async def scenario() -> float:
+        bucket = TokenBucket(rate=100, capacity=1)
+        started = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(21)))
+        return time.monotonic() - started
+
+    assert 0.18 <= asyncio.run(scenario()) < 0.5
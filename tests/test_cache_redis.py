@@ -0,0 +1,22 @@
+import asyncio
+
+from bot.cache.redis import cached
+from bot.core.loader import redis_client
+
+
+def test_cached_accepts_float_soft_ttl(monkeypatch) -> None:
+    # Redis is unreachable in tests: keep every call on the in-process fallback
+    monkeypatch.setattr(redis_client, "_use_redis", lambda: asyncio.sleep(0, result=False))
+    calls = 0
+
+    @cached(ttl=60, namespace="tests", soft_ttl=0.5)
+    async def compute(value: int) -> int:
+        nonlocal calls
+        calls += 1
+        return value * 2
+
+    async def scenario() -> tuple[int, int]:
+        return await compute(21), await compute(21)
+
+    assert asyncio.run(scenario()) == (42, 42)
+    assert calls == 1
@@ -0,0 +1,87 @@
+import dataclasses
+from datetime import date, datetime
+from typing import NamedTuple, Optional
+
+import pytest
+
+from bot.cache import serialization
+from bot.cache.serialization import RowSerializer, SerializationError
+
+
+class CachedUser(NamedTuple):
+    id: int
+    city: Optional[str]
+    created_at: datetime
+    birthday: Optional[date]
+
+
+@dataclasses.dataclass
+class CachedCity:
+    id: str
+    population: int
+
+
+USER = CachedUser(1, "Уфа", datetime(2026, 10, 17, 12, 30), date(2000, 1, 2))
+
+
+@pytest.mark.parametrize("value", [USER, [USER, USER._replace(id=2, city=None, birthday=None)], [], None])
+def test_round_trip(value: object) -> None:
+    serializer = RowSerializer(CachedUser)
+    assert serializer.deserialize(serializer.serialize(value)) == value
+
+
+def test_round_trip_dataclass() -> None:
+    serializer = RowSerializer(CachedCity)
+    rows = [CachedCity("ufa", 1_100_000)]
+    assert serializer.deserialize(serializer.serialize(rows)) == rows
+
+
+def test_converts_objects_and_mappings() -> None:
+    class OrmUser:
+        id = 1
+        city = "Уфа"
+        created_at = USER.created_at
+        birthday = USER.birthday
+        full_name = "not cached"
+
+    serializer = RowSerializer(CachedUser)
+    assert serializer.deserialize(serializer.serialize(OrmUser())) == USER
+    assert serializer.deserialize(serializer.serialize([USER._asdict()])) == [USER]
+
+
+@pytest.mark.skipif(serialization.zstd is None, reason="zstd is not available")
+def test_compressed_round_trip() -> None:
+    serializer = RowSerializer(CachedUser, compress_threshold=0)
+    value = serializer.serialize([USER] * 10)
+    assert serializer.deserialize(value) == [USER] * 10
+
+
+def test_fingerprint_mismatch_on_new_fields() -> None:
+    # Тот же класс после деплоя с новым полем
+    changed = NamedTuple(
+        "CachedUser",
+        [("id", int), ("city", Optional[str]), ("created_at", datetime), ("birthday", Optional[date]), ("is_block", bool)],
+    )
+    changed.__module__ = CachedUser.__module__
+    value = RowSerializer(CachedUser).serialize(USER)
+    with pytest.raises(SerializationError):
+        RowSerializer(changed).deserialize(value)
+
+
+def test_fingerprint_mismatch_on_version() -> None:
+    value = RowSerializer(CachedUser, version=1).serialize(USER)
+    with pytest.raises(SerializationError):
+        RowSerializer(CachedUser, version=2).deserialize(value)
+
+
+def test_rejects_foreign_values() -> None:
+    serializer = RowSerializer(CachedUser)
+    with pytest.raises(SerializationError):
+        serializer.deserialize(b"R")
+    with pytest.raises(SerializationError):
+        serializer.deserialize(serialization.PickleSerializer().serialize(USER))
+
+
+def test_row_type_must_be_a_row() -> None:
+    with pytest.raises(TypeError):
+        RowSerializer(dict)
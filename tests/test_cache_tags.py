@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+import pytest
+
+from bot.cache.keys import generation_key
+from bot.cache.serialization import SerializationError
+from bot.cache.tags import get_generations, invalidate_tags, pack_generations, unpack_generations
+from bot.core.loader import redis_client
+
+
+@pytest.mark.parametrize("generations", [(), (1,), (time.time_ns(), 7, 2**64 - 1)])
+def test_pack_round_trip(generations: tuple[int, ...]) -> None:
+    assert unpack_generations(pack_generations(generations) + b"value") == (generations, b"value")
+
+
+def test_unpack_rejects_truncated_header() -> None:
+    with pytest.raises(SerializationError):
+        unpack_generations(b"")
+    with pytest.raises(SerializationError):
+        unpack_generations(pack_generations((1, 2))[:-1])
+
+
+def test_invalidate_seeds_lost_counter(monkeypatch) -> None:
+    # Redis is unreachable in tests: keep every call on the in-process fallback
+    monkeypatch.setattr(redis_client, "_use_redis", lambda: asyncio.sleep(0, result=False))
+    key = generation_key("tests:lost")
+
+    async def scenario() -> tuple[int, int, int, int]:
+        before = time.time_ns()
+        (generation,) = await get_generations(["tests:lost"])
+        await redis_client.delete(key)
+        await invalidate_tags("tests:lost")
+        seeded = int(await redis_client.get(key))
+        await invalidate_tags("tests:lost")
+        return before, generation, seeded, int(await redis_client.get(key))
+
+    before, generation, seeded, incremented = asyncio.run(scenario())
+    # A lost counter restarts from the current time, never from 1, so old entries cannot match again
+    assert generation >= before
+    assert seeded > generation
+    assert incremented == seeded + 1
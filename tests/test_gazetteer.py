@@ -0,0 +1,52 @@
+import pytest
+
+from bot.services.gazetteer import BASHKORTOSTAN, gazetteer
+
+
+@pytest.mark.parametrize("name", ["Уфа", "ufa", "Ufa ", "  г. Уфа ", "УФА"])
+def test_resolve_spellings(name: str) -> None:
+    city = gazetteer.resolve(name)
+    assert city is not None
+    assert city.id == "ufa"
+
+
+def test_resolve_transliteration_variants() -> None:
+    assert gazetteer.resolve("Oktyabrskiy").id == "oktyabrsky"
+
+
+def test_homonyms_are_not_resolved() -> None:
+    assert gazetteer.resolve("Благовещенск") is None
+    homonyms = gazetteer.lookup("Благовещенск")
+    assert [city.id for city in homonyms] == ["blagoveshchensk-ba", "blagoveshchensk-amur"]
+    # Одноимённые города различаются регионом в названии
+    assert [city.name for city in homonyms] == ["Благовещенск (Башкортостан)", "Благовещенск (Амурская область)"]
+
+
+def test_homonyms_are_suggested_in_gazetteer_order() -> None:
+    assert [city.id for city in gazetteer.suggest("Благовещенск")] == ["blagoveshchensk-ba", "blagoveshchensk-amur"]
+
+
+@pytest.mark.parametrize(("typed", "suggested"), [("Стерлитамк", "sterlitamak"), ("Ишим", "ishimbay")])
+def test_similar_names_are_only_suggested(typed: str, suggested: str) -> None:
+    assert gazetteer.resolve(typed) is None
+    assert gazetteer.suggest(typed)[0].id == suggested
+
+
+def test_resolve_by_id() -> None:
+    assert gazetteer.resolve("blagoveshchensk-amur").region == "Амурская область"
+
+
+def test_user_city_fields() -> None:
+    assert gazetteer.user_city_fields("ufa") == {"city": "Уфа", "city_id": "ufa"}
+    assert gazetteer.user_city_fields(" Благовещенск ") == {"city": "Благовещенск", "city_id": None}
+
+
+def test_display_name() -> None:
+    assert gazetteer.display_name("blagoveshchensk-amur") == "Благовещенск (Амурская область)"
+    assert gazetteer.display_name("Мой  город") == "Мой город"
+
+
+def test_region_cities() -> None:
+    cities = gazetteer.region_cities(BASHKORTOSTAN)
+    assert len(cities) == 21
+    assert all(city.region == BASHKORTOSTAN for city in cities)
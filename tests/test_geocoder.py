@@ -0,0 +1,50 @@
+import math
+import random
+
+import pytest
+
+from bot.services.gazetteer import gazetteer
+from bot.services.geocoder import EARTH_RADIUS_KM, NearestCityIndex, nearest_city_index
+
+UFA = gazetteer.get("ufa")
+
+
+def test_nearest_city() -> None:
+    nearest = nearest_city_index.nearest(54.74, 55.97)
+    assert nearest.city.id == "ufa"
+    assert nearest.distance_km < 1
+
+
+def test_distance_cap() -> None:
+    index = NearestCityIndex([UFA])
+    # Градус широты - около 111 км
+    assert index.nearest(UFA.latitude + 1, UFA.longitude).distance_km == pytest.approx(111.2, abs=0.5)
+    assert index.nearest(UFA.latitude + 2, UFA.longitude) is None
+    assert index.nearest(UFA.latitude + 2, UFA.longitude, max_distance_km=300).city == UFA
+    assert index.nearest(UFA.latitude + 2, UFA.longitude, max_distance_km=None).city == UFA
+
+
+def test_no_city_far_away() -> None:
+    assert nearest_city_index.nearest(-60.0, -140.0) is None
+
+
+def test_empty_index() -> None:
+    assert NearestCityIndex([]).nearest(0.0, 0.0, max_distance_km=None) is None
+
+
+def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def test_matches_brute_force() -> None:
+    cities = list(gazetteer)
+    rng = random.Random(42)
+    for _ in range(500):
+        latitude, longitude = rng.uniform(-80, 80), rng.uniform(-180, 180)
+        nearest = nearest_city_index.nearest(latitude, longitude, max_distance_km=None)
+        expected = min(cities, key=lambda city: _haversine_km(latitude, longitude, city.latitude, city.longitude))
+        assert nearest.distance_km == pytest.approx(
+            _haversine_km(latitude, longitude, expected.latitude, expected.longitude), abs=1e-6
+        )
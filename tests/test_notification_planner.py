@@ -0,0 +1,91 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from bot.services.notification_planner import NotificationPlanner, PrayerBucket, parse_timezone, utc_now
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("Europe/Moscow", ZoneInfo("Europe/Moscow")),
+        (" Asia/Yekaterinburg ", ZoneInfo("Asia/Yekaterinburg")),
+        ("+3", timezone(timedelta(hours=3))),
+        ("UTC+5", timezone(timedelta(hours=5))),
+        ("gmt-03:30", timezone(-timedelta(hours=3, minutes=30))),
+        ("+0530", timezone(timedelta(hours=5, minutes=30))),
+        ("UTC+14", timezone(timedelta(hours=14))),
+    ],
+)
+def test_parse_timezone(value: str, expected: object) -> None:
+    assert parse_timezone(value) == expected
+
+
+@pytest.mark.parametrize("value", [None, "", "Moscow", "Mars/Olympus", "+15", "UTC+3:75x"])
+def test_parse_timezone_rejects(value: object) -> None:
+    assert parse_timezone(value) is None
+
+
+def _bucket(fire_at: datetime, prayer: str = "Fajr") -> PrayerBucket:
+    return PrayerBucket(fire_at, "ufa", "Hanafi", prayer, fire_at.date())
+
+
+async def _no_plan() -> list:
+    return []
+
+
+def test_load_keeps_only_upcoming_buckets() -> None:
+    async def scenario() -> NotificationPlanner:
+        planner = NotificationPlanner(_no_plan, dispatch=None)
+        now = utc_now()
+        planner.load([
+            _bucket(now + timedelta(hours=2), "Asr"),
+            _bucket(now - timedelta(hours=1), "Fajr"),
+            _bucket(now + timedelta(hours=1), "Dhuhr"),
+        ])
+        return planner
+
+    planner = asyncio.run(scenario())
+    assert planner.pending == 2
+    assert planner.next_fire_at > utc_now() + timedelta(minutes=59)
+
+
+def test_dispatch_in_order_with_bounded_concurrency_and_retry(monkeypatch) -> None:
+    monkeypatch.setattr(NotificationPlanner, "RETRY_DELAY", 0.01)
+    dispatched: list[str] = []
+    running = peak = 0
+    failures = {"Asr": 1}
+
+    async def dispatch(bucket: PrayerBucket) -> None:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        try:
+            await asyncio.sleep(0.02)
+            if failures.get(bucket.prayer):
+                failures[bucket.prayer] -= 1
+                raise RuntimeError("database is unavailable")
+            dispatched.append(bucket.prayer)
+        finally:
+            running -= 1
+
+    async def scenario() -> None:
+        planner = NotificationPlanner(_no_plan, dispatch)
+        planner.start()
+        now = utc_now()
+        planner.load([
+            _bucket(now + timedelta(milliseconds=60), "Isha"),
+            _bucket(now + timedelta(milliseconds=10), "Fajr"),
+            _bucket(now + timedelta(milliseconds=20), "Dhuhr"),
+            _bucket(now + timedelta(milliseconds=20), "Asr"),
+            _bucket(now + timedelta(milliseconds=20), "Maghrib"),
+        ])
+        await asyncio.sleep(0.4)
+        await planner.stop()
+
+    asyncio.run(scenario())
+    assert dispatched[0] == "Fajr"
+    assert sorted(dispatched) == ["Asr", "Dhuhr", "Fajr", "Isha", "Maghrib"]
+    assert peak <= NotificationPlanner.DISPATCH_CONCURRENCY
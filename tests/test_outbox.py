@@ -0,0 +1,30 @@
+import asyncio
+
+from bot.services.outbox import NotificationOutbox, OutboxWorker
+
+
+def test_kick_during_claim_is_not_lost(monkeypatch) -> None:
+    async def scenario() -> int:
+        claim_started = asyncio.Event()
+        claims = 0
+
+        async def claim(_limit: int) -> list:
+            nonlocal claims
+            claims += 1
+            claim_started.set()
+            # The claim query is in flight while a new row is enqueued
+            await asyncio.sleep(0.05)
+            return []
+
+        monkeypatch.setattr(NotificationOutbox, "claim", claim)
+        worker = OutboxWorker(broadcaster=None)
+        monkeypatch.setattr(worker, "POLL_INTERVAL", 60)
+        worker.start()
+        await claim_started.wait()
+        worker.kick()
+        await asyncio.sleep(0.2)
+        await worker.stop()
+        return claims
+
+    # The kick is kept, so the worker claims again without waiting for POLL_INTERVAL
+    assert asyncio.run(scenario()) == 2
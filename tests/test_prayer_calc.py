@@ -0,0 +1,54 @@
+from datetime import date
+
+from bot.services.prayer_calc import calculate_timetable
+
+# Уфа из газеттира
+UFA = (54.7388, 55.9721, "Asia/Yekaterinburg")
+
+
+def _times(timings: dict) -> dict:
+    return {key: timings[key] for key in ("Fajr", "Sunrise", "Dhuhr", "Asr", "Maghrib", "Isha")}
+
+
+# Эталонные значения - PrayTimes.org (Karachi: Фаджр и Иша 18°, highLats=AngleBased)
+def test_ufa_summer_solstice_karachi_hanafi() -> None:
+    (day,) = calculate_timetable(*UFA, date(2026, 6, 21), 1, method_id=1, asr_factor=2)
+    assert _times(day) == {
+        "Fajr": "02:38",
+        "Sunrise": "04:39",
+        "Dhuhr": "13:18",
+        "Asr": "19:04",
+        "Maghrib": "21:57",
+        "Isha": "23:58",
+    }
+
+
+def test_ufa_winter_solstice_karachi_shafi() -> None:
+    (day,) = calculate_timetable(*UFA, date(2026, 12, 21), 1, method_id=1, asr_factor=1)
+    assert _times(day) == {
+        "Fajr": "07:21",
+        "Sunrise": "09:37",
+        "Dhuhr": "13:14",
+        "Asr": "14:37",
+        "Maghrib": "16:51",
+        "Isha": "19:07",
+    }
+
+
+def test_isha_interval_method() -> None:
+    # Umm al-Qura: Иша через 90 минут после Магриба
+    (day,) = calculate_timetable(21.4225, 39.8262, "Asia/Riyadh", date(2026, 3, 20), 1, method_id=4)
+    assert (day["Fajr"], day["Maghrib"], day["Isha"]) == ("05:09", "18:32", "20:02")
+
+
+def test_multi_day_matches_single_day() -> None:
+    week = calculate_timetable(*UFA, date(2026, 6, 18), 7, method_id=1, asr_factor=2)
+    assert len(week) == 7
+    assert week[3] == calculate_timetable(*UFA, date(2026, 6, 21), 1, method_id=1, asr_factor=2)[0]
+
+
+def test_daylight_saving_shift() -> None:
+    # В Берлине 29.03.2026 часы переводятся на час вперёд
+    before, after = calculate_timetable(52.52, 13.405, "Europe/Berlin", date(2026, 3, 28), 2, method_id=3)
+    assert before["Dhuhr"][:2] == "12"
+    assert after["Dhuhr"][:2] == "13"